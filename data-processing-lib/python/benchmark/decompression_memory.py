@@ -0,0 +1,120 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""
+Benchmark of the memory use of reading compressed JSON lines files, comparing reading the whole decompressed
+file (DataAccess.get_file) with consuming it line by line from a decompressing stream
+(DataAccess.get_file_stream). Peak memory is measured using tracemalloc. zstd requires the zstandard package.
+Usage:
+    python decompression_memory.py --size_mb 256 --codecs gz bz2 xz zst
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from data_processing.data_access import DataAccessLocal
+from data_processing.utils import MB
+
+
+def get_compressor(codec: str) -> Callable[[bytes], bytes]:
+    """
+    Get compression function of a codec
+    :param codec: codec (file extension)
+    :return: compression function
+    """
+    if codec == "gz":
+        return gzip.compress
+    if codec == "bz2":
+        return bz2.compress
+    if codec == "xz":
+        return lzma.compress
+    import zstandard
+
+    return zstandard.ZstdCompressor().compress
+
+
+def measure(read: Callable[[], int]) -> tuple[int, float, float]:
+    """
+    Measure peak memory and time of a read
+    :param read: read function, returning the number of lines read
+    :return: number of lines, peak memory (MB) and time (sec)
+    """
+    tracemalloc.start()
+    start = time.time()
+    lines = read()
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lines, peak / MB, elapsed
+
+
+def read_file(data_access: DataAccessLocal, path: str) -> int:
+    """
+    Read lines of the whole decompressed file
+    :param data_access: data access
+    :param path: file path
+    :return: number of lines
+    """
+    data, _ = data_access.get_file(path)
+    lines = 0
+    for line in data.splitlines():
+        json.loads(line)
+        lines += 1
+    return lines
+
+
+def read_stream(data_access: DataAccessLocal, path: str) -> int:
+    """
+    Read lines from a decompressing stream
+    :param data_access: data access
+    :param path: file path
+    :return: number of lines
+    """
+    stream, _ = data_access.get_file_stream(path)
+    lines = 0
+    with stream:
+        for line in stream:
+            json.loads(line)
+            lines += 1
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compressed file read memory benchmark")
+    parser.add_argument("--size_mb", type=int, default=128, help="uncompressed file size (MB)")
+    parser.add_argument("--codecs", type=str, nargs="+", default=["gz", "bz2", "xz"], help="codecs to test")
+    args = parser.parse_args()
+
+    # JSON lines of about 1KB, with random (hex) contents
+    n_lines = args.size_mb * MB // 1024
+    content = b"".join(
+        json.dumps({"id": i, "contents": os.urandom(490).hex()}).encode() + b"\n" for i in range(n_lines)
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        d_a = DataAccessLocal({"input_folder": folder, "output_folder": folder})
+        print(f"{'codec':>6} {'compressed MB':>14} {'mode':>7} {'lines':>9} {'peak MB':>9} {'time sec':>9}")
+        for codec in args.codecs:
+            path = os.path.join(folder, f"data.jsonl.{codec}")
+            with open(path, "wb") as f:
+                f.write(get_compressor(codec)(content))
+            compressed = os.path.getsize(path) / MB
+            for mode, read in [("file", read_file), ("stream", read_stream)]:
+                lines, peak, elapsed = measure(lambda: read(d_a, path))
+                print(f"{codec:>6} {compressed:>14.1f} {mode:>7} {lines:>9} {peak:>9.1f} {elapsed:>9.2f}")
@@ -0,0 +1,95 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""
+Benchmark of the ArrowS3 transfer throughput, comparing single stream transfers with the concurrent ranged
+GETs and multipart uploads. It runs against an S3 compatible endpoint (for example, MinIO) or, if none is
+given, against a local moto server (requires moto[server]). Usage:
+    python s3_transfer.py --size_mb 256 --concurrency 1 4 8
+    python s3_transfer.py --endpoint http://localhost:9000 --access_key minioadmin --secret_key minioadmin
+"""
+
+import argparse
+import os
+import time
+
+from data_processing.data_access import ArrowS3
+from data_processing.utils import GB, MB
+
+
+BUCKET = "dpk-transfer-benchmark"
+
+
+def measure(arrow_s3: ArrowS3, key: str, data: bytes) -> tuple[float, float]:
+    """
+    Measure write and read throughput
+    :param arrow_s3: s3 access
+    :param key: complete path
+    :param data: file content
+    :return: write and read throughput (MB/sec)
+    """
+    start = time.time()
+    res, _ = arrow_s3.save_file(key=key, data=data)
+    if res is None:
+        raise RuntimeError(f"failed to write {key}")
+    write_time = time.time() - start
+    start = time.time()
+    read, _ = arrow_s3.read_file_buffer(key=key)
+    if read is None or len(read) != len(data):
+        raise RuntimeError(f"failed to read {key}")
+    read_time = time.time() - start
+    arrow_s3.delete_file(key=key)
+    return len(data) / MB / write_time, len(data) / MB / read_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ArrowS3 transfer benchmark")
+    parser.add_argument("--endpoint", type=str, default=None, help="S3 endpoint, local moto server if not defined")
+    parser.add_argument("--access_key", type=str, default="access", help="S3 access key")
+    parser.add_argument("--secret_key", type=str, default="secret", help="S3 secret key")
+    parser.add_argument("--size_mb", type=int, default=256, help="size of the transferred file (MB)")
+    parser.add_argument("--part_size_mb", type=int, default=8, help="part size (MB)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16], help="transfer concurrency")
+    args = parser.parse_args()
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        from moto.server import ThreadedMotoServer
+
+        server = ThreadedMotoServer(port=0)
+        server.start()
+        host, port = server.get_host_and_port()
+        endpoint = f"http://{host}:{port}"
+    data = os.urandom(args.size_mb * MB)
+    print(f"{'transfer':<24} {'write, MB/sec':>14} {'read, MB/sec':>13}")
+    try:
+        # single stream transfers, as a baseline
+        configurations = [("single stream", {"transfer_concurrency": 1, "part_size": GB, "multipart_threshold": GB})]
+        configurations += [
+            (f"{concurrency} x {args.part_size_mb}MB parts", {"transfer_concurrency": concurrency})
+            for concurrency in args.concurrency
+        ]
+        for name, config in configurations:
+            arrow_s3 = ArrowS3(
+                access_key=args.access_key,
+                secret_key=args.secret_key,
+                endpoint=endpoint,
+                region="us-east-1",
+                **({"part_size": args.part_size_mb * MB, "multipart_threshold": args.part_size_mb * MB} | config),
+            )
+            if server is not None and name == "single stream":
+                arrow_s3.s3_client.create_bucket(Bucket=BUCKET)
+            write, read = measure(arrow_s3=arrow_s3, key=f"{BUCKET}/data.bin", data=data)
+            print(f"{name:<24} {write:>14.1f} {read:>13.1f}")
+    finally:
+        if server is not None:
+            server.stop()
@@ -1,7 +1,12 @@
+from data_processing.data_access.file_listing import ListingCache
+from data_processing.data_access.disk_cache import DiskCache
 from data_processing.data_access.arrow_s3 import ArrowS3
 from data_processing.data_access.data_access import DataAccess
+from data_processing.data_access.checkpoint_ledger import CheckpointLedger
 from data_processing.data_access.data_access_local import DataAccessLocal
 from data_processing.data_access.data_access_s3 import DataAccessS3
+from data_processing.data_access.data_access_memory import DataAccessMemory
+from data_processing.data_access.data_access_shared_memory import DataAccessSharedMemory
 from data_processing.data_access.data_access_factory_base import DataAccessFactoryBase
 from data_processing.data_access.data_access_factory import DataAccessFactory
 from data_processing.data_access.snapshot_utils import SnapshotUtils
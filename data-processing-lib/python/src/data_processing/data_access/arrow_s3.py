@@ -10,22 +10,34 @@
 # limitations under the License.
 ################################################################################
 
-from typing import Any
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Union
 
 import boto3
 import pyarrow as pa
 from botocore.config import Config
-from data_processing.utils import TransformUtils, get_logger
+from botocore.exceptions import ClientError
+from data_processing.data_access.file_listing import ListingPage, iterate_folder_tree
+from data_processing.utils import MB, TransformUtils, get_logger
 
 
 logger = get_logger(__name__)
 
+# errors of reads of files that were modified or removed, these reads can not succeed when retried
+NON_RETRYABLE_READ_ERRORS = ("PreconditionFailed", "NoSuchKey")
+
 
 class ArrowS3:
     """
     Class replacing direct access to S3/COS by Pyarrow's `fs.S3FileSystem`. It uses Boto3 to interact
     with S3/COS and pyarrow to convert between Arrow table and binary. Usage of Boto3 for S3/COS access
-    proves to be significantly more reliable
+    proves to be significantly more reliable.
+    Files larger than the part size are transferred in parts by a pool of transfer threads: reads use
+    concurrent ranged GETs into a preallocated buffer, writes larger than the multipart threshold use
+    multipart uploads. The transfer threads, as well as any other threads using the class (read ahead,
+    write behind, listing), share the connection pool of the Boto3 client
     """
 
     def __init__(
@@ -36,6 +48,10 @@ class ArrowS3:
         region: str = None,
         s3_retries: int = 10,
         s3_max_attempts=10,
+        transfer_concurrency: int = 8,
+        part_size: int = 8 * MB,
+        multipart_threshold: int = 16 * MB,
+        max_pool_connections: int = None,
     ) -> None:
         """
         Initialization
@@ -45,6 +61,11 @@ class ArrowS3:
         :param region: s3 region
         :param s3_retries: number of S3 retries - default 10
         :param s3_max_attempts - boto s3 client internal retries - default 10
+        :param transfer_concurrency: number of parts of a file transferred concurrently - default 8
+        :param part_size: size of the transferred parts - default 8MB, has to be at least 5MB for uploads
+        :param multipart_threshold: files larger than the threshold are uploaded in parts - default 16MB
+        :param max_pool_connections: size of the connection pool, default is twice the transfer concurrency
+                                     (at least 10), so that concurrent transfers do not wait for connections
         """
         # Create boto S3 client
         self.s3_client = boto3.client(
@@ -53,10 +74,31 @@ class ArrowS3:
             aws_secret_access_key=secret_key,
             endpoint_url=endpoint,
             region_name=region,
-            config=Config(retries={"max_attempts": s3_max_attempts, "mode": "standard"}),
+            config=Config(
+                retries={"max_attempts": s3_max_attempts, "mode": "standard"},
+                max_pool_connections=max_pool_connections or max(10, 2 * transfer_concurrency),
+            ),
         )
         self.retries = s3_retries
         self.s3_max_attempts = s3_max_attempts
+        self.transfer_concurrency = max(1, transfer_concurrency)
+        self.part_size = part_size
+        self.multipart_threshold = max(multipart_threshold, part_size)
+        # transfer thread pool, created on the first multipart transfer
+        self.executor = None
+        self.executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Get transfer thread pool
+        :return: thread pool
+        """
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.transfer_concurrency, thread_name_prefix="s3_transfer"
+                )
+            return self.executor
 
     @staticmethod
     def _get_bucket_key(key: str) -> tuple[str, str]:
@@ -69,26 +111,49 @@ class ArrowS3:
         return prefixes[0], "/".join(prefixes[1:])
 
     # get list of the files (names and sizes) for a given prefix (including bucket name)
-    def list_files(self, key: str) -> tuple[list[dict[str, Any]], int]:
+    def list_files(self, key: str, threads: int = 1) -> tuple[list[dict[str, Any]], int]:
         """
         List files in the folder (hierarchically going through all sub-folders)
         :param key: complete folder name
-        :return: list of dictionaries, containing file names and length and number of retries
+        :param threads: number of threads listing the sub folders in parallel
+        :return: list of dictionaries, containing file names, length and etag and number of retries
         """
-        bucket, prefix = self._get_bucket_key(key)
-        # Use paginator here to get all the files rather then 1 page
-        paginator = self.s3_client.get_paginator("list_objects_v2")
-        pages = paginator.paginate(Bucket=bucket, Prefix=prefix)
         files = []
         retries = 0
-        for page in pages:
-            # For every page
-            retries += page.get("ResponseMetadata", {}).get("RetryAttempts", 0)
-            for obj in page.get("Contents", []):
-                # Get both file name and size
-                files.append({"name": f"{bucket}/{obj['Key']}", "size": obj["Size"]})
+        for page, retries1 in self.iterate_files(key=key, threads=threads):
+            files.extend(page)
+            retries += retries1
         return files, retries
 
+    def iterate_files(self, key: str, threads: int = 1) -> Iterator[tuple[list[dict[str, Any]], int]]:
+        """
+        List files in the folder (hierarchically going through all sub-folders), fanning the listing out
+        over the sub folders (common prefixes) using a thread pool. Pages of files are returned as they are
+        listed, so their order is not defined
+        :param key: complete folder name
+        :param threads: number of threads listing the sub folders in parallel
+        :return: iterator of the lists of dictionaries, containing file names, length and etag and
+                 numbers of retries
+        """
+        yield from iterate_folder_tree(root=key, list_folder=self._list_folder, threads=threads)
+
+    def _list_folder(self, key: str) -> Iterator[ListingPage]:
+        """
+        List a single level of the folder
+        :param key: complete folder name
+        :return: iterator of pages of files, sub folders and number of retries
+        """
+        bucket, prefix = self._get_bucket_key(key)
+        # Use paginator here to get all the files rather then 1 page, delimiter to get the sub folders
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+            files = [
+                {"name": f"{bucket}/{obj['Key']}", "size": obj["Size"], "etag": obj.get("ETag")}
+                for obj in page.get("Contents", [])
+            ]
+            sub_folders = [f"{bucket}/{p['Prefix']}" for p in page.get("CommonPrefixes", [])]
+            yield files, sub_folders, page.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+
     def list_folders(self, key: str) -> tuple[list[str], int]:
         """
         Get list of folders for folder
@@ -123,28 +188,154 @@ class ArrowS3:
         :param key: complete path
         :return: byte array of file content or None if the file does not exist and a number of retries
         """
+        data, retries = self.read_file_buffer(key=key)
+        if data is None or isinstance(data, bytes):
+            return data, retries
+        return bytes(data), retries
+
+    def read_file_buffer(self, key: str) -> tuple[Union[bytes, bytearray], int]:
+        """
+        Read an s3 file by name. The first part of the file is read by a ranged GET, returning the file size,
+        so that files smaller than the part size take a single request. The remaining parts of larger files are
+        read concurrently into a preallocated buffer, that is returned without copying it
+        :param key: complete path
+        :return: file content (bytes or bytearray) or None if the file does not exist and a number of retries
+        """
         bucket, prefix = self._get_bucket_key(key)
         retries = 0
         for n in range(self.retries):
             try:
-                obj = self.s3_client.get_object(Bucket=bucket, Key=prefix)
+                obj = self.s3_client.get_object(Bucket=bucket, Key=prefix, Range=f"bytes=0-{self.part_size - 1}")
                 retries += obj.get("ResponseMetadata", {}).get("RetryAttempts", 0)
-                return obj["Body"].read(), retries
+                first = obj["Body"].read()
+                break
             except Exception as e:
+                if isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") == "InvalidRange":
+                    # ranges of empty files are not satisfiable
+                    return b"", retries
                 logger.error(f"failed to read file {key}, exception {e}, attempt {n}")
                 retries += self.s3_max_attempts
-        logger.error(f"failed to read file {key} in {self.retries} attempts. Skipping it")
+        else:
+            logger.error(f"failed to read file {key} in {self.retries} attempts. Skipping it")
+            return None, retries
+        # content range is "bytes <first>-<last>/<size>", it is missing if the range is ignored
+        content_range = obj.get("ContentRange")
+        size = int(content_range.split("/")[-1]) if content_range else len(first)
+        if size <= len(first):
+            return first, retries
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        view[: len(first)] = first
+        # read the parts of the same version of the file
+        etag = obj.get("ETag")
+        futures = [
+            self._get_executor().submit(
+                self._read_part,
+                key=key,
+                view=view,
+                offset=offset,
+                length=min(self.part_size, size - offset),
+                etag=etag,
+            )
+            for offset in range(len(first), size, self.part_size)
+        ]
+        completed = True
+        for future in futures:
+            part_completed, part_retries = future.result()
+            completed = completed and part_completed
+            retries += part_retries
+        if not completed:
+            logger.error(f"failed to read file {key}. Skipping it")
+            return None, retries
+        return buffer, retries
+
+    def _read_part(self, key: str, view: memoryview, offset: int, length: int, etag: str) -> tuple[bool, int]:
+        """
+        Read a part of an s3 file into a buffer
+        :param key: complete path
+        :param view: buffer
+        :param offset: part start
+        :param length: part length
+        :param etag: etag of the file
+        :return: True if the part was read and a number of retries
+        """
+        data, retries = self.read_file_range(key=key, offset=offset, length=length, etag=etag)
+        if data is None or len(data) != length:
+            return False, retries
+        view[offset : offset + length] = data
+        return True, retries
+
+    def read_file_range(self, key: str, offset: int, length: int, etag: str = None) -> tuple[bytes, int]:
+        """
+        Read a byte range of an s3 file
+        :param key: complete path
+        :param offset: range start
+        :param length: range length
+        :param etag: if defined, the range is only read if the file has this etag
+        :return: byte array of the range content or None if the read failed and a number of retries
+        """
+        bucket, prefix = self._get_bucket_key(key)
+        byte_range = f"bytes={offset}-{offset + length - 1}"
+        conditions = {} if etag is None else {"IfMatch": etag}
+        retries = 0
+        for n in range(self.retries):
+            try:
+                obj = self.s3_client.get_object(Bucket=bucket, Key=prefix, Range=byte_range, **conditions)
+                retries += obj.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                return obj["Body"].read(), retries
+            except Exception as e:
+                if isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") in NON_RETRYABLE_READ_ERRORS:
+                    logger.error(f"failed to read {byte_range} of file {key}, it was modified or removed - {e}")
+                    return None, retries
+                logger.error(f"failed to read {byte_range} of file {key}, exception {e}, attempt {n}")
+                retries += self.s3_max_attempts
+        logger.error(f"failed to read range of file {key} in {self.retries} attempts")
         return None, retries
 
+    def get_file_info(self, key: str) -> tuple[dict[str, Any], int]:
+        """
+        Get s3 file info
+        :param key: complete path
+        :return: dictionary containing the file size and etag or None if the file does not exist and
+                 a number of retries
+        """
+        bucket, prefix = self._get_bucket_key(key)
+        try:
+            res = self.s3_client.head_object(Bucket=bucket, Key=prefix)
+        except Exception as e:
+            logger.error(f"failed to get info of file {key}, exception {e}")
+            return None, 0
+        return {"size": res["ContentLength"], "etag": res.get("ETag")}, res.get("ResponseMetadata", {}).get(
+            "RetryAttempts", 0
+        )
+
+    def open_file(self, key: str, size: int = None) -> tuple["S3RandomAccessFile", int]:
+        """
+        Open an s3 file for random access reads
+        :param key: complete path
+        :param size: file size, if known, otherwise it is retrieved from S3
+        :return: file object or None if the file does not exist and a number of retries
+        """
+        retries = 0
+        if size is None:
+            info, retries = self.get_file_info(key=key)
+            if info is None:
+                return None, retries
+            size = info["size"]
+        return S3RandomAccessFile(arrow_s3=self, key=key, size=size), retries
+
     def save_file(self, key: str, data: bytes) -> tuple[dict[str, Any], int]:
         """
-        Save file to S3
+        Save file to S3. Files larger than the multipart threshold are uploaded in parts concurrently
         :param key: complete path
         :param data: byte array of the file content
         :return: dictionary as
         defined https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/put_object.html
+        (or complete_multipart_upload.html for multipart uploads)
         in the case of failure dict is None and the number of retries
         """
+        if len(data) > self.multipart_threshold:
+            return self._save_file_multipart(key=key, data=data)
         bucket, prefix = self._get_bucket_key(key)
         retries = 0
         for n in range(self.retries):
@@ -158,6 +349,86 @@ class ArrowS3:
         logger.error(f"Failed to upload file {key}, skipping it")
         return None, retries
 
+    def _save_file_multipart(self, key: str, data: bytes) -> tuple[dict[str, Any], int]:
+        """
+        Save file to S3 using a multipart upload, uploading the parts concurrently
+        :param key: complete path
+        :param data: byte array of the file content
+        :return: dictionary as
+        defined https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/complete_multipart_upload.html
+        in the case of failure dict is None and the number of retries
+        """
+        bucket, prefix = self._get_bucket_key(key)
+        retries = 0
+        for n in range(self.retries):
+            try:
+                upload = self.s3_client.create_multipart_upload(Bucket=bucket, Key=prefix)
+                retries += upload.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                break
+            except Exception as e:
+                logger.error(f"Failed to start upload of file {key}, exception {e}")
+                retries += self.s3_max_attempts
+        else:
+            logger.error(f"Failed to upload file {key}, skipping it")
+            return None, retries
+        upload_id = upload["UploadId"]
+        view = memoryview(data)
+        futures = [
+            self._get_executor().submit(
+                self._upload_part,
+                key=key,
+                upload_id=upload_id,
+                part_number=number + 1,
+                part=view[offset : offset + self.part_size],
+            )
+            for number, offset in enumerate(range(0, len(data), self.part_size))
+        ]
+        parts = []
+        for number, future in enumerate(futures):
+            etag, part_retries = future.result()
+            retries += part_retries
+            parts.append({"ETag": etag, "PartNumber": number + 1})
+        if all(part["ETag"] is not None for part in parts):
+            for n in range(self.retries):
+                try:
+                    res = self.s3_client.complete_multipart_upload(
+                        Bucket=bucket, Key=prefix, UploadId=upload_id, MultipartUpload={"Parts": parts}
+                    )
+                    retries += res.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                    return res, retries
+                except Exception as e:
+                    logger.error(f"Failed to complete upload of file {key}, exception {e}")
+                    retries += self.s3_max_attempts
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=bucket, Key=prefix, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"Failed to abort upload of file {key}, exception {e}")
+        logger.error(f"Failed to upload file {key}, skipping it")
+        return None, retries
+
+    def _upload_part(self, key: str, upload_id: str, part_number: int, part: memoryview) -> tuple[str, int]:
+        """
+        Upload a part of a multipart upload
+        :param key: complete path
+        :param upload_id: upload id
+        :param part_number: part number
+        :param part: part content
+        :return: part etag or None if the upload failed and the number of retries
+        """
+        bucket, prefix = self._get_bucket_key(key)
+        retries = 0
+        for n in range(self.retries):
+            try:
+                res = self.s3_client.upload_part(
+                    Bucket=bucket, Key=prefix, UploadId=upload_id, PartNumber=part_number, Body=bytes(part)
+                )
+                retries += res.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                return res["ETag"], retries
+            except Exception as e:
+                logger.error(f"Failed to upload part {part_number} of file {key}, exception {e}")
+                retries += self.s3_max_attempts
+        return None, retries
+
     def read_table(self, key: str, schema: pa.schema = None) -> tuple[pa.Table, int]:
         """
         Get an arrow table from a file with a given name
@@ -165,8 +436,8 @@ class ArrowS3:
         :param schema: Schema used for reading table, default None
         :return: table or None if the read failed and the number of retries
         """
-        # Read file as bytes
-        data, retries = self.read_file(key)
+        # Read file as bytes, parquet reader does not need an immutable copy of the buffer
+        data, retries = self.read_file_buffer(key)
         if data is None:
             return None, retries
         return TransformUtils.convert_binary_to_arrow(data=data, schema=schema), retries
@@ -228,3 +499,54 @@ class ArrowS3:
                 logger.error(f"failed to copy file {source} to {dest}, exception {e}")
                 retries += self.s3_max_attempts
         return retries
+
+
+class S3RandomAccessFile(io.RawIOBase):
+    """
+    Read only, seekable file object over an s3 file, reading the requested byte ranges with ranged GETs. It
+    allows pyarrow to read parquet footers and individual row groups without downloading the whole file
+    """
+
+    def __init__(self, arrow_s3: ArrowS3, key: str, size: int):
+        """
+        Initialization
+        :param arrow_s3: s3 access
+        :param key: complete path
+        :param size: file size
+        """
+        super().__init__()
+        self.arrow_s3 = arrow_s3
+        self.key = key
+        self.size = size
+        self.position = 0
+        # number of retries of the reads
+        self.retries = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = max(0, offset)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+        data, retries = self.arrow_s3.read_file_range(key=self.key, offset=self.position, length=length)
+        self.retries += retries
+        if data is None:
+            raise IOError(f"failed to read file {self.key}")
+        buffer[: len(data)] = data
+        self.position += len(data)
+        return len(data)
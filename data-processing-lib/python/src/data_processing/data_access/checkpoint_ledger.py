@@ -0,0 +1,154 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import time
+import uuid
+
+import pyarrow as pa
+from data_processing.data_access import DataAccess
+from data_processing.utils import TransformUtils, get_logger
+
+
+logger = get_logger(__name__)
+
+# ledger segments are saved in this sub folder of the output folder, with this extension
+LEDGER_FOLDER = "_ledger"
+LEDGER_EXTENSION = ".ledger"
+# number of recorded inputs, after which a writer saves a ledger segment
+LEDGER_FLUSH_COUNT = 100
+
+
+class CheckpointLedger:
+    """
+    Persistent ledger of the processed inputs, used for checkpointing. Writers (file processors) record the
+    inputs they completed, with their size and version (S3 etag or local modification time), and save them
+    as a new ledger segment (a parquet file) in the ledger folder of the output folder. Segments are never
+    modified, so that any number of writers can save them concurrently. Reading the ledger merges all its
+    segments, the most recent entry of an input wins
+    """
+
+    def __init__(self, data_access: DataAccess):
+        """
+        Init method
+        :param data_access: data access
+        """
+        self.data_access = data_access
+        self.names = []
+        self.sizes = []
+        self.versions = []
+
+    @staticmethod
+    def get_ledger_folder(data_access: DataAccess) -> str:
+        """
+        Get ledger folder
+        :param data_access: data access
+        :return: ledger folder
+        """
+        output_folder = data_access.get_output_folder()
+        if not output_folder.endswith("/"):
+            output_folder += "/"
+        return f"{output_folder}{LEDGER_FOLDER}/"
+
+    @staticmethod
+    def get_ledger_name(data_access: DataAccess, path: str) -> str:
+        """
+        Get name of an input in the ledger, relative to the input folder, so that the ledger does not depend
+        on the location of the input folder
+        :param data_access: data access
+        :param path: input file or work unit
+        :return: ledger name
+        """
+        input_folder = data_access.get_input_folder()
+        if path.startswith(input_folder):
+            return path[len(input_folder) :].lstrip("/")
+        return path
+
+    def __len__(self) -> int:
+        """
+        Get number of the recorded inputs, that were not saved yet
+        :return: number of the pending inputs
+        """
+        return len(self.names)
+
+    def record(self, path: str) -> int:
+        """
+        Record a completed input
+        :param path: input file or work unit
+        :return: number of operation retries
+        """
+        f_name, _ = self.data_access.parse_work_unit(path)
+        info, retries = self.data_access.get_file_info(path=f_name)
+        if info is None:
+            logger.warning(f"Could not get info of {f_name}, it is not recorded in the ledger")
+            return retries
+        self.names.append(self.get_ledger_name(data_access=self.data_access, path=path))
+        self.sizes.append(info["size"])
+        self.versions.append(info["version"])
+        return retries
+
+    def discard(self, path: str) -> None:
+        """
+        Discard a recorded input, that was not saved yet, for example, because its output could not be written
+        :param path: input file or work unit
+        :return: None
+        """
+        name = self.get_ledger_name(data_access=self.data_access, path=path)
+        if name in self.names:
+            index = self.names.index(name)
+            del self.names[index], self.sizes[index], self.versions[index]
+
+    def flush(self) -> int:
+        """
+        Save the recorded inputs as a new ledger segment
+        :return: number of operation retries
+        """
+        if len(self.names) == 0:
+            return 0
+        table = pa.Table.from_pydict(
+            {
+                "name": pa.array(self.names, type=pa.string()),
+                "size": pa.array(self.sizes, type=pa.int64()),
+                "version": pa.array(self.versions, type=pa.string()),
+            }
+        )
+        path = f"{self.get_ledger_folder(self.data_access)}{time.time_ns()}_{uuid.uuid4().hex}{LEDGER_EXTENSION}"
+        res, retries = self.data_access.save_file(path=path, data=TransformUtils.convert_arrow_to_binary(table))
+        if res is None:
+            logger.warning(f"Failed to save ledger segment {path}, its inputs will be processed again")
+        self.names, self.sizes, self.versions = [], [], []
+        return retries
+
+    @staticmethod
+    def load(data_access: DataAccess) -> tuple[dict[str, tuple[int, str]], int]:
+        """
+        Load the ledger
+        :param data_access: data access
+        :return: dictionary of the ledger names of the completed inputs to their (size, version) or None,
+                 if the ledger does not exist and number of operation retries
+        """
+        segments, retries = data_access.get_folder_files(
+            path=CheckpointLedger.get_ledger_folder(data_access), extensions=[LEDGER_EXTENSION]
+        )
+        if len(segments) == 0:
+            return None, retries
+        entries = {}
+        # segment names start with their creation time, so the more recent entries override the older ones
+        for name in sorted(segments.keys(), key=lambda s: TransformUtils.get_file_basename(s)):
+            table = TransformUtils.convert_binary_to_arrow(segments[name])
+            if table is None:
+                logger.warning(f"Failed to read ledger segment {name}, skipping it")
+                continue
+            entries |= dict(
+                zip(table["name"].to_pylist(), zip(table["size"].to_pylist(), table["version"].to_pylist()))
+            )
+        logger.info(f"Loaded {len(entries)} ledger entries from {len(segments)} segments")
+        return entries, retries
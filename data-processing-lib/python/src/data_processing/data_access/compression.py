@@ -0,0 +1,77 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import bz2
+import gzip
+import io
+import lzma
+from typing import BinaryIO, Union
+
+
+# extensions of the compressed files, that are decompressed when read
+COMPRESSION_EXTENSIONS = [".gz", ".bz2", ".xz", ".zst"]
+
+
+def get_compression(path: str) -> str:
+    """
+    Get compression of a file, based on its extension
+    :param path: file path
+    :return: compression extension or None, if the file is not compressed
+    """
+    for extension in COMPRESSION_EXTENSIONS:
+        if path.endswith(extension):
+            return extension
+    return None
+
+
+def open_decompressed(source: Union[str, BinaryIO], path: str = None) -> BinaryIO:
+    """
+    Open a stream decompressing a file incrementally, based on the file extension. zstd compressed files
+    require the zstandard package
+    :param source: local file path, the file is closed with the returned stream, or a stream of the file
+                   content, that is not closed by the returned stream
+    :param path: file path, used for the compression detection, the source by default
+    :return: stream of the decompressed content, the content itself, if the file is not compressed
+    """
+    if path is None:
+        path = source
+    compression = get_compression(path)
+    if compression == ".gz":
+        return gzip.open(source, mode="rb")
+    if compression == ".bz2":
+        return bz2.open(source, mode="rb")
+    if compression == ".xz":
+        return lzma.open(source, mode="rb")
+    if compression == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"zstandard package is required to read zstd compressed file {path}")
+        if isinstance(source, str):
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(source, "rb"), closefd=True))
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(source, closefd=False))
+    if isinstance(source, str):
+        return open(source, "rb")
+    return source
+
+
+def decompress(data: bytes, path: str) -> bytes:
+    """
+    Decompress file content, based on the file extension
+    :param data: file content
+    :param path: file path
+    :return: decompressed content, the content itself, if the file is not compressed
+    """
+    if get_compression(path) is None:
+        return data
+    with open_decompressed(io.BytesIO(data), path=path) as stream:
+        return stream.read()
@@ -11,12 +11,17 @@
 ################################################################################
 
 import random
-from typing import Any
+from typing import Any, BinaryIO, Iterator
 
 import pyarrow as pa
+import pyarrow.parquet as pq
 from data_processing.utils import KB, MB, GB, TransformUtils, get_logger
 
 
+# separator between the file name and the row group range of a row group work unit
+ROW_GROUP_UNIT_SEPARATOR = "#row_groups="
+
+
 class DataAccess:
     """
     Base class for data access (interface), defining all the methods
@@ -29,6 +34,9 @@ class DataAccess:
             n_samples: int,
             files_to_use: list[str],
             files_to_checkpoint: list[str],
+            split_size: int = 0,
+            listing_threads: int = 1,
+            listing_cache_ttl: float = 0,
     ):
         """
         Create data access class for folder based configuration
@@ -38,6 +46,10 @@ class DataAccess:
         :param n_samples: amount of files to randomly sample
         :param files_to_use: files extensions of files to include
         :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param split_size: parquet files larger than split size (bytes) are split into work units of
+                           consecutive row groups of about split size. 0 disables splitting
+        :param listing_threads: number of threads listing the sub folders of the input in parallel
+        :param listing_cache_ttl: time to live (sec) of the persistent cache of the input listings, 0 disables it
         """
         self.d_sets = d_sets
         self.checkpoint = checkpoint
@@ -45,6 +57,21 @@ class DataAccess:
         self.n_samples = n_samples
         self.files_to_use = files_to_use
         self.files_to_checkpoint = files_to_checkpoint
+        self.split_size = split_size
+        self.listing_threads = listing_threads
+        self.listing_cache = None
+        if listing_cache_ttl > 0:
+            from data_processing.data_access.file_listing import ListingCache
+
+            self.listing_cache = ListingCache(ttl=listing_cache_ttl)
+        # sizes of the files returned by the listing of the folders, used for scheduling
+        self.file_sizes = {}
+        # versions of the files returned by the listing of the folders, if the listing provides them
+        self.file_versions = {}
+        # checkpointing state: base names of the existing output files and the checkpoint ledger,
+        # a dictionary of the processed inputs to their size and version (None if there is no ledger)
+        self.checkpoint_names = set()
+        self.ledger = None
         self.logger = get_logger(__name__)
 
     def get_output_folder(self) -> str:
@@ -61,6 +88,23 @@ class DataAccess:
         """
         raise NotImplementedError("Subclasses should implement this!")
 
+    def is_process_local(self) -> bool:
+        """
+        Check whether the files are visible only in the process, that created the data access. Such data access
+        can not be used by runtimes processing files in other processes
+        :return: True if the files are local to the process
+        """
+        return False
+
+    def get_file_sizes(self, files: list[str]) -> list[int]:
+        """
+        Get sizes of the files, as returned by the listing of their folders (for example by
+        get_files_to_process). The size of files that were not listed is 0
+        :param files: list of files
+        :return: list of file sizes
+        """
+        return [self.file_sizes.get(f, 0) for f in files]
+
     def get_random_file_set(self, n_samples: int, files: list[str]) -> list[str]:
         """
         Get random set of files
@@ -83,10 +127,13 @@ class DataAccess:
         self.logger.info(f"Using files {result} to sample data")
         return result
 
-    def get_files_to_process(self) -> tuple[list[str], dict[str, float], int]:
+    def get_files_to_process(self, split_files: bool = True) -> tuple[list[str], dict[str, float], int]:
         """
         Get files to process
-        :return: list of files and a dictionary of the files profile:
+        :param split_files: split large parquet files into row group work units (if split size is defined).
+                            Runtimes that can not process work units (for example data frame based ones)
+                            should set it to False
+        :return: list of files (or work units) and a dictionary of the files profile:
             "max_file_size_MB",
             "min_file_size_MB",
             "avg_file_size_MB",
@@ -99,10 +146,122 @@ class DataAccess:
             return [], {}, 0
         path_list, path_profile, retries = self._get_files_to_process_internal()
         if self.n_samples > 0:
-            files = self.get_random_file_set(n_samples=self.n_samples, files=path_list)
-            return files, path_profile, retries
+            path_list = self.get_random_file_set(n_samples=self.n_samples, files=path_list)
+        if split_files and self.split_size > 0:
+            path_list, retries1 = self._split_files(files=path_list)
+            retries += retries1
         return path_list, path_profile, retries
 
+    @staticmethod
+    def get_row_group_unit(path: str, first: int, last: int) -> str:
+        """
+        Get name of a work unit, containing row groups first to last (exclusive) of a parquet file
+        :param path: file path
+        :param first: first row group
+        :param last: last row group (exclusive)
+        :return: work unit name
+        """
+        return f"{path}{ROW_GROUP_UNIT_SEPARATOR}{first}-{last}"
+
+    @staticmethod
+    def parse_work_unit(name: str) -> tuple[str, tuple[int, int]]:
+        """
+        Parse work unit name
+        :param name: work unit name, either a file path or a row group work unit
+        :return: file path and row group range (first, last exclusive) or None for the whole file
+        """
+        path, separator, row_groups = name.partition(ROW_GROUP_UNIT_SEPARATOR)
+        if separator == "":
+            return name, None
+        first, last = row_groups.split("-")
+        return path, (int(first), int(last))
+
+    @staticmethod
+    def get_work_unit_name_extension(name: str) -> tuple[str, str]:
+        """
+        Get base name and extension of a work unit. The base name of a row group work unit has the
+        deterministic suffix _rg<first>-<last>, so that its outputs do not collide with the other units of the file
+        :param name: work unit name
+        :return: base name and extension
+        """
+        path, row_groups = DataAccess.parse_work_unit(name)
+        name_extension = TransformUtils.get_file_extension(path)
+        if row_groups is None:
+            return name_extension[0], name_extension[1]
+        return f"{name_extension[0]}_rg{row_groups[0]}-{row_groups[1]}", name_extension[1]
+
+    def _split_files(self, files: list[str]) -> tuple[list[str], int]:
+        """
+        Split parquet files larger than split size into work units of consecutive row groups, based on
+        the footer metadata of the files
+        :param files: list of files
+        :return: list of files and work units and number of retries
+        """
+        result = []
+        retries = 0
+        for f_name in files:
+            if (
+                self.file_sizes.get(f_name, 0) <= self.split_size
+                or TransformUtils.get_file_extension(f_name)[1] != ".parquet"
+            ):
+                result.append(f_name)
+                continue
+            parquet_file, retries1 = self.get_parquet_file(path=f_name)
+            retries += retries1
+            if parquet_file is None:
+                result.append(f_name)
+                continue
+            metadata = parquet_file.metadata
+            # group consecutive row groups up to the split size (compressed)
+            units = []
+            first = 0
+            unit_size = 0
+            for rg in range(metadata.num_row_groups):
+                row_group = metadata.row_group(rg)
+                unit_size += sum(row_group.column(c).total_compressed_size for c in range(row_group.num_columns))
+                if unit_size >= self.split_size or rg == metadata.num_row_groups - 1:
+                    units.append((first, rg + 1, unit_size))
+                    first = rg + 1
+                    unit_size = 0
+            if len(units) <= 1:
+                result.append(f_name)
+                continue
+            self.logger.debug(f"Splitting file {f_name} into {len(units)} work units")
+            for first, last, unit_size in units:
+                unit = self.get_row_group_unit(path=f_name, first=first, last=last)
+                if self.checkpoint and self._is_processed(unit):
+                    continue
+                self.file_sizes[unit] = unit_size
+                result.append(unit)
+        return result, retries
+
+    def _get_ledger_entry(self, path: str) -> tuple[int, str]:
+        """
+        Get checkpoint ledger entry of a file or work unit
+        :param path: file or work unit
+        :return: size and version of the processed input or None, if it is not recorded in the ledger
+        """
+        if self.ledger is None:
+            return None
+        from data_processing.data_access.checkpoint_ledger import CheckpointLedger
+
+        return self.ledger.get(CheckpointLedger.get_ledger_name(data_access=self, path=path))
+
+    def _is_processed(self, path: str) -> bool:
+        """
+        Check whether a file or work unit was already processed. If the input is recorded in the checkpoint
+        ledger, it has to be recorded with its current size and version, so that changed inputs are processed
+        again. Otherwise (for example, for inputs processed before the ledger was created), there has to be
+        an output file with the same base name
+        :param path: file or work unit
+        :return: True if the input was processed, False otherwise
+        """
+        entry = self._get_ledger_entry(path)
+        if entry is None:
+            return self.get_work_unit_name_extension(path)[0] in self.checkpoint_names
+        info, _ = self.get_file_info(path=self.parse_work_unit(path)[0])
+        return info is not None and entry == (info["size"], info["version"])
+
     def _get_files_to_process_internal(self) -> tuple[list[str], dict[str, float], int]:
         """
         Get files to process
@@ -114,6 +273,13 @@ class DataAccess:
         and number of operation retries.
         Retries are performed on operation failures and are typically due to the resource overload.
         """
+        # load checkpoint ledger
+        self.checkpoint_names = set()
+        ledger_retries = 0
+        if self.checkpoint:
+            from data_processing.data_access.checkpoint_ledger import CheckpointLedger
+
+            self.ledger, ledger_retries = CheckpointLedger.load(data_access=self)
         # Check if we are using data sets
         if self.d_sets is not None:
             # get folders for the input
@@ -153,7 +319,7 @@ class DataAccess:
                 output_path=self.get_output_folder(),
                 cm_files=self.m_files,
             )
-        return path_list, profile, retries
+        return path_list, profile, retries + ledger_retries
 
     def _get_folders_to_use(self) -> tuple[list[str], int]:
         """
@@ -168,7 +334,8 @@ class DataAccess:
             files_to_use: list[str],
             cm_files: int,
             max_file_size: int = 0,
-            min_file_size: int = MB * GB
+            min_file_size: int = MB * GB,
+            use_cache: bool = False,
     ) -> tuple[list[dict[str, Any]], dict[str, float], int]:
         """
         Support method to get list input files and their profile
@@ -177,30 +344,38 @@ class DataAccess:
         :param max_file_size: max file size
         :param min_file_size: min file size
         :param cm_files: overwrite for the m_files in the class
-        :return: tuple of file list, profile and number of retries
+        :param use_cache: use the listing cache, if configured
+        :return: tuple of file list (sorted by name), profile and number of retries
         """
-        # Get files list.
+        # Get files list. Listing is streamed, only the files to use are kept
         p_list = []
+        retries = 0
+        for files, retries1 in self._iterate_files_folder(path=path, use_cache=use_cache):
+            retries += retries1
+            for file in files:
+                # Only use specified files
+                if files_to_use is not None:
+                    name_extension = TransformUtils.get_file_extension(str(file["name"]))
+                    if name_extension[1] not in files_to_use:
+                        continue
+                p_list.append(file)
+        # parallel listing does not preserve the order
+        p_list.sort(key=lambda f: str(f["name"]))
+        if cm_files > 0:
+            p_list = p_list[:cm_files]
         total_input_file_size = 0
-        i = 0
-        files, retries = self._list_files_folder(path=path)
-        for file in files:
-            if i >= cm_files > 0:
-                break
-            # Only use specified files
+        for file in p_list:
             f_name = str(file["name"])
-            if files_to_use is not None:
-                name_extension = TransformUtils.get_file_extension(f_name)
-                if name_extension[1] not in files_to_use:
-                    continue
-            p_list.append(file)
             size = file["size"]
+            self.file_sizes[f_name] = size
+            if file.get("etag") is not None:
+                # etags are used for change detection by the checkpoint ledger
+                self.file_versions[f_name] = file["etag"]
             total_input_file_size += size
             if min_file_size > size:
                 min_file_size = size
             if max_file_size < size:
                 max_file_size = size
-            i += 1
         return (
             p_list,
             {
@@ -233,25 +408,29 @@ class DataAccess:
                 cm_files=cm_files,
                 min_file_size=min_file_size,
                 max_file_size=max_file_size,
+                use_cache=True,
             )
             files = [fs["name"] for fs in file_sizes]
             return files, profile, retries
 
-        pout_list, _, retries1 = self._get_files_folder(
-            path=output_path, files_to_use=self.files_to_checkpoint, cm_files=-1
+        files, _, retries = self._get_files_folder(
+            path=input_path, files_to_use=self.files_to_use, cm_files=-1, use_cache=True
         )
-        output_base_names_ext = [file["name"].replace(self.get_output_folder(), self.get_input_folder())
-                                 for file in pout_list]
-        # In the case of binary transforms, an extension can be different, so just use the file names.
-        # Also remove duplicates
-        output_base_names = list(set([TransformUtils.get_file_extension(file)[0] for file in output_base_names_ext]))
+        if any(self._get_ledger_entry(file["name"]) is None for file in files):
+            # inputs, that are not recorded in the ledger (or all of them, if there is no ledger), are checkpointed
+            # using the names of the existing output files
+            pout_list, _, retries1 = self._get_files_folder(
+                path=output_path, files_to_use=self.files_to_checkpoint, cm_files=-1
+            )
+            retries += retries1
+            output_base_names_ext = [file["name"].replace(self.get_output_folder(), self.get_input_folder())
+                                     for file in pout_list]
+            # In the case of binary transforms, an extension can be different, so just use the file names.
+            # Also remove duplicates
+            self.checkpoint_names |= {TransformUtils.get_file_extension(file)[0] for file in output_base_names_ext}
         p_list = []
         total_input_file_size = 0
         i = 0
-        files, _, retries = self._get_files_folder(
-            path=input_path, files_to_use=self.files_to_use, cm_files=-1
-        )
-        retries += retries1
         for file in files:
             if i >= cm_files > 0:
                 break
@@ -260,7 +439,7 @@ class DataAccess:
             if self.files_to_use is not None:
                 if name_extension[1] not in self.files_to_use:
                     continue
-            if name_extension[0] not in output_base_names:
+            if not self._is_processed(f_name):
                 p_list.append(f_name)
                 size = file["size"]
                 total_input_file_size += size
@@ -279,23 +458,150 @@ class DataAccess:
             retries,
         )
 
-    def _list_files_folder(self, path: str) -> tuple[list[dict[str, Any]], int]:
+    def _iterate_files_folder(self, path: str, use_cache: bool) -> Iterator[tuple[list[dict[str, Any]], int]]:
         """
-        Get files for a given folder and all sub folders
+        Get files for a given folder and all sub folders, using the listing cache, if configured
         :param path: path
-        :return: List of files
+        :param use_cache: use the listing cache
+        :return: iterator of the lists of files and numbers of retries
+        """
+        if not use_cache or self.listing_cache is None:
+            yield from self._list_files_folder(path=path)
+            return
+        key = self._get_listing_cache_key(path=path)
+        files = self.listing_cache.get(key)
+        if files is not None:
+            yield files, 0
+            return
+        files = []
+        for page, retries in self._list_files_folder(path=path):
+            files.extend(page)
+            yield page, retries
+        self.listing_cache.put(key, files)
+
+    def _get_listing_cache_key(self, path: str) -> str:
+        """
+        Get listing cache key of a folder, identifying the storage it is listed from
+        :param path: path
+        :return: cache key
+        """
+        return f"{type(self).__name__}:{path}"
+
+    def _list_files_folder(self, path: str) -> Iterator[tuple[list[dict[str, Any]], int]]:
+        """
+        Get files for a given folder and all sub folders, listing them in parallel using listing threads.
+        Listing errors are raised, so that a partial listing is never used as a complete one
+        :param path: path
+        :return: iterator of the lists of files (dictionaries containing file name, size and optional etag)
+                 and numbers of retries
         """
         raise NotImplementedError("Subclasses should implement this!")
 
-    def get_table(self, path: str) -> tuple[pa.table, int]:
+    def get_table(
+            self, path: str, columns: list[str] = None, filters: list[Any] = None
+    ) -> tuple[pa.table, int]:
         """
         Get pyArrow table for a given path
         :param path - file path
+        :param columns: columns to read, all if None. If defined (or filters are), only the parquet footer and
+                        the chunks of these columns are fetched (using ranged reads on S3)
+        :param filters: row filters in pyarrow DNF format, for example [("repo", "==", "r1")]. Row groups, whose
+                        statistics show that they have no matching rows, are not read
         :return: pyArrow table or None, if the table read failed and number of operation retries.
                  Retries are performed on operation failures and are typically due to the resource overload.
         """
         raise NotImplementedError("Subclasses should implement this!")
 
+    def _get_projected_table(
+            self, path: str, columns: list[str], filters: list[Any], row_groups: tuple[int, int] = None
+    ) -> tuple[pa.table, int]:
+        """
+        Read only the given columns and the row groups, that can contain rows matching the filters
+        :param path: file path
+        :param columns: columns to read, all if None
+        :param filters: row filters in pyarrow DNF format or None
+        :param row_groups: range (first, last) of the row groups to read, all if None
+        :return: pyArrow table or None, if the table read failed and number of operation retries
+        """
+        parquet_file, retries = self.get_parquet_file(path=path)
+        if parquet_file is None:
+            return None, retries
+        metadata = parquet_file.metadata
+        if row_groups is None:
+            row_groups = (0, metadata.num_row_groups)
+        try:
+            selected = list(range(row_groups[0], row_groups[1]))
+            read_columns = columns
+            if filters is not None:
+                selected = [rg for rg in selected if self._may_match(metadata.row_group(rg), filters)]
+                if columns is not None:
+                    # filter columns have to be read to evaluate the filters
+                    filter_columns = [f[0] for f in self._get_filter_predicates(filters)]
+                    read_columns = columns + [c for c in dict.fromkeys(filter_columns) if c not in columns]
+            table = parquet_file.read_row_groups(selected, columns=read_columns)
+            if filters is not None:
+                table = table.filter(pq.filters_to_expression(filters))
+                if columns is not None:
+                    table = table.select(columns)
+        except Exception as e:
+            self.logger.error(f"Exception reading {columns} columns of {path} - {e}")
+            return None, retries
+        self.logger.debug(
+            f"Read {len(selected)} of {row_groups[1] - row_groups[0]} row groups and {table.num_columns} of "
+            f"{metadata.num_columns} columns of {path}"
+        )
+        return table, retries
+
+    @staticmethod
+    def _get_filter_predicates(filters: list[Any]) -> list[tuple[str, str, Any]]:
+        """
+        Get all predicates of filters
+        :param filters: row filters in pyarrow DNF format
+        :return: list of predicates (column, operator, value)
+        """
+        if len(filters) > 0 and isinstance(filters[0], tuple):
+            return list(filters)
+        return [predicate for conjunction in filters for predicate in conjunction]
+
+    @staticmethod
+    def _may_match(row_group: pq.RowGroupMetaData, filters: list[Any]) -> bool:
+        """
+        Check, using the row group statistics, whether a row group can contain rows matching the filters
+        :param row_group: row group metadata
+        :param filters: row filters in pyarrow DNF format (a conjunction of predicates or a disjunction of them)
+        :return: False if the row group has no matching rows, True if it may have them
+        """
+        statistics = {}
+        for c in range(row_group.num_columns):
+            column = row_group.column(c)
+            if column.is_stats_set and column.statistics.has_min_max:
+                statistics[column.path_in_schema] = (column.statistics.min, column.statistics.max)
+
+        def _predicate_may_match(column: str, op: str, value: Any) -> bool:
+            if column not in statistics:
+                return True
+            low, high = statistics[column]
+            try:
+                if op in ("=", "=="):
+                    return low <= value <= high
+                if op == "<":
+                    return low < value
+                if op == "<=":
+                    return low <= value
+                if op == ">":
+                    return high > value
+                if op == ">=":
+                    return high >= value
+                if op == "in":
+                    return any(low <= v <= high for v in value)
+            except TypeError:
+                # statistics are not comparable with the value
+                return True
+            return True
+
+        conjunctions = [filters] if len(filters) > 0 and isinstance(filters[0], tuple) else filters
+        return any(all(_predicate_may_match(*predicate) for predicate in conjunction) for conjunction in conjunctions)
+
     def get_file(self, path: str) -> tuple[bytes, int]:
         """
         Get file as a byte array
@@ -306,6 +612,69 @@ class DataAccess:
         """
         raise NotImplementedError("Subclasses should implement this!")
 
+    def get_file_stream(self, path: str) -> tuple[BinaryIO, int]:
+        """
+        Open file as a stream, so that it can be consumed incrementally, without holding its whole content in
+        memory. Compressed files (gz, bz2, xz and zst) are decompressed as they are read. The caller has to close
+        the stream
+        :param path: file path
+        :return: file like object of the (decompressed) file content or None, if the file can not be opened and
+                 number of operation retries
+                 Retries are performed on operation failures and are typically due to the resource overload.
+        """
+        raise NotImplementedError("Subclasses should implement this!")
+
+    def get_file_info(self, path: str) -> tuple[dict[str, Any], int]:
+        """
+        Get file info, used for change detection by the checkpoint ledger
+        :param path: file path
+        :return: dictionary containing the file size and version (S3 etag or local modification time) or None,
+                 if the file does not exist and number of operation retries.
+                 Retries are performed on operation failures and are typically due to the resource overload.
+        """
+        raise NotImplementedError("Subclasses should implement this!")
+
+    def get_parquet_file(self, path: str) -> tuple[pq.ParquetFile, int]:
+        """
+        Open parquet file for random access, so that only its footer and the row groups that are
+        actually read are fetched
+        :param path: file path
+        :return: parquet file or None, if the file can not be opened and number of operation retries.
+                 Retries are performed on operation failures and are typically due to the resource overload.
+        """
+        raise NotImplementedError("Subclasses should implement this!")
+
+    def collect_stats(self) -> dict[str, Any]:
+        """
+        Collect the data access statistics (for example, read cache hits and misses), accumulated since
+        the last collection. Statistics are reset, so that the callers can publish them as increments
+        :return: dictionary of the statistics
+        """
+        return {}
+
+    def get_work_unit(
+            self, path: str, columns: list[str] = None, filters: list[Any] = None
+    ) -> tuple[bytes, int]:
+        """
+        Get work unit content as a byte array. For a row group work unit, only its row groups are read and
+        returned as a parquet file
+        :param path: work unit name (file path or row group work unit)
+        :param columns: columns to read from parquet files, all if None
+        :param filters: row filters (in pyarrow DNF format) applied to parquet files
+        :return: bytes array of the work unit content and number of operation retries
+                 Retries are performed on operation failures and are typically due to the resource overload.
+        """
+        f_name, row_groups = self.parse_work_unit(path)
+        is_parquet = TransformUtils.get_file_extension(f_name)[1] == ".parquet"
+        if row_groups is None and not (is_parquet and (columns is not None or filters is not None)):
+            return self.get_file(path=path)
+        table, retries = self._get_projected_table(
+            path=f_name, columns=columns, filters=filters, row_groups=row_groups
+        )
+        if table is None:
+            return None, retries
+        return TransformUtils.convert_arrow_to_binary(table=table), retries
+
     def get_folder_files(
         self, path: str, extensions: list[str] = None, return_data: bool = True
     ) -> tuple[dict[str, bytes], int]:
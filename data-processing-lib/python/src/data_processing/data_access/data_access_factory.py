@@ -18,9 +18,11 @@ from data_processing.data_access import (
     DataAccess,
     DataAccessFactoryBase,
     DataAccessLocal,
+    DataAccessMemory,
     DataAccessS3,
+    DataAccessSharedMemory,
 )
-from data_processing.utils import ParamsUtils, str2bool
+from data_processing.utils import GB, MB, ParamsUtils, str2bool
 
 
 class DataAccessFactory(DataAccessFactoryBase):
@@ -46,6 +48,8 @@ class DataAccessFactory(DataAccessFactoryBase):
         super().__init__(cli_arg_prefix=cli_arg_prefix)
         self.s3_config = None
         self.local_config = None
+        self.memory_config = None
+        self.memory_shared = False
         self.enable_data_navigation = enable_data_navigation
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
@@ -104,6 +108,24 @@ class DataAccessFactory(DataAccessFactoryBase):
             help="ast string containing input/output folders using local fs.\n"
             + ParamsUtils.get_ast_help_text(help_example_dict),
         )
+        help_example_dict = {
+            "input_folder": ["/pipeline/input", "Path to input folder of files to be processed"],
+            "output_folder": ["/pipeline/output", "Path to output folder of processed files"],
+        }
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}memory_config",
+            type=ast.literal_eval,
+            default=None,
+            help="ast string containing input/output folders kept in memory.\n"
+            + ParamsUtils.get_ast_help_text(help_example_dict),
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}memory_shared",
+            type=lambda x: bool(str2bool(x)),
+            default=False,
+            help="keep the memory data in shared memory (/dev/shm), so that they are shared by all the processes "
+            "of the node, instead of the memory of the process",
+        )
         parser.add_argument(
             f"--{self.cli_arg_prefix}max_files", type=int, default=-1, help="Max amount of files to process"
         )
@@ -137,6 +159,39 @@ class DataAccessFactory(DataAccessFactoryBase):
         parser.add_argument(
             f"--{self.cli_arg_prefix}num_samples", type=int, default=-1, help="number of random input files to process"
         )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}split_size_mb",
+            type=int,
+            default=0,
+            help="parquet files larger than split size (MB) are split into work units of consecutive row groups "
+            "of about this size, that are processed independently. 0 disables splitting",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}listing_threads",
+            type=int,
+            default=8,
+            help="number of threads listing the sub folders of the input in parallel",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}listing_cache_ttl",
+            type=float,
+            default=0,
+            help="time to live (sec) of the persistent cache of the input folder listings, that allows subsequent "
+            "executions over the same input to skip listing it. 0 disables the cache",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}cache_folder",
+            type=str,
+            default=None,
+            help="local folder (preferably on a fast local disk) of the read cache of S3 inputs, keyed by the "
+            "path and etag of the files and shared by all the processes of the node. None disables the cache",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}cache_size_gb",
+            type=float,
+            default=10,
+            help="maximum size (GB) of the read cache, the least recently used files are evicted above it",
+        )
 
     def apply_input_params(self, args: Union[dict, argparse.Namespace]) -> bool:
         """
@@ -154,27 +209,36 @@ class DataAccessFactory(DataAccessFactoryBase):
         s3_cred = arg_dict.get(f"{self.cli_arg_prefix}s3_cred", None)
         s3_config = arg_dict.get(f"{self.cli_arg_prefix}s3_config", None)
         local_config = arg_dict.get(f"{self.cli_arg_prefix}local_config", None)
+        memory_config = arg_dict.get(f"{self.cli_arg_prefix}memory_config", None)
+        memory_shared = arg_dict.get(f"{self.cli_arg_prefix}memory_shared", False)
         checkpointing = arg_dict.get(f"{self.cli_arg_prefix}checkpointing", False)
         max_files = arg_dict.get(f"{self.cli_arg_prefix}max_files", -1)
         data_sets = arg_dict.get(f"{self.cli_arg_prefix}data_sets", None)
         n_samples = arg_dict.get(f"{self.cli_arg_prefix}num_samples", -1)
         files_to_use = arg_dict.get(f"{self.cli_arg_prefix}files_to_use", [".parquet"])
         files_to_checkpoint = arg_dict.get(f"{self.cli_arg_prefix}files_to_checkpoint", [".parquet"])
-        # check which configuration (S3 or Local) is specified
+        split_size_mb = arg_dict.get(f"{self.cli_arg_prefix}split_size_mb", 0)
+        listing_threads = arg_dict.get(f"{self.cli_arg_prefix}listing_threads", 8)
+        listing_cache_ttl = arg_dict.get(f"{self.cli_arg_prefix}listing_cache_ttl", 0)
+        cache_folder = arg_dict.get(f"{self.cli_arg_prefix}cache_folder", None)
+        cache_size_gb = arg_dict.get(f"{self.cli_arg_prefix}cache_size_gb", 10)
+        # check which configuration (S3, Local or Memory) is specified
         s3_config_specified = 1 if s3_config is not None else 0
         local_config_specified = 1 if local_config is not None else 0
+        memory_config_specified = 1 if memory_config is not None else 0
 
-        # check that only one (S3 or Local) configuration is specified
-        if s3_config_specified + local_config_specified > 1:
+        # check that only one (S3, Local or Memory) configuration is specified
+        if s3_config_specified + local_config_specified + memory_config_specified > 1:
             self.logger.error(
                 f"data factory {self.cli_arg_prefix} "
                 f"{'S3, ' if s3_config_specified == 1 else ''}"
-                f"{'Local ' if local_config_specified == 1 else ''}"
+                f"{'Local, ' if local_config_specified == 1 else ''}"
+                f"{'Memory ' if memory_config_specified == 1 else ''}"
                 "configurations specified, but only one configuration expected"
             )
             return False
 
-        # further validate the specified configuration (S3 or Local)
+        # further validate the specified configuration (S3, Local or Memory)
         if s3_config_specified == 1:
             if not self._validate_s3_config(s3_config=s3_config):
                 return False
@@ -197,6 +261,16 @@ class DataAccessFactory(DataAccessFactoryBase):
                 f"input_folder - {self.local_config['input_folder']} "
                 f"output_folder - {self.local_config['output_folder']}"
             )
+        elif memory_config_specified == 1:
+            if not self._validate_local_config(local_config=memory_config):
+                return False
+            self.memory_config = memory_config
+            self.memory_shared = memory_shared
+            self.logger.info(
+                f"data factory {self.cli_arg_prefix} is using {'shared ' if memory_shared else ''}memory data access: "
+                f"input_folder - {self.memory_config['input_folder']} "
+                f"output_folder - {self.memory_config['output_folder']}"
+            )
         elif s3_cred is not None:
             if not self._validate_s3_cred(s3_credentials=s3_cred):
                 return False
@@ -215,23 +289,42 @@ class DataAccessFactory(DataAccessFactoryBase):
                 f"Both max files {max_files} and random samples {n_samples} are defined. Only one allowed at a time"
             )
             return False
+        if split_size_mb < 0:
+            self.logger.error(f"data factory {self.cli_arg_prefix} split size {split_size_mb} can not be negative")
+            return False
+        if listing_threads < 1 or listing_cache_ttl < 0:
+            self.logger.error(
+                f"data factory {self.cli_arg_prefix} listing threads {listing_threads} has to be positive and "
+                f"listing cache ttl {listing_cache_ttl} can not be negative"
+            )
+            return False
+        if cache_folder is not None and cache_size_gb <= 0:
+            self.logger.error(f"data factory {self.cli_arg_prefix} cache size {cache_size_gb} GB has to be positive")
+            return False
         self.checkpointing = checkpointing
         self.max_files = max_files
         self.n_samples = n_samples
         self.files_to_use = files_to_use
         self.files_to_checkpoint = files_to_checkpoint
+        self.split_size_mb = split_size_mb
+        self.listing_threads = listing_threads
+        self.listing_cache_ttl = listing_cache_ttl
+        self.cache_folder = cache_folder
+        self.cache_size_gb = cache_size_gb
         self.dsets = data_sets
         if data_sets is None or len(data_sets) < 1:
             self.logger.info(
                 f"data factory {self.cli_arg_prefix} "
                 f"Not using data sets, checkpointing {checkpointing}, max files {max_files}, "
-                f"random samples {n_samples}, files to use {files_to_use}, files to checkpoint {files_to_checkpoint}"
+                f"random samples {n_samples}, files to use {files_to_use}, files to checkpoint {files_to_checkpoint}, "
+                f"split size {split_size_mb} MB"
             )
         else:
             self.logger.info(
                 f"data factory {self.cli_arg_prefix} "
                 f"Using data sets {self.dsets}, checkpointing {checkpointing}, max files {max_files}, "
-                f"random samples {n_samples}, files to use {files_to_use}, files to checkpoint {files_to_checkpoint}"
+                f"random samples {n_samples}, files to use {files_to_use}, files to checkpoint {files_to_checkpoint}, "
+                f"split size {split_size_mb} MB"
             )
         return True
 
@@ -251,6 +344,34 @@ class DataAccessFactory(DataAccessFactoryBase):
                 n_samples=self.n_samples,
                 files_to_use=self.files_to_use,
                 files_to_checkpoint=self.files_to_checkpoint,
+                split_size=self.split_size_mb * MB,
+                listing_threads=self.listing_threads,
+                listing_cache_ttl=self.listing_cache_ttl,
+                cache_folder=self.cache_folder,
+                cache_size=int(self.cache_size_gb * GB),
+            )
+        elif self.memory_config is not None and self.memory_shared:
+            return DataAccessSharedMemory(
+                memory_config=self.memory_config,
+                d_sets=self.dsets,
+                checkpoint=self.checkpointing,
+                m_files=self.max_files,
+                n_samples=self.n_samples,
+                files_to_use=self.files_to_use,
+                files_to_checkpoint=self.files_to_checkpoint,
+                split_size=self.split_size_mb * MB,
+                listing_threads=self.listing_threads,
+            )
+        elif self.memory_config is not None:
+            return DataAccessMemory(
+                memory_config=self.memory_config,
+                d_sets=self.dsets,
+                checkpoint=self.checkpointing,
+                m_files=self.max_files,
+                n_samples=self.n_samples,
+                files_to_use=self.files_to_use,
+                files_to_checkpoint=self.files_to_checkpoint,
+                split_size=self.split_size_mb * MB,
             )
         else:
             # anything else is local data
@@ -262,4 +383,7 @@ class DataAccessFactory(DataAccessFactoryBase):
                 n_samples=self.n_samples,
                 files_to_use=self.files_to_use,
                 files_to_checkpoint=self.files_to_checkpoint,
+                split_size=self.split_size_mb * MB,
+                listing_threads=self.listing_threads,
+                listing_cache_ttl=self.listing_cache_ttl,
             )
@@ -39,6 +39,11 @@ class DataAccessFactoryBase(CLIArgumentProvider):
         self.n_samples = -1
         self.files_to_use = []
         self.files_to_checkpoint = []
+        self.split_size_mb = 0
+        self.listing_threads = 1
+        self.listing_cache_ttl = 0
+        self.cache_folder = None
+        self.cache_size_gb = 0
         self.cli_arg_prefix = cli_arg_prefix
         self.params = {}
         self.logger = get_logger(__name__ + str(uuid.uuid4()))
@@ -74,6 +79,7 @@ class DataAccessFactoryBase(CLIArgumentProvider):
             "max_files": self.max_files,
             "random_samples": self.n_samples,
             "files_to_use": self.files_to_use,
+            "split_size_mb": self.split_size_mb,
         }
         if self.dsets is not None:
             params["data sets"] = self.dsets
@@ -10,15 +10,16 @@
 # limitations under the License.
 ################################################################################
 
-import gzip
 import json
 import os
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterator
 
 import pyarrow as pa
 import pyarrow.parquet as pq
 from data_processing.data_access import DataAccess
+from data_processing.data_access.compression import open_decompressed
+from data_processing.data_access.file_listing import ListingPage, iterate_folder_tree
 from data_processing.utils import get_logger
 
 
@@ -39,6 +40,9 @@ class DataAccessLocal(DataAccess):
         n_samples: int = -1,
         files_to_use: list[str] = [".parquet"],
         files_to_checkpoint: list[str] = [".parquet"],
+        split_size: int = 0,
+        listing_threads: int = 1,
+        listing_cache_ttl: float = 0,
     ):
         """
         Create data access class for folder based configuration
@@ -49,9 +53,14 @@ class DataAccessLocal(DataAccess):
         :param n_samples: amount of files to randomly sample
         :param files_to_use: files extensions of files to include
         :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param split_size: parquet files larger than split size (bytes) are split into row group work units,
+                           0 disables splitting
+        :param listing_threads: number of threads listing the sub folders of the input in parallel
+        :param listing_cache_ttl: time to live (sec) of the persistent cache of the input listings, 0 disables it
         """
         super().__init__(d_sets=d_sets, checkpoint=checkpoint, m_files=m_files, n_samples=n_samples,
-                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint)
+                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint, split_size=split_size,
+                         listing_threads=listing_threads, listing_cache_ttl=listing_cache_ttl)
         if local_config is None:
             self.input_folder = None
             self.output_folder = None
@@ -67,6 +76,8 @@ class DataAccessLocal(DataAccess):
         logger.debug(f"Local n_samples: {self.n_samples}")
         logger.debug(f"Local files_to_use: {self.files_to_use}")
         logger.debug(f"Local files_to_checkpoint: {self.files_to_checkpoint}")
+        logger.debug(f"Local split_size: {self.split_size}")
+        logger.debug(f"Local listing_threads: {self.listing_threads}")
 
     def get_output_folder(self) -> str:
         """
@@ -82,19 +93,32 @@ class DataAccessLocal(DataAccess):
         """
         return self.input_folder
 
-    def _list_files_folder(self, path: str) -> tuple[list[dict[str, Any]], int]:
+    def _list_files_folder(self, path: str) -> Iterator[tuple[list[dict[str, Any]], int]]:
         """
-        Get files for a given folder and all sub folders
+        Get files for a given folder and all sub folders, listing them in parallel using listing threads
         :param path: path
-        :return: List of files
+        :return: iterator of the lists of files and numbers of retries
         """
-        files = sorted(Path(path).rglob("*"))
-        res = []
-        for file in files:
-            if file.is_dir():
-                continue
-            res.append({"name": str(file), "size": file.stat().st_size})
-        return res, 0
+        if not os.path.isdir(path):
+            return
+        yield from iterate_folder_tree(root=path, list_folder=self._list_folder, threads=self.listing_threads)
+
+    @staticmethod
+    def _list_folder(path: str) -> Iterator[ListingPage]:
+        """
+        List a single level of the folder. As with Path.rglob, symbolic links to folders are not followed
+        :param path: path
+        :return: iterator of pages of files, sub folders and number of retries
+        """
+        files = []
+        sub_folders = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_folders.append(entry.path)
+                elif entry.is_file():
+                    files.append({"name": entry.path, "size": entry.stat().st_size})
+        yield files, sub_folders, 0
 
     def _get_folders_to_use(self) -> tuple[list[str], int]:
         """
@@ -112,17 +136,20 @@ class DataAccessLocal(DataAccess):
                         break
         return folders_to_use, 0
 
-    def get_table(self, path: str) -> tuple[pa.table, int]:
+    def get_table(self, path: str, columns: list[str] = None, filters: list[Any] = None) -> tuple[pa.table, int]:
         """
         Attempts to read a PyArrow table from the given path.
 
         Args:
             path (str): Path to the file containing the table.
+            columns (list[str]): Columns to read, all if None.
+            filters (list): Row filters in pyarrow DNF format, row groups without matching rows are not read.
 
         Returns:
             pyarrow.Table: PyArrow table if read successfully, None otherwise.
         """
-
+        if columns is not None or filters is not None:
+            return self._get_projected_table(path=path, columns=columns, filters=filters)
         try:
             table = pq.read_table(path)
             return table, 0
@@ -130,6 +157,39 @@ class DataAccessLocal(DataAccess):
             logger.error(f"Error reading table from {path}: {e}")
             return None, 0
 
+    def get_file_info(self, path: str) -> tuple[dict[str, Any], int]:
+        """
+        Gets the size and version (modification time) of a file.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            dict or None: A dictionary with "size" and "version" keys, or None if the file does not exist.
+        """
+        try:
+            stat = os.stat(path)
+            return {"size": stat.st_size, "version": str(stat.st_mtime_ns)}, 0
+        except OSError as e:
+            logger.error(f"Error getting info of file {path}: {e}")
+            return None, 0
+
+    def get_parquet_file(self, path: str) -> tuple[pq.ParquetFile, int]:
+        """
+        Opens a parquet file for random access, reading only its footer.
+
+        Args:
+            path (str): Path to the parquet file.
+
+        Returns:
+            pyarrow.parquet.ParquetFile: parquet file if opened successfully, None otherwise.
+        """
+        try:
+            return pq.ParquetFile(path), 0
+        except (FileNotFoundError, IOError, pa.ArrowException) as e:
+            logger.error(f"Error opening parquet file {path}: {e}")
+            return None, 0
+
     def save_table(self, path: str, table: pa.Table) -> tuple[int, dict[str, Any], int]:
         """
         Saves a pyarrow table to a file and returns information about the operation.
@@ -191,7 +251,7 @@ class DataAccessLocal(DataAccess):
 
     def get_file(self, path: str) -> tuple[bytes, int]:
         """
-        Gets the contents of a file as a byte array, decompressing gz files if needed.
+        Gets the contents of a file as a byte array, decompressing gz, bz2, xz and zst files if needed.
 
         Args:
             path (str): The path to the file.
@@ -201,18 +261,30 @@ class DataAccessLocal(DataAccess):
         """
 
         try:
-            if path.endswith(".gz"):
-                with gzip.open(path, "rb") as f:
-                    data = f.read()
-            else:
-                with open(path, "rb") as f:
-                    data = f.read()
+            with open_decompressed(path) as f:
+                data = f.read()
             return data, 0
 
-        except (FileNotFoundError, gzip.BadGzipFile) as e:
+        except (OSError, EOFError, ValueError) as e:
             logger.error(f"Error reading file {path}: {e}")
             raise e
 
+    def get_file_stream(self, path: str) -> tuple[BinaryIO, int]:
+        """
+        Opens a file as a stream, decompressing gz, bz2, xz and zst files as they are read.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            file object: Seekable stream of the file content (for uncompressed files), or None if an error occurs.
+        """
+        try:
+            return open_decompressed(path), 0
+        except (OSError, ImportError) as e:
+            logger.error(f"Error opening file {path}: {e}")
+            return None, 0
+
     def save_file(self, path: str, data: bytes) -> tuple[dict[str, Any], int]:
         """
         Saves bytes to a file and returns a dictionary with file information.
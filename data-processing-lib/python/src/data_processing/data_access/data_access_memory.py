@@ -0,0 +1,283 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import io
+import json
+import threading
+import time
+from typing import Any, BinaryIO, Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.data_access import DataAccess
+from data_processing.data_access.compression import decompress, open_decompressed
+from data_processing.utils import TransformUtils, get_logger
+
+
+logger = get_logger(__name__)
+
+# process wide stores of files (names to their content and version), so that all data access instances
+# of a process (for example, the ones created by the data access factory for the orchestrator, the file
+# processors and the transforms) share their files
+_stores: dict[str, dict[str, tuple[bytes, str]]] = {}
+_stores_lock = threading.Lock()
+
+
+class DataAccessMemory(DataAccess):
+    """
+    Implementation of the Base Data access class keeping files in memory of the process. It avoids any storage
+    costs, for example for benchmarks, tests and intermediate outputs of pipelines running in a single process.
+    Files are lost, when the process exits. Use DataAccessSharedMemory to share files across processes
+    """
+
+    def __init__(
+        self,
+        memory_config: dict[str, str] = None,
+        store: str = "default",
+        d_sets: list[str] = None,
+        checkpoint: bool = False,
+        m_files: int = -1,
+        n_samples: int = -1,
+        files_to_use: list[str] = [".parquet"],
+        files_to_checkpoint: list[str] = [".parquet"],
+        split_size: int = 0,
+    ):
+        """
+        Create data access class for in memory data
+        :param memory_config: dictionary of path info (input and output folders in the store)
+        :param store: name of the store, data access instances of a process using the same store share the files
+        :param d_sets list of the data sets to use
+        :param checkpoint: flag to return only files that do not exist in the output directory
+        :param m_files: max amount of files to return
+        :param n_samples: amount of files to randomly sample
+        :param files_to_use: files extensions of files to include
+        :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param split_size: parquet files larger than split size (bytes) are split into row group work units,
+                           0 disables splitting
+        """
+        super().__init__(
+            d_sets=d_sets,
+            checkpoint=checkpoint,
+            m_files=m_files,
+            n_samples=n_samples,
+            files_to_use=files_to_use,
+            files_to_checkpoint=files_to_checkpoint,
+            split_size=split_size,
+        )
+        if memory_config is None:
+            self.input_folder = None
+            self.output_folder = None
+        else:
+            self.input_folder = TransformUtils.clean_path(memory_config["input_folder"])
+            self.output_folder = TransformUtils.clean_path(memory_config["output_folder"])
+        self.store = store
+        with _stores_lock:
+            self.files = _stores.setdefault(store, {})
+
+    def get_output_folder(self) -> str:
+        """
+        Get output folder as a string
+        :return: output_folder
+        """
+        return self.output_folder
+
+    def get_input_folder(self) -> str:
+        """
+        Get input folder as a string
+        :return: input_folder
+        """
+        return self.input_folder
+
+    def is_process_local(self) -> bool:
+        """
+        Check whether the files are visible only in the process, that created the data access
+        :return: True, the stores are kept in the memory of the process
+        """
+        return True
+
+    def clear(self) -> None:
+        """
+        Remove all files of the store
+        :return: None
+        """
+        with _stores_lock:
+            self.files.clear()
+
+    def _list_files_folder(self, path: str) -> Iterator[tuple[list[dict[str, Any]], int]]:
+        """
+        Get files for a given folder and all sub folders
+        :param path: path
+        :return: iterator of the lists of files and numbers of retries
+        """
+        prefix = path if path.endswith("/") else f"{path}/"
+        with _stores_lock:
+            entries = list(self.files.items())
+        yield [
+            {"name": name, "size": len(data), "etag": version}
+            for name, (data, version) in entries
+            if name.startswith(prefix)
+        ], 0
+
+    def _get_folders_to_use(self) -> tuple[list[str], int]:
+        """
+        convert data sets to a list of folders to use
+        :return: list of folders and retries
+        """
+        with _stores_lock:
+            names = list(self.files.keys())
+        folders = set()
+        for name in names:
+            if not name.startswith(self.input_folder):
+                continue
+            # all the parent folders of the file, below the input folder
+            parts = name[len(self.input_folder) :].split("/")[:-1]
+            for i in range(len(parts)):
+                folders.add(f"{self.input_folder}{'/'.join(parts[: i + 1])}/")
+        folders_to_use = []
+        for folder in sorted(folders):
+            for s_name in self.d_sets:
+                if folder[:-1].endswith(s_name):
+                    folders_to_use.append(folder)
+                    break
+        return folders_to_use, 0
+
+    def _get_entry(self, path: str) -> tuple[bytes, str]:
+        """
+        Get file content and version
+        :param path: file path
+        :return: file content and version or None, if the file does not exist
+        """
+        with _stores_lock:
+            return self.files.get(path)
+
+    def get_table(self, path: str, columns: list[str] = None, filters: list[Any] = None) -> tuple[pa.table, int]:
+        """
+        Get pyArrow table for a given path, the table references the buffer of the file, without copying it
+        :param path - file path
+        :param columns: columns to read, all if None
+        :param filters: row filters in pyarrow DNF format, row groups without matching rows are not read
+        :return: pyArrow table or None, if the table read failed and number of retries
+        """
+        if columns is not None or filters is not None:
+            return self._get_projected_table(path=path, columns=columns, filters=filters)
+        entry = self._get_entry(path)
+        if entry is None:
+            logger.error(f"Error reading table from {path}: file does not exist")
+            return None, 0
+        return TransformUtils.convert_binary_to_arrow(data=entry[0]), 0
+
+    def get_file_info(self, path: str) -> tuple[dict[str, Any], int]:
+        """
+        Get file info, used for change detection by the checkpoint ledger
+        :param path: file path
+        :return: dictionary containing the file size and version (time of the write) or None, if the file
+                 does not exist and number of retries
+        """
+        entry = self._get_entry(path)
+        if entry is None:
+            return None, 0
+        return {"size": len(entry[0]), "version": entry[1]}, 0
+
+    def get_parquet_file(self, path: str) -> tuple[pq.ParquetFile, int]:
+        """
+        Open parquet file for random access
+        :param path: file path
+        :return: parquet file or None, if the file can not be opened and number of retries
+        """
+        entry = self._get_entry(path)
+        if entry is None:
+            logger.error(f"Error opening parquet file {path}: file does not exist")
+            return None, 0
+        try:
+            return pq.ParquetFile(pa.BufferReader(entry[0])), 0
+        except Exception as e:
+            logger.error(f"Error opening parquet file {path}: {e}")
+            return None, 0
+
+    def save_table(self, path: str, table: pa.Table) -> tuple[int, dict[str, Any], int]:
+        """
+        Save table to a given location
+        :param path: location to save table
+        :param table: table
+        :return: size of table in memory, a dictionary containing the name and size of the file or None,
+                 if the save failed and number of retries
+        """
+        data = TransformUtils.convert_arrow_to_binary(table=table)
+        if data is None:
+            return -1, None, 0
+        file_info, retries = self.save_file(path=path, data=data)
+        return table.nbytes, file_info, retries
+
+    def save_job_metadata(self, metadata: dict[str, Any]) -> tuple[dict[str, Any], int]:
+        """
+        Save metadata
+        :param metadata: a dictionary, containing the following keys:
+            "pipeline",
+            "job details",
+            "code",
+            "job_input_params",
+            "execution_stats",
+            "job_output_stats"
+        two additional elements:
+            "source"
+            "target"
+        are filled bu implementation
+        :return: a dictionary containing the name and size of the file or None, if the save failed
+                 and number of retries
+        """
+        if self.output_folder is None:
+            logger.error("memory configuration is not defined, can't save metadata")
+            return None, 0
+        metadata["source"] = {"name": self.input_folder, "type": "path"}
+        metadata["target"] = {"name": self.output_folder, "type": "path"}
+        return self.save_file(path=f"{self.output_folder}metadata.json", data=json.dumps(metadata, indent=2).encode())
+
+    def get_file(self, path: str) -> tuple[bytes, int]:
+        """
+        Get file as a byte array, decompressing gz, bz2, xz and zst files
+        :param path: file path
+        :return: bytes array of file content or None, if the file does not exist and number of retries
+        """
+        entry = self._get_entry(path)
+        if entry is None:
+            logger.error(f"Error reading file {path}: file does not exist")
+            return None, 0
+        return decompress(data=entry[0], path=path), 0
+
+    def get_file_stream(self, path: str) -> tuple[BinaryIO, int]:
+        """
+        Open file as a stream, decompressing gz, bz2, xz and zst files as they are read
+        :param path: file path
+        :return: file like object of the (decompressed) file content or None, if the file can not be opened and
+                 number of retries
+        """
+        entry = self._get_entry(path)
+        if entry is None:
+            logger.error(f"Error opening file {path}: file does not exist")
+            return None, 0
+        try:
+            return open_decompressed(io.BytesIO(entry[0]), path=path), 0
+        except ImportError as e:
+            logger.error(f"Error opening file {path}: {e}")
+            return None, 0
+
+    def save_file(self, path: str, data: bytes) -> tuple[dict[str, Any], int]:
+        """
+        Save byte array to the file
+        :param path: file path
+        :param data: byte array
+        :return: a dictionary containing the name and size of the file and number of retries
+        """
+        data = bytes(data)
+        with _stores_lock:
+            self.files[path] = (data, str(time.time_ns()))
+        return {"name": path, "size": len(data)}, 0
@@ -10,12 +10,15 @@
 # limitations under the License.
 ################################################################################
 
-import gzip
+import io
 import json
-from typing import Any
+import threading
+from typing import Any, BinaryIO, Iterator
 
 import pyarrow
-from data_processing.data_access import ArrowS3, DataAccess
+import pyarrow.parquet
+from data_processing.data_access import ArrowS3, DataAccess, DiskCache
+from data_processing.data_access.compression import decompress, open_decompressed
 from data_processing.utils import TransformUtils
 
 
@@ -34,6 +37,11 @@ class DataAccessS3(DataAccess):
         n_samples: int = -1,
         files_to_use: list[str] = [".parquet"],
         files_to_checkpoint: list[str] = [".parquet"],
+        split_size: int = 0,
+        listing_threads: int = 1,
+        listing_cache_ttl: float = 0,
+        cache_folder: str = None,
+        cache_size: int = 0,
     ):
         """
         Create data access class for folder based configuration
@@ -45,9 +53,17 @@ class DataAccessS3(DataAccess):
         :param n_samples: amount of files to randomly sample
         :param files_to_use: files extensions of files to include
         :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param split_size: parquet files larger than split size (bytes) are split into row group work units,
+                           0 disables splitting
+        :param listing_threads: number of threads listing the sub folders of the input in parallel
+        :param listing_cache_ttl: time to live (sec) of the persistent cache of the input listings, 0 disables it
+        :param cache_folder: local folder of the read cache, shared by all the processes of the node. None disables
+                             the cache
+        :param cache_size: maximum size (bytes) of the read cache
         """
         super().__init__(d_sets=d_sets, checkpoint=checkpoint, m_files=m_files, n_samples=n_samples,
-                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint)
+                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint, split_size=split_size,
+                         listing_threads=listing_threads, listing_cache_ttl=listing_cache_ttl)
         if (
             s3_credentials is None
             or s3_credentials.get("access_key", None) is None
@@ -67,6 +83,12 @@ class DataAccessS3(DataAccess):
             endpoint=s3_credentials.get("url", None),
             region=s3_credentials.get("region", None),
         )
+        self.cache = None
+        if cache_folder is not None and cache_size > 0:
+            self.cache = DiskCache(folder=cache_folder, max_size=cache_size)
+        # read cache statistics, accumulated since their last collection
+        self.cache_stats = {}
+        self.cache_stats_lock = threading.Lock()
 
     def get_output_folder(self) -> str:
         """
@@ -82,17 +104,27 @@ class DataAccessS3(DataAccess):
         """
         return self.input_folder
 
-    def _list_files_folder(self, path: str) -> tuple[list[dict[str, Any]], int]:
+    def _list_files_folder(self, path: str) -> Iterator[tuple[list[dict[str, Any]], int]]:
         """
-        Get files for a given folder and all sub folders
+        Get files for a given folder and all sub folders, listing them in parallel using listing threads
         :param path: path
-        :return: List of files
+        :return: iterator of the lists of files and numbers of retries
         """
         try:
-            return self.arrS3.list_files(key=path)
+            yield from self.arrS3.iterate_files(key=path, threads=self.listing_threads)
         except Exception as e:
+            # files listed before the error are already returned, so the listing has to fail as a whole
             self.logger.error(f"Error listing S3 files for path {path} - {e}")
-            return [], 0
+            raise
+
+    def _get_listing_cache_key(self, path: str) -> str:
+        """
+        Get listing cache key of a folder, including the S3 endpoint, as the same bucket names can exist
+        on different endpoints
+        :param path: path
+        :return: cache key
+        """
+        return f"{type(self).__name__}:{self.s3_credentials.get('url', None)}:{path}"
 
     def _get_folders_to_use(self) -> tuple[list[str], int]:
         """
@@ -114,17 +146,70 @@ class DataAccessS3(DataAccess):
                     break
         return folders_to_use, retries
 
-    def get_table(self, path: str) -> tuple[pyarrow.table, int]:
+    def get_table(
+        self, path: str, columns: list[str] = None, filters: list[Any] = None
+    ) -> tuple[pyarrow.table, int]:
         """
         Get pyArrow table for a given path
         :param path - file path
+        :param columns: columns to read, all if None. If defined (or filters are), only the parquet footer and
+                        the chunks of these columns are fetched using ranged GETs
+        :param filters: row filters in pyarrow DNF format, row groups without matching rows are not read
         :return: pyArrow table or None, if the table read failed and number of retries
         """
+        if columns is not None or filters is not None:
+            return self._get_projected_table(path=path, columns=columns, filters=filters)
         try:
-            return self.arrS3.read_table(path)
+            if self.cache is None:
+                return self.arrS3.read_table(path)
+            data, retries = self._read_file(path)
         except Exception as e:
             self.logger.error(f"Exception reading table {path} from S3 - {e}")
             return None, 0
+        if data is None:
+            return None, retries
+        return TransformUtils.convert_binary_to_arrow(data=data), retries
+
+    def get_file_info(self, path: str) -> tuple[dict[str, Any], int]:
+        """
+        Get file info, used for change detection by the checkpoint ledger. Info of the listed files is
+        taken from the listing, otherwise it is retrieved from S3
+        :param path: file path
+        :return: dictionary containing the file size and version (etag) or None, if the file does not exist
+                 and number of retries
+        """
+        if path in self.file_versions and path in self.file_sizes:
+            return {"size": self.file_sizes.get(path, 0), "version": self.file_versions[path]}, 0
+        info, retries = self.arrS3.get_file_info(key=path)
+        if info is None:
+            return None, retries
+        return {"size": info["size"], "version": info["etag"]}, retries
+
+    def get_parquet_file(self, path: str) -> tuple[pyarrow.parquet.ParquetFile, int]:
+        """
+        Open parquet file for random access, so that only its footer and the row groups that are
+        actually read are fetched (using ranged GETs)
+        :param path: file path
+        :return: parquet file or None, if the file can not be opened and number of retries
+        """
+        if self.cache is not None:
+            # cached files are read locally, files that are not cached are not added to the cache, as only
+            # parts of them are read
+            local_path, retries = self._get_cached_path(path)
+            if local_path is not None:
+                try:
+                    return pyarrow.parquet.ParquetFile(local_path), retries
+                except Exception as e:
+                    self.logger.warning(f"Exception opening cached parquet file {path} - {e}")
+        s3_file, retries = self.arrS3.open_file(key=path, size=self.file_sizes.get(path, None))
+        if s3_file is None:
+            return None, retries
+        try:
+            parquet_file = pyarrow.parquet.ParquetFile(s3_file)
+        except Exception as e:
+            self.logger.error(f"Exception opening parquet file {path} from S3 - {e}")
+            return None, retries + s3_file.retries
+        return parquet_file, retries + s3_file.retries
 
     def save_table(self, path: str, table: pyarrow.Table) -> tuple[int, dict[str, Any], int]:
         """
@@ -173,14 +258,115 @@ class DataAccessS3(DataAccess):
         :return: bytes array of file content and amount of retries
         """
         try:
-            filedata, retries = self.arrS3.read_file(path)
+            filedata, retries = self._read_file(path)
         except Exception as e:
             self.logger.error(f"Exception reading file {path} - {e}")
             return None, 0
-        if path.endswith("gz"):
-            filedata = gzip.decompress(filedata)
+        if filedata is not None:
+            filedata = decompress(data=filedata, path=path)
         return filedata, retries
 
+    def get_file_stream(self, path: str) -> tuple[BinaryIO, int]:
+        """
+        Open file as a stream, reading it part by part with ranged GETs (the stream of an uncompressed file is
+        seekable) and decompressing gz, bz2, xz and zst files as they are read. Cached files are read locally,
+        files that are not cached, but fit into the read cache, are downloaded through it
+        :param path: file path
+        :return: file like object of the (decompressed) file content or None, if the file can not be opened and
+                 number of retries. Retries of the subsequent reads are not counted
+        """
+        try:
+            if self.cache is not None:
+                local_path, retries = self._get_cached_path(path)
+                if local_path is not None:
+                    return open_decompressed(local_path, path=path), retries
+                info, info_retries = self.get_file_info(path=path)
+                retries += info_retries
+                if info is not None and self.cache.accepts(info["size"]):
+                    data, read_retries = self._read_file(path)
+                    if data is None:
+                        return None, retries + read_retries
+                    return open_decompressed(io.BytesIO(data), path=path), retries + read_retries
+            s3_file, retries = self.arrS3.open_file(key=path, size=self.file_sizes.get(path, None))
+            if s3_file is None:
+                return None, retries
+            return open_decompressed(io.BufferedReader(s3_file, buffer_size=self.arrS3.part_size), path=path), retries
+        except Exception as e:
+            self.logger.error(f"Exception opening file {path} - {e}")
+            return None, 0
+
+    def _get_cache_key(self, path: str) -> tuple[str, int]:
+        """
+        Get read cache key of the current version of a file
+        :param path: file path
+        :return: cache key or None, if the file version is not known and number of retries
+        """
+        info, retries = self.get_file_info(path=path)
+        if info is None or info["version"] is None:
+            return None, retries
+        return DiskCache.get_key(path=path, version=info["version"]), retries
+
+    def _get_cached_path(self, path: str) -> tuple[str, int]:
+        """
+        Get local path of a cached file
+        :param path: file path
+        :return: local path or None, if the file is not cached and number of retries
+        """
+        info, retries = self.get_file_info(path=path)
+        if info is None or info["version"] is None:
+            return None, retries
+        local_path = self.cache.get_path(DiskCache.get_key(path=path, version=info["version"]))
+        if local_path is not None:
+            self._add_cache_stats(hits=1, hit_bytes=info["size"])
+        return local_path, retries
+
+    def _read_file(self, path: str) -> tuple[bytes, int]:
+        """
+        Read file through the read cache, if it is enabled
+        :param path: file path
+        :return: file content or None, if the read failed and number of retries
+        """
+        if self.cache is None:
+            return self.arrS3.read_file(path)
+        key, retries = self._get_cache_key(path)
+        if key is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                self._add_cache_stats(hits=1, hit_bytes=len(data))
+                return data, retries
+        data, read_retries = self.arrS3.read_file(path)
+        self._add_cache_stats(misses=1)
+        if data is not None and key is not None:
+            self.cache.put(key, data)
+        return data, retries + read_retries
+
+    def _add_cache_stats(self, hits: int = 0, misses: int = 0, hit_bytes: int = 0) -> None:
+        """
+        Add read cache statistics, reads can run in the read ahead threads
+        :param hits: number of cache hits
+        :param misses: number of cache misses
+        :param hit_bytes: bytes read from the cache
+        :return: None
+        """
+        with self.cache_stats_lock:
+            for name, value in [
+                ("data access cache hits", hits),
+                ("data access cache misses", misses),
+                ("data access cache hit bytes", hit_bytes),
+            ]:
+                if value > 0:
+                    self.cache_stats[name] = self.cache_stats.get(name, 0) + value
+
+    def collect_stats(self) -> dict[str, Any]:
+        """
+        Collect the read cache statistics, accumulated since the last collection
+        :return: dictionary of the statistics
+        """
+        with self.cache_stats_lock:
+            stats = self.cache_stats
+            self.cache_stats = {}
+        return stats
+
     def save_file(self, path: str, data: bytes) -> tuple[dict[str, Any], int]:
         """
         Save byte array to the file
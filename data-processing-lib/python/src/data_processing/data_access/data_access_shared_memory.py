@@ -0,0 +1,159 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.data_access import DataAccessLocal
+from data_processing.utils import TransformUtils, get_logger
+
+
+logger = get_logger(__name__)
+
+# root folder of the shared memory stores, a RAM backed file system, if available
+SHARED_MEMORY_FOLDER = (
+    "/dev/shm/dpk_memory" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "dpk_memory")
+)
+
+
+class DataAccessSharedMemory(DataAccessLocal):
+    """
+    Implementation of the Base Data access class keeping files in shared memory (a store folder in /dev/shm),
+    so that they can be shared by multiple processes of a node (for example, multiprocessing workers or the
+    transforms of a pipeline running on the node). Files are written atomically, so that readers never see
+    partial files, and tables and parquet files are read using memory mapping, so that their content is not
+    copied to the memory of the reading process. Files persist until they are cleared (or the node restarts)
+    """
+
+    def __init__(
+        self,
+        memory_config: dict[str, str] = None,
+        store: str = "default",
+        d_sets: list[str] = None,
+        checkpoint: bool = False,
+        m_files: int = -1,
+        n_samples: int = -1,
+        files_to_use: list[str] = [".parquet"],
+        files_to_checkpoint: list[str] = [".parquet"],
+        split_size: int = 0,
+        listing_threads: int = 1,
+    ):
+        """
+        Create data access class for shared memory data
+        :param memory_config: dictionary of path info (input and output folders in the store)
+        :param store: name of the store, data access instances of all processes using the same store share the files
+        :param d_sets list of the data sets to use
+        :param checkpoint: flag to return only files that do not exist in the output directory
+        :param m_files: max amount of files to return
+        :param n_samples: amount of files to randomly sample
+        :param files_to_use: files extensions of files to include
+        :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param split_size: parquet files larger than split size (bytes) are split into row group work units,
+                           0 disables splitting
+        :param listing_threads: number of threads listing the sub folders of the input in parallel
+        """
+        self.store_folder = os.path.join(SHARED_MEMORY_FOLDER, store)
+        local_config = None
+        if memory_config is not None:
+            local_config = {
+                "input_folder": os.path.join(self.store_folder, memory_config["input_folder"].lstrip("/")),
+                "output_folder": os.path.join(self.store_folder, memory_config["output_folder"].lstrip("/")),
+            }
+        super().__init__(
+            local_config=local_config,
+            d_sets=d_sets,
+            checkpoint=checkpoint,
+            m_files=m_files,
+            n_samples=n_samples,
+            files_to_use=files_to_use,
+            files_to_checkpoint=files_to_checkpoint,
+            split_size=split_size,
+            listing_threads=listing_threads,
+        )
+
+    def clear(self) -> None:
+        """
+        Remove all files of the store
+        :return: None
+        """
+        shutil.rmtree(self.store_folder, ignore_errors=True)
+
+    def get_table(self, path: str, columns: list[str] = None, filters: list[Any] = None) -> tuple[pa.table, int]:
+        """
+        Get pyArrow table for a given path, reading the file using memory mapping
+        :param path - file path
+        :param columns: columns to read, all if None
+        :param filters: row filters in pyarrow DNF format, row groups without matching rows are not read
+        :return: pyArrow table or None, if the table read failed and number of retries
+        """
+        if columns is not None or filters is not None:
+            return self._get_projected_table(path=path, columns=columns, filters=filters)
+        try:
+            return pq.read_table(path, memory_map=True), 0
+        except (FileNotFoundError, IOError, pa.ArrowException) as e:
+            logger.error(f"Error reading table from {path}: {e}")
+            return None, 0
+
+    def get_parquet_file(self, path: str) -> tuple[pq.ParquetFile, int]:
+        """
+        Open parquet file for random access, using memory mapping
+        :param path: file path
+        :return: parquet file or None, if the file can not be opened and number of retries
+        """
+        try:
+            return pq.ParquetFile(path, memory_map=True), 0
+        except (FileNotFoundError, IOError, pa.ArrowException) as e:
+            logger.error(f"Error opening parquet file {path}: {e}")
+            return None, 0
+
+    def save_table(self, path: str, table: pa.Table) -> tuple[int, dict[str, Any], int]:
+        """
+        Save table to a given location, atomically
+        :param path: location to save table
+        :param table: table
+        :return: size of table in memory, a dictionary containing the name and size of the file or None,
+                 if the save failed and number of retries
+        """
+        data = TransformUtils.convert_arrow_to_binary(table=table)
+        if data is None:
+            return -1, None, 0
+        file_info, retries = self.save_file(path=path, data=data)
+        if file_info is None:
+            return -1, None, retries
+        return table.nbytes, file_info, retries
+
+    def save_file(self, path: str, data: bytes) -> tuple[dict[str, Any], int]:
+        """
+        Save byte array to the file, writing a temporary file and renaming it, so that the readers in other
+        processes never see partial files
+        :param path: file path
+        :param data: byte array
+        :return: a dictionary containing the name and size of the file or None, if the save failed and
+                 number of retries
+        """
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            return {"name": path, "size": len(data)}, 0
+        except Exception as e:
+            logger.error(f"Error saving bytes to file {path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None, 0
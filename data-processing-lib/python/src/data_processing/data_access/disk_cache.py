@@ -0,0 +1,216 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import hashlib
+import os
+import platform
+import threading
+import time
+
+from data_processing.utils import get_logger
+
+
+if platform.system() != "Windows":
+    import fcntl
+
+
+logger = get_logger(__name__)
+
+# extension of the files being written
+TEMP_EXTENSION = ".tmp"
+# after eviction, the cache size is at most this fraction of its maximum size
+EVICTION_TARGET = 0.9
+# temporary files older than this (sec) are left over by failed writers and are removed by eviction
+TEMP_FILE_TTL = 3600
+# name of the file locked by the process evicting entries
+EVICTION_LOCK_FILE = ".eviction.lock"
+
+
+class DiskCache:
+    """
+    Content addressed, size bounded cache of remote files on a local disk. Entries are keyed by the file path
+    and version (S3 etag), so that a modified file is never served from the cache. Entries are written to
+    temporary files and atomically renamed, so any number of processes (and threads) can share the cache folder.
+    The least recently used entries (based on their modification time, that is updated on every hit) are
+    evicted, once the cache grows above its maximum size. Eviction is performed by a single thread of a single
+    process at a time, coordinated by a thread lock and a (non-blocking) lock of a file in the cache folder
+    """
+
+    def __init__(self, folder: str, max_size: int):
+        """
+        Init method
+        :param folder: cache folder
+        :param max_size: maximum cache size (bytes)
+        """
+        self.folder = os.path.abspath(folder)
+        self.max_size = max_size
+        os.makedirs(self.folder, exist_ok=True)
+        # file locks are held by processes, not threads, so the threads of a process are coordinated separately
+        self.eviction_lock = threading.Lock()
+        # bytes added by this process since the last eviction check, the first write checks the size
+        self.added = max_size
+        self.added_lock = threading.Lock()
+
+    @staticmethod
+    def get_key(path: str, version: str) -> str:
+        """
+        Get key of a file version
+        :param path: file path
+        :param version: file version (S3 etag)
+        :return: key
+        """
+        return hashlib.sha256(f"{path}@{version}".encode("utf-8")).hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        """
+        Get path of an entry, entries are spread over sub folders to keep the folders small
+        :param key: key
+        :return: entry path
+        """
+        return os.path.join(self.folder, key[:2], key)
+
+    def get_path(self, key: str) -> str:
+        """
+        Get local path of a cached entry, marking it as recently used
+        :param key: key
+        :return: entry path or None, if the entry is not cached
+        """
+        path = self._get_entry_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def get(self, key: str) -> bytes:
+        """
+        Get cached entry, marking it as recently used
+        :param key: key
+        :return: entry content or None, if the entry is not cached
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            # evicted concurrently
+            return None
+
+    def accepts(self, size: int) -> bool:
+        """
+        Check whether an entry of a given size can be cached, large entries would evict a large part of the cache
+        :param size: entry size (bytes)
+        :return: True if the entry can be cached
+        """
+        return size <= self.max_size * (1 - EVICTION_TARGET)
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Cache entry, evicting the least recently used entries, if the cache grows above its maximum size
+        :param key: key
+        :param data: entry content
+        :return: None
+        """
+        if not self.accepts(len(data)):
+            return
+        path = self._get_entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TEMP_EXTENSION}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache {key}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        with self.added_lock:
+            self.added += len(data)
+            # the size is checked once this process added a tenth of the free space after the last eviction
+            if self.added < self.max_size * (1 - EVICTION_TARGET):
+                return
+            self.added = 0
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Evict the least recently used entries, if the cache is larger than its maximum size. If another
+        thread or process is evicting entries, this is skipped without waiting
+        :return: None
+        """
+        if not self.eviction_lock.acquire(blocking=False):
+            return
+        fd = None
+        try:
+            if platform.system() != "Windows":
+                fd = os.open(os.path.join(self.folder, EVICTION_LOCK_FILE), os.O_RDWR | os.O_CREAT)
+                try:
+                    fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # another process is evicting
+                    return
+            self._evict()
+        finally:
+            if fd is not None:
+                # closing the file releases its lock
+                os.close(fd)
+            self.eviction_lock.release()
+
+    def _evict(self) -> None:
+        """
+        Evict the least recently used entries, if the cache is larger than its maximum size
+        :return: None
+        """
+        entries = []
+        size = 0
+        now = time.time()
+        for sub_folder in os.scandir(self.folder):
+            if not sub_folder.is_dir():
+                continue
+            for entry in os.scandir(sub_folder.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith(TEMP_EXTENSION):
+                    if now - stat.st_mtime > TEMP_FILE_TTL:
+                        self._remove(entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                size += stat.st_size
+        if size <= self.max_size:
+            return
+        target = self.max_size * EVICTION_TARGET
+        evicted = 0
+        for _, entry_size, path in sorted(entries):
+            if size <= target:
+                break
+            if self._remove(path):
+                size -= entry_size
+                evicted += 1
+        logger.debug(f"Evicted {evicted} entries from the cache {self.folder}, its size is {size}")
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        """
+        Remove an entry, readers that opened it can still read it
+        :param path: entry path
+        :return: True if the entry was removed
+        """
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,156 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.utils import get_logger
+
+
+logger = get_logger(__name__)
+
+# default folder of the listing cache
+LISTING_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), "dpk_listing_cache")
+
+# page of a folder listing: files (dictionaries with name, size and optional etag) directly in the folder,
+# sub folders and number of retries
+ListingPage = tuple[list[dict[str, Any]], list[str], int]
+
+
+def iterate_folder_tree(
+    root: str, list_folder: Callable[[str], Iterator[ListingPage]], threads: int = 1
+) -> Iterator[tuple[list[dict[str, Any]], int]]:
+    """
+    List files of a folder tree, fanning the listing of the sub folders out to a thread pool. Results are
+    streamed as the pages of the individual folders are listed, so their order is not defined
+    :param root: root folder
+    :param list_folder: function listing a single folder (non-recursively), returning its pages
+    :param threads: number of listing threads, 1 lists the folders sequentially in the calling thread
+    :return: iterator of the lists of files and numbers of retries
+    """
+    if threads <= 1:
+        folders = [root]
+        while len(folders) > 0:
+            for files, sub_folders, retries in list_folder(folders.pop()):
+                folders.extend(sub_folders)
+                yield files, retries
+        return
+    results = queue.Queue()
+    stopped = threading.Event()
+
+    def _list(folder: str) -> None:
+        try:
+            for page in list_folder(folder):
+                if stopped.is_set():
+                    break
+                results.put(page)
+        except Exception as e:
+            results.put(e)
+        finally:
+            # end of the folder marker
+            results.put(None)
+
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="listing")
+    try:
+        executor.submit(_list, root)
+        pending = 1
+        while pending > 0:
+            page = results.get()
+            if page is None:
+                pending -= 1
+                continue
+            if isinstance(page, Exception):
+                raise page
+            files, sub_folders, retries = page
+            for sub_folder in sub_folders:
+                executor.submit(_list, sub_folder)
+            pending += len(sub_folders)
+            yield files, retries
+    finally:
+        # the consumer can stop early, do not list the remaining folders
+        stopped.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ListingCache:
+    """
+    Persistent cache of folder listings, so that repeated executions (for example, subsequent transforms of
+    a pipeline over the same input) do not have to list the input again. A listing is saved as a parquet file,
+    named by a hash of the listed folder, in the cache folder and is valid for the time to live
+    """
+
+    def __init__(self, ttl: float, cache_folder: str = LISTING_CACHE_FOLDER):
+        """
+        Init method
+        :param ttl: time to live of the cached listings (sec)
+        :param cache_folder: cache folder
+        """
+        self.ttl = ttl
+        self.cache_folder = cache_folder
+
+    def _get_path(self, key: str) -> str:
+        """
+        Get path of a cached listing
+        :param key: cache key (listed folder, including the data access type)
+        :return: path
+        """
+        return os.path.join(self.cache_folder, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.parquet")
+
+    def get(self, key: str) -> list[dict[str, Any]]:
+        """
+        Get cached listing
+        :param key: cache key (listed folder, including the data access type)
+        :return: list of dictionaries, containing file names, sizes and etags or None if the listing is not
+                 cached or expired
+        """
+        path = self._get_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            files = pq.read_table(path).to_pylist()
+        except Exception as e:
+            logger.debug(f"Listing of {key} is not cached: {e}")
+            return None
+        logger.info(f"Using cached listing of {key} with {len(files)} files")
+        return files
+
+    def put(self, key: str, files: list[dict[str, Any]]) -> None:
+        """
+        Cache listing
+        :param key: cache key (listed folder, including the data access type)
+        :param files: list of dictionaries, containing file names, sizes and etags
+        :return: None
+        """
+        table = pa.Table.from_pydict(
+            {
+                "name": pa.array([file["name"] for file in files], type=pa.string()),
+                "size": pa.array([file["size"] for file in files], type=pa.int64()),
+                "etag": pa.array([file.get("etag") for file in files], type=pa.string()),
+            }
+        )
+        path = self._get_path(key)
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            # write to a temporary file and rename, so that concurrent readers never see partial listings
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+            pq.write_table(table, temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to cache listing of {key}: {e}")
@@ -22,6 +22,9 @@ logger = get_logger(__name__)
 
 cli_prefix = "runtime_"
 
+execution_modes = ["auto", "sequential", "processes", "threads"]
+""" Supported execution modes """
+
 
 class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
     """
@@ -34,6 +37,9 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         """
         super().__init__(name=name, print_params=False)
         self.num_processors = 0
+        self.execution_mode = "auto"
+        self.read_ahead = 0
+        self.write_behind = 0
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
         """
@@ -41,7 +47,30 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         :param parser: parser
         :return:
         """
-        parser.add_argument(f"--{cli_prefix}num_processors", type=int, default=0, help="size of multiprocessing pool")
+        parser.add_argument(
+            f"--{cli_prefix}num_processors", type=int, default=0, help="size of multiprocessing (or thread) pool"
+        )
+        parser.add_argument(
+            f"--{cli_prefix}execution_mode",
+            type=str,
+            default="auto",
+            choices=execution_modes,
+            help="execution mode: sequential, processes (multiprocessing pool), threads (thread pool) or auto - "
+            "sequential if num_processors is 0, otherwise threads for thread safe transforms and processes for the "
+            "rest. Use processes to run thread safe transforms in a multiprocessing pool",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}read_ahead",
+            type=int,
+            default=0,
+            help="number of files downloaded in the background while the current one is transformed, 0 disables it",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}write_behind",
+            type=int,
+            default=0,
+            help="max number of output files written in the background, 0 disables it",
+        )
 
         return TransformExecutionConfiguration.add_input_params(self, parser=parser)
 
@@ -56,15 +85,46 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
         # store parameters locally
         self.num_processors = captured["num_processors"]
+        self.execution_mode = captured["execution_mode"]
+        self.read_ahead = captured["read_ahead"]
+        self.write_behind = captured["write_behind"]
+        if self.read_ahead < 0 or self.write_behind < 0:
+            logger.error(f"read ahead {self.read_ahead} and write behind {self.write_behind} can not be negative")
+            return False
+        if self.execution_mode in ("processes", "threads") and self.num_processors <= 0:
+            logger.error(f"execution mode {self.execution_mode} requires a positive number of processors")
+            return False
         # print them
         if self.num_processors > 0:
             # we are using multiprocessing
-            logger.info(f"using multiprocessing, num processors {self.num_processors}")
+            logger.info(f"execution mode {self.execution_mode}, num processors {self.num_processors}")
+        logger.info(f"read ahead {self.read_ahead}, write behind {self.write_behind}")
         return True
 
+    def get_execution_mode(self, transform_class: type) -> str:
+        """
+        Get the execution mode to use for a given transform. In the auto mode, transforms that declare
+        themselves thread safe are executed by a thread pool, and the rest by a multiprocessing pool
+        :param transform_class: transform class
+        :return: one of sequential, processes or threads
+        """
+        thread_safe = getattr(transform_class, "thread_safe", False)
+        if self.execution_mode == "threads" and not thread_safe:
+            logger.warning(f"transform {transform_class.__name__} is not declared thread safe, running it in threads")
+        if self.execution_mode != "auto":
+            return self.execution_mode
+        if self.num_processors <= 0:
+            return "sequential"
+        return "threads" if thread_safe else "processes"
+
     def get_input_params(self) -> dict[str, Any]:
         """
         get input parameters for job_input_params in metadata
         :return: dictionary of parameters
         """
-        return {"num_processors": self.num_processors}
+        return {
+            "num_processors": self.num_processors,
+            "execution_mode": self.execution_mode,
+            "read_ahead": self.read_ahead,
+            "write_behind": self.write_behind,
+        }
@@ -30,6 +30,8 @@ class PythonTransformFileProcessor(AbstractTransformFileProcessor):
         transform_params: dict[str, Any],
         transform_class: type[AbstractTransform],
         is_folder: bool,
+        read_ahead: int = 0,
+        write_behind: int = 0,
     ):
         """
         Init method
@@ -38,12 +40,16 @@ class PythonTransformFileProcessor(AbstractTransformFileProcessor):
         :param transform_params - transform parameters
         :param transform_class: transform class
         :param is_folder: folder transform flag
+        :param read_ahead: number of files to download in the background
+        :param write_behind: max number of output files written in the background
         """
         # invoke superclass
         super().__init__(
             data_access_factory=data_access_factory,
             transform_parameters=dict(transform_params),
             is_folder=is_folder,
+            read_ahead=read_ahead,
+            write_behind=write_behind,
         )
         self.transform_params["statistics"] = statistics
         # Create local processor
@@ -69,7 +75,9 @@ class PythonPoolTransformFileProcessor(AbstractTransformFileProcessor):
         data_access_factory: DataAccessFactoryBase,
         transform_params: dict[str, Any],
         transform_class: type[AbstractTransform],
-        is_folder: bool
+        is_folder: bool,
+        read_ahead: int = 0,
+        write_behind: int = 0,
     ):
         """
         Init method
@@ -77,27 +85,37 @@ class PythonPoolTransformFileProcessor(AbstractTransformFileProcessor):
         :param transform_params - transform parameters
         :param transform_class: transform class
         :param is_folder: folder tranform flag
+        :param read_ahead: number of files to download in the background
+        :param write_behind: max number of output files written in the background
         """
         super().__init__(
             data_access_factory=data_access_factory,
             transform_parameters=dict(transform_params),
             is_folder=is_folder,
+            read_ahead=read_ahead,
+            write_behind=write_behind,
         )
         # Add data access and statistics to the processor parameters
         self.transform_params["data_access"] = self.data_access
         self.transform_class = transform_class
         self.transform = None
 
-    def process_file(self, f_name: str) -> dict[str, Any]:
-        # re initialize statistics
-        self.stats = {}
+    def create_transform(self) -> None:
+        """
+        Create transform, if it does not exist yet. Make sure to do this locally (in the worker process)
+        :return: None
+        """
         if self.transform is None:
-            # create transform. Make sure to do this locally
             try:
                 self.transform = self.transform_class(self.transform_params)
             except Exception as e:
                 self.logger.error(f"Exception creating transform  {e}")
                 raise UnrecoverableException("failed creating transform")
+
+    def process_file(self, f_name: str) -> dict[str, Any]:
+        # re initialize statistics
+        self.stats = {}
+        self.create_transform()
         # Invoke superclass method
         super().process_file(f_name=f_name)
         # return collected statistics
@@ -14,15 +14,14 @@ import time
 import traceback
 import psutil
 from datetime import datetime
-from multiprocessing import Pool
 from typing import Any
 
 from data_processing.data_access import DataAccessFactoryBase
 from data_processing.runtime.pure_python import (
-    PythonPoolTransformFileProcessor,
     PythonTransformExecutionConfiguration,
     PythonTransformFileProcessor,
     PythonTransformRuntimeConfiguration,
+    PythonTransformWorkerPool,
 )
 from data_processing.transform import AbstractTransform, TransformStatistics, AbstractFolderTransform
 from data_processing.utils import GB, get_logger
@@ -70,6 +69,13 @@ def orchestrate(
     if data_access is None:
         logger.error("No DataAccess instance provided - exiting")
         return 1
+    execution_mode = execution_config.get_execution_mode(runtime_config.get_transform_class())
+    if execution_mode == "processes" and data_access.is_process_local():
+        logger.error(
+            "memory data access keeps the files in the memory of the orchestrator process, so they are not visible "
+            "to the worker processes - use shared memory (--data_memory_shared True) or threads execution mode"
+        )
+        return 1
     # create additional execution parameters
     runtime = runtime_config.create_transform_runtime()
     is_folder = issubclass(runtime_config.get_transform_class(), AbstractFolderTransform)
@@ -92,10 +98,12 @@ def orchestrate(
         if print_interval == 0:
             print_interval = 1
         logger.debug(f"{runtime_config.get_name()} Begin processing files")
-        if execution_config.num_processors > 0:
-            # using multiprocessor pool for execution
+        logger.info(f"Using {execution_mode} execution")
+        if execution_mode != "sequential":
+            # using multiprocessor or thread pool for execution
             statistics = _process_transforms_multiprocessor(
                 files=files,
+                sizes=None if is_folder else data_access.get_file_sizes(files),
                 size=execution_config.num_processors,
                 data_access_factory=data_access_factory,
                 print_interval=print_interval,
@@ -104,6 +112,9 @@ def orchestrate(
                 ),
                 transform_class=runtime_config.get_transform_class(),
                 is_folder=is_folder,
+                use_threads=execution_mode == "threads",
+                read_ahead=execution_config.read_ahead,
+                write_behind=execution_config.write_behind,
             )
         else:
             # using sequential execution
@@ -117,6 +128,8 @@ def orchestrate(
                 ),
                 transform_class=runtime_config.get_transform_class(),
                 is_folder=is_folder,
+                read_ahead=execution_config.read_ahead,
+                write_behind=execution_config.write_behind,
             )
         status = "success"
         return_code = 0
@@ -166,6 +179,8 @@ def _process_transforms(
     transform_params: dict[str, Any],
     transform_class: type[AbstractTransform],
     is_folder: bool,
+    read_ahead: int = 0,
+    write_behind: int = 0,
 ) -> None:
     """
     Process transforms sequentially
@@ -176,6 +191,8 @@ def _process_transforms(
     :param transform_params - transform parameters
     :param transform_class: transform class
     :param is_folder: folder transform flag
+    :param read_ahead: number of files to download in the background
+    :param write_behind: max number of output files written in the background
     :return: metadata for the execution
     """
     # create executor
@@ -185,12 +202,13 @@ def _process_transforms(
         transform_params=transform_params,
         transform_class=transform_class,
         is_folder=is_folder,
+        read_ahead=read_ahead,
+        write_behind=write_behind,
     )
     # process data
     t_start = time.time()
     completed = 0
-    for path in files:
-        executor.process_file(path)
+    for _ in executor.process_files(files):
         completed += 1
         if completed % print_interval == 0:
             logger.info(
@@ -211,10 +229,14 @@ def _process_transforms_multiprocessor(
     data_access_factory: DataAccessFactoryBase,
     transform_params: dict[str, Any],
     transform_class: type[AbstractTransform],
-    is_folder: bool
+    is_folder: bool,
+    sizes: list[int] = None,
+    use_threads: bool = False,
+    read_ahead: int = 0,
+    write_behind: int = 0,
 ) -> TransformStatistics:
     """
-    Process transforms using multiprocessing pool
+    Process transforms using a pool of persistent worker processes (or threads)
     :param files: list of files to process
     :param size: pool size
     :param print_interval: print interval
@@ -222,38 +244,39 @@ def _process_transforms_multiprocessor(
     :param transform_params - transform parameters
     :param transform_class: transform class
     :param is_folder: folder transform class
+    :param sizes: optional list of file sizes, used to process the largest files first
+    :param use_threads: use worker threads instead of processes
+    :param read_ahead: number of files every worker downloads in the background
+    :param write_behind: max number of output files every worker writes in the background
     :return: metadata for the execution
     """
     # result statistics
     statistics = TransformStatistics()
-    # create processor
-    processor = PythonPoolTransformFileProcessor(
+    # create worker pool
+    pool = PythonTransformWorkerPool(
+        size=size,
         data_access_factory=data_access_factory,
         transform_params=transform_params,
         transform_class=transform_class,
         is_folder=is_folder,
+        use_threads=use_threads,
+        read_ahead=read_ahead,
+        write_behind=write_behind,
     )
     completed = 0
     t_start = time.time()
-    # create multiprocessing pool
-    with Pool(processes=size) as pool:
-        # execute for every input file
-        for result in pool.imap_unordered(processor.process_file, files):
-            completed += 1
-            # accumulate statistics
-            statistics.add_stats(result)
-            if completed % print_interval == 0:
-                # print intermediate statistics
-                logger.info(
-                    f"Completed {completed} files ({round(100 * completed / len(files), 2)}%) "
-                    f"in {round((time.time() - t_start)/60., 3)} min"
-                )
-        logger.info(f"Done processing {completed} files, waiting for flush() completion.")
-        results = [{}] * size
-        # flush
-        for i in range(size):
-            results[i] = pool.apply_async(processor.flush)
-        for s in results:
-            statistics.add_stats(s.get())
-    logger.info(f"done flushing in {time.time() - t_start} sec")
+    # execute for every input file, followed by a single flush of every worker
+    for flushed, result in pool.process_files(files=files, sizes=sizes):
+        # accumulate statistics
+        statistics.add_stats(result)
+        if flushed:
+            continue
+        completed += 1
+        if completed % print_interval == 0:
+            # print intermediate statistics
+            logger.info(
+                f"Completed {completed} files ({round(100 * completed / len(files), 2)}%) "
+                f"in {round((time.time() - t_start)/60., 3)} min"
+            )
+    logger.info(f"done processing {completed} files and flushing in {time.time() - t_start} sec")
     return statistics
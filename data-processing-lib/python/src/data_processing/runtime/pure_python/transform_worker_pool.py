@@ -0,0 +1,200 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import multiprocessing
+import queue
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+from data_processing.data_access import DataAccessFactoryBase
+from data_processing.runtime.pure_python.transform_file_processor import (
+    PythonPoolTransformFileProcessor,
+)
+from data_processing.transform import AbstractTransform
+from data_processing.utils import UnrecoverableException, get_logger
+
+
+# kinds of the messages sent by the workers
+_FILE_DONE = "file"
+_FLUSH_DONE = "flush"
+_FAILED = "failed"
+
+
+def _worker(
+    tasks: queue.Queue,
+    results: queue.Queue,
+    data_access_factory: DataAccessFactoryBase,
+    transform_params: dict[str, Any],
+    transform_class: type[AbstractTransform],
+    is_folder: bool,
+    read_ahead: int,
+    write_behind: int,
+) -> None:
+    """
+    Worker (process or thread) main loop. The worker creates its processor (and transform) once, then it
+    processes files pulled from the task queue until it gets None, at which point it flushes the transform
+    and exits. Statistics are never shared between workers, they are sent with the results instead
+    :param tasks: queue of the files to process (multiprocessing or thread queue)
+    :param results: queue of the worker results
+    :param data_access_factory: data access factory
+    :param transform_params: transform parameters
+    :param transform_class: transform class
+    :param is_folder: folder transform flag
+    :param read_ahead: number of files to download in the background
+    :param write_behind: max number of output files written in the background
+    :return: None
+    """
+    try:
+        processor = PythonPoolTransformFileProcessor(
+            data_access_factory=data_access_factory,
+            transform_params=transform_params,
+            transform_class=transform_class,
+            is_folder=is_folder,
+            read_ahead=read_ahead,
+            write_behind=write_behind,
+        )
+        processor.create_transform()
+        processor.stats = {}
+        # with read-ahead, the next files are taken from the task queue before the current one is processed
+        for _ in processor.process_files(f_names=iter(tasks.get, None)):
+            results.put((_FILE_DONE, processor.stats))
+            processor.stats = {}
+        results.put((_FLUSH_DONE, processor.flush()))
+    except Exception as e:
+        results.put((_FAILED, f"{e}: {traceback.format_exc()}"))
+
+
+class PythonTransformWorkerPool:
+    """
+    Pool of persistent worker processes, each one of them creating its transform once. Files are
+    dispatched through a shared queue, largest first, so that the big files do not end up processed
+    last, and every worker flushes its transform exactly once, when there are no more files to process.
+    For thread safe transforms, the workers can be threads of the current process (backed by a
+    ThreadPoolExecutor), each one of them with its own transform instance.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        data_access_factory: DataAccessFactoryBase,
+        transform_params: dict[str, Any],
+        transform_class: type[AbstractTransform],
+        is_folder: bool,
+        use_threads: bool = False,
+        read_ahead: int = 0,
+        write_behind: int = 0,
+    ):
+        """
+        Init method
+        :param size: number of workers
+        :param data_access_factory: data access factory
+        :param transform_params: transform parameters
+        :param transform_class: transform class
+        :param is_folder: folder transform flag
+        :param use_threads: use threads instead of processes as workers
+        :param read_ahead: number of files every worker downloads in the background
+        :param write_behind: max number of output files every worker writes in the background
+        """
+        self.size = size
+        self.data_access_factory = data_access_factory
+        self.transform_params = transform_params
+        self.transform_class = transform_class
+        self.is_folder = is_folder
+        self.use_threads = use_threads
+        self.read_ahead = read_ahead
+        self.write_behind = write_behind
+        self.logger = get_logger(__name__)
+
+    def process_files(self, files: list[str], sizes: list[int] = None) -> Iterator[tuple[bool, dict[str, Any]]]:
+        """
+        Process files in the workers
+        :param files: list of files to process
+        :param sizes: optional list of file sizes, used to dispatch the files largest first
+        :return: iterator of (flush flag, statistics) for every processed file, followed by the
+                 statistics of the flush of every worker
+        """
+        if sizes is not None:
+            files = [f for _, f in sorted(zip(sizes, files), key=lambda size_file: -size_file[0])]
+        if self.use_threads:
+            tasks = queue.Queue()
+            results = queue.Queue()
+        else:
+            tasks = multiprocessing.Queue()
+            results = multiprocessing.Queue()
+        for f_name in files:
+            tasks.put(f_name)
+        # one termination (flush) request per worker
+        for _ in range(self.size):
+            tasks.put(None)
+        worker_args = (
+            tasks,
+            results,
+            self.data_access_factory,
+            self.transform_params,
+            self.transform_class,
+            self.is_folder,
+            self.read_ahead,
+            self.write_behind,
+        )
+        if self.use_threads:
+            yield from self._process_threads(results=results, worker_args=worker_args)
+        else:
+            yield from self._process_processes(results=results, worker_args=worker_args)
+
+    def _process_processes(
+        self, results: multiprocessing.Queue, worker_args: tuple
+    ) -> Iterator[tuple[bool, dict[str, Any]]]:
+        workers = [multiprocessing.Process(target=_worker, args=worker_args, daemon=True) for _ in range(self.size)]
+        for worker in workers:
+            worker.start()
+        try:
+            yield from self._collect_results(
+                results=results, failed=lambda: any(worker.exitcode not in (None, 0) for worker in workers)
+            )
+            for worker in workers:
+                worker.join()
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+    def _process_threads(self, results: queue.Queue, worker_args: tuple) -> Iterator[tuple[bool, dict[str, Any]]]:
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="transform") as executor:
+            workers = [executor.submit(_worker, *worker_args) for _ in range(self.size)]
+            yield from self._collect_results(
+                results=results, failed=lambda: any(worker.done() and worker.exception() for worker in workers)
+            )
+
+    def _collect_results(
+        self, results: queue.Queue, failed: Callable[[], bool]
+    ) -> Iterator[tuple[bool, dict[str, Any]]]:
+        """
+        Collect results of the workers, until all of them are flushed
+        :param results: queue of the worker results
+        :param failed: function checking whether any of the workers terminated unexpectedly
+        :return: iterator of (flush flag, statistics)
+        """
+        flushed = 0
+        while flushed < self.size:
+            try:
+                kind, result = results.get(timeout=1)
+            except queue.Empty:
+                if failed():
+                    raise UnrecoverableException("worker terminated unexpectedly")
+                continue
+            if kind == _FAILED:
+                self.logger.error(f"Worker failed: {result}")
+                raise UnrecoverableException("worker failed")
+            if kind == _FLUSH_DONE:
+                flushed += 1
+            yield kind == _FLUSH_DONE, result
@@ -9,12 +9,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 ################################################################################
+import io
+import itertools
 import time
 import traceback
-from typing import Any
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator
 
-from data_processing.data_access import DataAccessFactoryBase
-from data_processing.utils import TransformUtils, UnrecoverableException, get_logger
+from data_processing.data_access import (
+    CheckpointLedger,
+    DataAccess,
+    DataAccessFactoryBase,
+)
+from data_processing.data_access.checkpoint_ledger import LEDGER_FLUSH_COUNT
+from data_processing.transform import AbstractBinaryTransform, AbstractTableTransform
+from data_processing.utils import UnrecoverableException, get_logger
 
 
 class AbstractTransformFileProcessor:
@@ -27,12 +37,18 @@ class AbstractTransformFileProcessor:
         data_access_factory: DataAccessFactoryBase,
         transform_parameters: dict[str, Any],
         is_folder: bool = False,
+        read_ahead: int = 0,
+        write_behind: int = 0,
     ):
         """
         Init method
         :param data_access_factory: Data Access Factory
         :param transform_parameters: Transform parameters
         :param is_folder: folder transform flag
+        :param read_ahead: number of files to download in the background, while the current one is
+                           transformed. Used by process_files(). 0 disables read-ahead
+        :param write_behind: max number of output files that are written in the background. 0 disables
+                             write-behind
         """
         self.logger = get_logger(__name__)
         # validate parameters
@@ -49,6 +65,17 @@ class AbstractTransformFileProcessor:
         self.transform_params = transform_parameters
         self.transform_params["data_access"] = self.data_access
         self.is_folder = is_folder
+        self.read_ahead = read_ahead
+        self.write_behind = write_behind
+        # write-behind executor and queue of outstanding writes, created on the first write
+        self.writer = None
+        self.pending_writes = deque()
+        # checkpoint ledger of the processed inputs, the input being transformed and its write failure flag
+        self.ledger = None
+        if self.data_access is not None and self.data_access.checkpoint and not is_folder:
+            self.ledger = CheckpointLedger(data_access=self.data_access)
+        self.current_source = None
+        self.write_failed = False
 
     def process_file(self, f_name: str) -> None:
         """
@@ -61,23 +88,120 @@ class AbstractTransformFileProcessor:
             self.logger.warning("No data_access found. Returning.")
             return
         t_start = time.time()
+        filedata = None
         if not self.is_folder:
             # Read source file only if we are processing file
-            filedata, retries = self.data_access.get_file(path=f_name)
+            filedata, retries = self._read_work_unit(f_name=f_name)
+            if not self._check_read_result(f_name=f_name, filedata=filedata, retries=retries):
+                return
+        self._transform_file(f_name=f_name, filedata=filedata, t_start=t_start)
+
+    def process_files(self, f_names: Iterable[str]) -> Iterator[str]:
+        """
+        Method processing a sequence of files. If read-ahead is enabled, up to read_ahead next files are
+        downloaded in the background while the current one is transformed. Files are consumed from f_names
+        lazily, so that f_names can be an iterator.
+        :param f_names: file names
+        :return: iterator of the processed file names, a name is returned once its processing completes
+        """
+        if self.read_ahead <= 0 or self.is_folder or self.data_access is None:
+            for f_name in f_names:
+                self.process_file(f_name=f_name)
+                yield f_name
+            return
+        names = iter(f_names)
+        prefetched = deque()
+        with ThreadPoolExecutor(max_workers=self.read_ahead) as reader:
+            for f_name in itertools.islice(names, self.read_ahead):
+                prefetched.append((f_name, reader.submit(self._read_work_unit, f_name=f_name)))
+            while len(prefetched) > 0:
+                f_name, future = prefetched.popleft()
+                # keep the read-ahead queue full
+                next_name = next(names, None)
+                if next_name is not None:
+                    prefetched.append((next_name, reader.submit(self._read_work_unit, f_name=next_name)))
+                self.logger.debug(f"Begin processing file {f_name}")
+                t_start = time.time()
+                filedata, retries = future.result()
+                if self._check_read_result(f_name=f_name, filedata=filedata, retries=retries):
+                    self._transform_file(f_name=f_name, filedata=filedata, t_start=t_start)
+                yield f_name
+
+    def _read_work_unit(self, f_name: str) -> tuple[bytes, int]:
+        """
+        Read file (or work unit). For table transforms declaring their input columns or filters, only these
+        columns and the row groups, that can contain matching rows, are read
+        :param f_name: file name (or work unit)
+        :return: file content and number of retries
+        """
+        if isinstance(self.transform, AbstractTableTransform):
+            return self.data_access.get_work_unit(
+                path=f_name, columns=self.transform.input_columns, filters=self.transform.input_filters
+            )
+        if self._streams_input():
+            return self.data_access.get_file_stream(path=f_name)
+        return self.data_access.get_work_unit(path=f_name)
+
+    def _streams_input(self) -> bool:
+        """
+        Check whether transform consumes its inputs as streams, that is whether it overrides transform_stream
+        :return: True if the transform consumes streams
+        """
+        return type(self.transform).transform_stream is not AbstractBinaryTransform.transform_stream
+
+    def _check_read_result(self, f_name: str, filedata: bytes, retries: int) -> bool:
+        """
+        Publish statistics of the file read
+        :param f_name: file name
+        :param filedata: file content or a stream of it
+        :param retries: number of read retries
+        :return: True if the file was read, False otherwise
+        """
+        if retries > 0:
+            self._publish_stats({"data access retries": retries})
+        # data access statistics, for example read cache hits and misses
+        data_access_stats = self.data_access.collect_stats()
+        if len(data_access_stats) > 0:
+            self._publish_stats(data_access_stats)
+        if filedata is None:
+            self.logger.warning(f"File read resulted in None for {f_name}. Returning.")
+            self._publish_stats({"failed_reads": 1})
+            return False
+        # a file split into row group work units is counted once, with its first unit
+        _, row_groups = DataAccess.parse_work_unit(f_name)
+        source_files = 1 if row_groups is None or row_groups[0] == 0 else 0
+        if isinstance(filedata, io.IOBase):
+            # size of a stream is the size of the (compressed) file
+            info, retries = self.data_access.get_file_info(path=f_name)
             if retries > 0:
                 self._publish_stats({"data access retries": retries})
-            if filedata is None:
-                self.logger.warning(f"File read resulted in None for {f_name}. Returning.")
-                self._publish_stats({"failed_reads": 1})
-                return
-            self._publish_stats({"source_files": 1, "source_size": len(filedata)})
+            source_size = 0 if info is None else info["size"]
+        else:
+            source_size = len(filedata)
+        self._publish_stats({"source_files": source_files, "source_size": source_size})
+        return True
+
+    def _transform_file(self, f_name: str, filedata: bytes, t_start: float) -> None:
+        """
+        Transform content of an individual file (or a folder) and save the results
+        :param f_name: file name
+        :param filedata: file content or a stream of it (closed here), None for folder transforms
+        :param t_start: processing start time
+        :return: None
+        """
+        # publish statistics of the already completed background writes
+        self._complete_writes(wait=False)
         # Process input file
         try:
             self.logger.debug(f"Begin transforming file {f_name}")
             if not self.is_folder:
-                # execute local processing
-                out_files, stats = self.transform.transform_binary(file_name=f_name, byte_array=filedata)
-                name_extension = TransformUtils.get_file_extension(f_name)
+                # execute local processing. Outputs of row group work units get a suffix identifying the unit
+                file_name, _ = DataAccess.parse_work_unit(f_name)
+                if isinstance(filedata, io.IOBase):
+                    out_files, stats = self.transform.transform_stream(file_name=file_name, stream=filedata)
+                else:
+                    out_files, stats = self.transform.transform_binary(file_name=file_name, byte_array=filedata)
+                name_extension = DataAccess.get_work_unit_name_extension(f_name)
                 self.last_file_name = name_extension[0]
                 self.last_file_name_next_index = None
                 self.last_extension = name_extension[1]
@@ -86,7 +210,11 @@ class AbstractTransformFileProcessor:
                 self.last_file_name = f_name
             self.logger.debug(f"Done transforming file {f_name}, got {len(out_files)} files")
             # save results
+            self.current_source = f_name
+            self.write_failed = False
             self._submit_file(t_start=t_start, out_files=out_files, stats=stats)
+            if not self.write_failed:
+                self._record_processed(f_name=f_name)
         # Process unrecoverable exceptions
         except UnrecoverableException as _:
             self.logger.warning(f"Transform has thrown unrecoverable exception processing file {f_name}. Exiting...")
@@ -95,6 +223,50 @@ class AbstractTransformFileProcessor:
         except Exception as e:
             self.logger.warning(f"Exception processing file {f_name}: {traceback.format_exc()}")
             self._publish_stats({"transform execution exception": 1})
+        finally:
+            self.current_source = None
+            if isinstance(filedata, io.IOBase):
+                filedata.close()
+
+    def _record_processed(self, f_name: str) -> None:
+        """
+        Record a processed input in the checkpoint ledger. A ledger segment is saved every LEDGER_FLUSH_COUNT
+        inputs, once their outputs are written. For transforms buffering data until flush, the ledger is only
+        saved when the processor is flushed
+        :param f_name: file name (or work unit)
+        :return: None
+        """
+        if self.ledger is None:
+            return
+        retries = self.ledger.record(path=f_name)
+        if retries > 0:
+            self._publish_stats({"data access retries": retries})
+        if len(self.ledger) >= LEDGER_FLUSH_COUNT and not self._buffers_data():
+            # outputs have to be written before their inputs are recorded
+            self._complete_writes(wait=True)
+            self._flush_ledger()
+
+    def _buffers_data(self) -> bool:
+        """
+        Check whether transform can buffer data until flush, that is whether it overrides flush
+        :return: True if the transform can buffer data
+        """
+        transform_class = type(self.transform)
+        if isinstance(self.transform, AbstractTableTransform):
+            return (
+                transform_class.flush is not AbstractTableTransform.flush
+                or transform_class.flush_binary is not AbstractTableTransform.flush_binary
+            )
+        return transform_class.flush_binary is not AbstractBinaryTransform.flush_binary
+
+    def _flush_ledger(self) -> None:
+        """
+        Save the recorded inputs as a ledger segment
+        :return: None
+        """
+        retries = self.ledger.flush()
+        if retries > 0:
+            self._publish_stats({"data access retries": retries})
 
     def flush(self) -> None:
         """
@@ -107,7 +279,21 @@ class AbstractTransformFileProcessor:
             # for some reason a given worker never processed anything. Happens in testing
             # when the amount of workers is greater than the amount of files
             self.logger.debug("skipping flush, no name for file is defined or this is a folder transform")
-            return
+        else:
+            self._flush_transform()
+        # wait for all the background writes
+        self._complete_writes(wait=True)
+        if self.writer is not None:
+            self.writer.shutdown()
+            self.writer = None
+        if self.ledger is not None:
+            self._flush_ledger()
+
+    def _flush_transform(self) -> None:
+        """
+        Flush transform and save its results
+        :return: None
+        """
         try:
             t_start = time.time()
             # get flush results
@@ -118,6 +304,7 @@ class AbstractTransformFileProcessor:
             out_files, stats = self.transform.flush_binary()
             self.logger.debug(f"Done flushing transform, got {len(out_files)} files")
             # Here we are using the name of the last file, that we were processing
+            self.write_failed = False
             self._submit_file(t_start=t_start, out_files=out_files, stats=stats)
         except Exception as e:
             self.logger.warning(f"Exception {e} flushing: {traceback.format_exc()}")
@@ -163,12 +350,7 @@ class AbstractTransformFileProcessor:
                 self.logger.debug(
                     f"Writing transformed file {self.last_file_name}{self.last_extension} to {output_name}"
                 )
-                save_res, retries = self.data_access.save_file(path=output_name, data=dt)
-                if retries > 0:
-                    self._publish_stats({"data access retries": retries})
-                if save_res is None:
-                    self.logger.warning(f"Failed to write file {output_name}")
-                    self._publish_stats({"failed_writes": 1})
+                self._save_file(path=output_name, data=dt)
                 # Store execution statistics. Doing this async
                 self._publish_stats(
                     {
@@ -204,12 +386,7 @@ class AbstractTransformFileProcessor:
                         )
                         dt = file_ext[0]
                     file_sizes += len(dt)
-                    save_res, retries = self.data_access.save_file(path=output_name_indexed, data=dt)
-                    if retries > 0:
-                        self._publish_stats({"data access retries": retries})
-                    if save_res is None:
-                        self.logger.warning(f"Failed to write file {output_name_indexed}")
-                        self._publish_stats({"failed_writes": 1})
+                    if not self._save_file(path=output_name_indexed, data=dt):
                         break
                 self.last_file_name_next_index = start_index + count
                 self._publish_stats(
@@ -223,6 +400,77 @@ class AbstractTransformFileProcessor:
         if len(stats) > 0:
             self._publish_stats(stats)
 
+    def _save_file(self, path: str, data: bytes) -> bool:
+        """
+        Save output file. If write-behind is enabled, the file is written in the background and the method
+        only blocks when the amount of outstanding writes reaches write_behind
+        :param path: file path
+        :param data: file content
+        :return: False if the write failed, True otherwise. With write-behind, a failure is only reported
+                 once the background write of an output of the same input (or flush) is completed
+        """
+        if self.write_behind <= 0:
+            save_res, retries = self.data_access.save_file(path=path, data=data)
+            return self._check_save_result(path=path, save_res=save_res, retries=retries, source=self.current_source)
+        if self.writer is None:
+            self.writer = ThreadPoolExecutor(max_workers=self.write_behind)
+        while len(self.pending_writes) >= self.write_behind:
+            # queue is full, wait for the oldest write
+            self._complete_write(*self.pending_writes.popleft())
+        # check the already completed writes, do not write further outputs of an input with a failed write
+        self._complete_writes(wait=False)
+        if self.write_failed:
+            return False
+        self.pending_writes.append(
+            (path, self.writer.submit(self.data_access.save_file, path=path, data=data), self.current_source)
+        )
+        return True
+
+    def _complete_write(self, path: str, future: Future, source: str) -> None:
+        """
+        Wait for the background write completion and publish its statistics
+        :param path: file path
+        :param future: write future
+        :param source: input the file was produced from, None for the results of flush
+        :return: None
+        """
+        try:
+            save_res, retries = future.result()
+        except Exception as e:
+            self.logger.warning(f"Exception writing file {path}: {e}")
+            save_res, retries = None, 0
+        self._check_save_result(path=path, save_res=save_res, retries=retries, source=source)
+
+    def _complete_writes(self, wait: bool) -> None:
+        """
+        Publish statistics of completed background writes
+        :param wait: if True wait for all outstanding writes, otherwise only process already completed ones
+        :return: None
+        """
+        while len(self.pending_writes) > 0 and (wait or self.pending_writes[0][1].done()):
+            self._complete_write(*self.pending_writes.popleft())
+
+    def _check_save_result(self, path: str, save_res: dict[str, Any], retries: int, source: str = None) -> bool:
+        """
+        Publish statistics of the file write
+        :param path: file path
+        :param save_res: result of the save operation
+        :param retries: number of write retries
+        :param source: input the file was produced from, it is not recorded as processed if the write failed
+        :return: True if the file was written, False otherwise
+        """
+        if retries > 0:
+            self._publish_stats({"data access retries": retries})
+        if save_res is None:
+            self.logger.warning(f"Failed to write file {path}")
+            self._publish_stats({"failed_writes": 1})
+            if source == self.current_source:
+                self.write_failed = True
+            if source is not None and self.ledger is not None:
+                self.ledger.discard(path=source)
+            return False
+        return True
+
     def _publish_stats(self, stats: dict[str, Any]) -> None:
         """
         Publishing execution statistics
@@ -226,6 +226,44 @@ class AbstractTest:
             d2 = os.path.join(expected_dir, subdir)
             cls.validate_directory_contents(d1, d2, drop_columns)
 
+    @classmethod
+    def validate_directory_tables(cls, directory: str, expected_dir: str, drop_columns: list[str] = []):
+        """
+        Make sure the parquet files of the directories contain the same rows, regardless of how the rows are
+        split into files and how the files are named. Used for runtimes writing their own output files
+        (Ray datasets, Spark data frames).
+        :param directory:
+        :param expected_dir:
+        :param drop_columns: list of columns that might differ
+        :return:
+        """
+        assert os.path.isfile(os.path.join(directory, "metadata.json")), f"metadata.json is missing in {directory}"
+        table = cls._combine_tables(directory, drop_columns)
+        expected_table = cls._combine_tables(expected_dir, drop_columns)
+        assert table.column_names == expected_table.column_names, "Columns of the two directories are not the same"
+        assert (
+            table.num_rows == expected_table.num_rows
+        ), f"Number of rows ({table.num_rows}) does not match expected number ({expected_table.num_rows})"
+        # runtimes can write equivalent, but not identical types (string vs large_string, etc.)
+        table = table.cast(expected_table.schema)
+        cls.validate_expected_tables([table], [expected_table])
+
+    @staticmethod
+    def _combine_tables(directory: str, drop_columns: list[str]) -> pa.Table:
+        """
+        Combine the parquet files of the directory into a single table with sorted columns and rows.
+        Files with different schemas are combined, filling their missing columns with nulls.
+        :param directory:
+        :param drop_columns: list of columns to drop
+        :return: table
+        """
+        table = pa.concat_tables(get_tables_in_folder(directory), promote_options="default")
+        columns = sorted(name for name in table.column_names if name not in drop_columns)
+        table = table.select(columns)
+        # nested columns can not be sorted on
+        keys = [name for name in columns if not pa.types.is_nested(table.schema.field(name).type)]
+        return table.sort_by([(name, "ascending") for name in keys])
+
     @classmethod
     def _validate_table_files(cls, parquet1: str, parquet2: str, drop_columns: list[str] = []):
         da = DataAccessLocal()
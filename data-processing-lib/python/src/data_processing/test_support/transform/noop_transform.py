@@ -38,6 +38,8 @@ class NOOPTransform(AbstractTableTransform):
     Implements a simple copy of a pyarrow Table.
     """
 
+    thread_safe = True
+
     def __init__(self, config: dict[str, Any]):
         """
         Initialize based on the dictionary of configuration information.
@@ -4,3 +4,5 @@ from data_processing.transform.binary_transform import AbstractBinaryTransform
 from data_processing.transform.table_transform import AbstractTableTransform
 from data_processing.transform.transform_statistics import TransformStatistics
 from data_processing.transform.transform_configuration import TransformConfiguration, get_transform_config
+from data_processing.transform.pipeline_transform import PipelineTransform, pipeline_transforms_key
+from data_processing.transform.pipeline_transform_configuration import PipelineTransformConfiguration
@@ -13,4 +13,8 @@
 class AbstractTransform:
     """
     Base class for all transform types
-    """
\ No newline at end of file
+    """
+
+    # Transforms that can run concurrently in multiple threads of the same process (each thread using
+    # its own transform instance) set this to True, to be executed by a thread pool in the Python runtime
+    thread_safe = False
\ No newline at end of file
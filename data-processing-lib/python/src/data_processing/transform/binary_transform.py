@@ -10,7 +10,7 @@
 # limitations under the License.
 ################################################################################
 
-from typing import Any
+from typing import Any, BinaryIO
 from data_processing.transform import AbstractTransform
 
 
@@ -40,6 +40,22 @@ class AbstractBinaryTransform(AbstractTransform):
         """
         raise NotImplemented()
 
+    def transform_stream(self, file_name: str, stream: BinaryIO) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        """
+        Converts input file, given as a stream, into 0 or more output files. Transforms that can consume their
+        inputs incrementally (for example, archives or line oriented files) can override it, so that the input
+        files are not read into memory as a whole. Compressed inputs (gz, bz2, xz and zst) are decompressed as
+        the stream is read, streams of uncompressed files are seekable. This default implementation reads the
+        whole stream and invokes transform_binary().
+        If there is an error, an exception must be raised - exit()ing is not generally allowed.
+        :param file_name: the name of the file containing the given stream.
+        :param stream: file like object of the input file content. It is closed by the caller
+        :return: a tuple of a list of 0 or more tuples and a dictionary of statistics that will be propagated
+                to metadata.  Each element of the return list, is a tuple of the transformed bytes and a string
+                holding the extension to be used when writing out the new bytes.
+        """
+        return self.transform_binary(file_name=file_name, byte_array=stream.read())
+
     def flush_binary(self) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
         """
         This is supporting method for transformers, that implement buffering of data, for example coalesce.
@@ -0,0 +1,135 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from typing import Any
+
+import pyarrow as pa
+from data_processing.transform import AbstractTableTransform
+from data_processing.utils import UnrecoverableException
+
+
+pipeline_transforms_key = "pipeline_transforms"
+""" Key holding the list of (transform class, transform parameters) for the pipeline participants """
+
+
+class PipelineTransform(AbstractTableTransform):
+    """
+    Transform executing a chain of table transforms in memory. Tables produced by a participant
+    are passed to the next one directly, so only the results of the last participant are serialized.
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        """
+        Initialize based on the dictionary of configuration information.
+        :param config: configuration, containing under pipeline_transforms_key the list of tuples of the
+            participant's transform class and transform parameters. The rest of configuration parameters
+            (data access, statistics, etc.) is passed to all participants.
+        """
+        super().__init__(config)
+        participants = config.get(pipeline_transforms_key, [])
+        if len(participants) == 0:
+            self.logger.error("Pipeline transform: no participating transforms are specified")
+            raise UnrecoverableException("no participating transforms")
+        common = {key: value for key, value in config.items() if key != pipeline_transforms_key}
+        self.participants = []
+        for transform_class, transform_params in participants:
+            if not issubclass(transform_class, AbstractTableTransform):
+                self.logger.error(f"Pipeline transform: {transform_class.__name__} is not a table transform")
+                raise UnrecoverableException(f"{transform_class.__name__} is not a table transform")
+            self.participants.append(transform_class(common | transform_params))
+        # pipeline can be streamed only if all of its participants can
+        self.streamable = all(participant.streamable for participant in self.participants)
+        self.last_file_name = None
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Run the table through all participating transforms
+        :param table: input table
+        :param file_name: the file name of the file containing the table.
+        :return: a tuple of a list of 0 or more tables produced by the last participant and a dictionary of
+        statistics of all participants
+        """
+        self.last_file_name = file_name
+        return self._process_tables(tables=[table], file_name=file_name, start=0, batch=False)
+
+    def transform_batch(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Run a single row group through transform_batch() of all participating transforms
+        :param table: input table, containing a single row group of the file
+        :param file_name: the file name of the file containing the row group.
+        :return: a tuple of a list of 0 or 1 tables produced by the last participant and a dictionary of
+        statistics of all participants
+        """
+        self.last_file_name = file_name
+        tables, stats = self._process_tables(tables=[table], file_name=file_name, start=0, batch=True)
+        if len(tables) > 1:
+            # concatenate, so that the result can be written incrementally
+            tables = [pa.concat_tables(tables)]
+        return tables, stats
+
+    def flush(self) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Flush participating transforms in order. Tables returned by flush of a participant are transformed
+        by all of the following participants before they are flushed, so buffered data propagates down the chain.
+        :return: a tuple of a list of 0 or more tables and a dictionary of statistics
+        """
+        tables = []
+        stats = {}
+        for index, participant in enumerate(self.participants):
+            flushed, flush_stats = participant.flush()
+            stats = self._merge_stats(stats, flush_stats)
+            if len(flushed) == 0:
+                continue
+            transformed, transform_stats = self._process_tables(
+                tables=flushed, file_name=self.last_file_name, start=index + 1, batch=False
+            )
+            tables.extend(transformed)
+            stats = self._merge_stats(stats, transform_stats)
+        return tables, stats
+
+    def _process_tables(
+        self, tables: list[pa.Table], file_name: str, start: int, batch: bool
+    ) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Run tables through the participants starting from a given one
+        :param tables: input tables
+        :param file_name: the file name of the file containing the tables
+        :param start: index of the first participant to use
+        :param batch: use transform_batch() instead of transform()
+        :return: a tuple of a list of resulting tables and a dictionary of statistics
+        """
+        stats = {}
+        for participant in self.participants[start:]:
+            results = []
+            for table in tables:
+                if batch:
+                    out_tables, out_stats = participant.transform_batch(table=table, file_name=file_name)
+                else:
+                    out_tables, out_stats = participant.transform(table=table, file_name=file_name)
+                results.extend(out_tables)
+                stats = self._merge_stats(stats, out_stats)
+            tables = results
+            if len(tables) == 0:
+                break
+        return tables, stats
+
+    @staticmethod
+    def _merge_stats(stats: dict[str, Any], new_stats: dict[str, Any]) -> dict[str, Any]:
+        """
+        Add statistics, the same way TransformStatistics does
+        :param stats: accumulated statistics
+        :param new_stats: statistics to add
+        :return: merged statistics
+        """
+        for key, val in new_stats.items():
+            stats[key] = stats.get(key, 0) + val
+        return stats
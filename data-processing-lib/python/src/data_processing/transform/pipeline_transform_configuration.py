@@ -0,0 +1,75 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from argparse import ArgumentParser, Namespace
+from typing import Any
+
+from data_processing.transform import TransformConfiguration
+from data_processing.transform.pipeline_transform import PipelineTransform
+
+
+class PipelineTransformConfiguration(TransformConfiguration):
+    """
+    Configuration of the pipeline transform - a chain of table transforms executed in memory.
+    Command line parameters of all participating transforms are supported.
+    """
+
+    def __init__(self, pipeline: list[TransformConfiguration], name: str = "pipeline"):
+        """
+        Initialization
+        :param pipeline: configurations of the participating transforms, in the order of execution
+        :param name: transformer name
+        """
+        super().__init__(name=name, transform_class=PipelineTransform)
+        self.pipeline = pipeline
+
+    def add_input_params(self, parser: ArgumentParser) -> None:
+        """
+        Add parameters of all participating transforms to the given parser. Transforms used several times
+        in the pipeline share their parameters, so they are added only once.
+        :param parser: parser
+        :return: None
+        """
+        added = set()
+        for config in self.pipeline:
+            if config.get_name() in added:
+                continue
+            config.add_input_params(parser)
+            added.add(config.get_name())
+
+    def apply_input_params(self, args: Namespace) -> bool:
+        """
+        Validate and apply the arguments of all participating transforms
+        :param args: user defined arguments.
+        :return: True, if validate pass or False otherwise
+        """
+        result = True
+        for config in self.pipeline:
+            result = config.apply_input_params(args) and result
+        return result
+
+    def get_input_params(self) -> dict[str, Any]:
+        """
+        Get input parameters of all participating transforms
+        :return: dictionary of parameters
+        """
+        params = {}
+        for config in self.pipeline:
+            params |= config.get_input_params()
+        return params
+
+    def get_transform_metadata(self) -> dict[str, Any]:
+        """
+        Get metadata of all participating transforms, keyed by the transform name
+        :return parameters for metadata:
+        """
+        return {config.get_name(): config.get_transform_metadata() for config in self.pipeline}
@@ -13,6 +13,7 @@
 from typing import Any
 
 import pyarrow as pa
+import pyarrow.parquet as pq
 from data_processing.transform import AbstractBinaryTransform
 from data_processing.utils import TransformUtils
 
@@ -31,6 +32,14 @@ class AbstractTableTransform(AbstractBinaryTransform):
 
         super().__init__(config)
         self.logger = get_logger(__name__)
+        # Row-local transforms can set this to True (after invoking super().__init__()) to be fed
+        # one parquet row group at a time through transform_batch() instead of a whole table
+        self.streamable = False
+        # Transforms using only some of the input columns, and not passing the rest to their output (for example,
+        # aggregations), can set these (after invoking super().__init__()) to have only the given columns and the
+        # rows matching the given filters (in pyarrow DNF format) read from parquet inputs
+        self.input_columns = None
+        self.input_filters = None
 
     def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
         """
@@ -46,6 +55,10 @@ class AbstractTableTransform(AbstractBinaryTransform):
         if TransformUtils.get_file_extension(file_name)[1] != ".parquet":
             self.logger.warning(f"Get wrong file type {file_name}")
             return [], {"wrong file type": 1}
+        if self.streamable:
+            result = self._transform_binary_streaming(file_name=file_name, byte_array=byte_array)
+            if result is not None:
+                return result
         # convert to table
         table = TransformUtils.convert_binary_to_arrow(data=byte_array)
         if table is None:
@@ -75,6 +88,22 @@ class AbstractTableTransform(AbstractBinaryTransform):
         """
         raise NotImplemented("This method must be implemented by the subclass")
 
+    def transform_batch(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Converts a single row group of the input file into an output table. This is invoked instead of
+        transform() for streamable transforms (self.streamable is True). Results of all row groups of
+        the file are written incrementally into a single output file, so an implementation must return
+        at most one table per row group, and all returned tables must have the same schema.
+        Statistics returned for individual row groups are summed up.
+        The default implementation simply delegates to transform().
+        If there is an error, an exception must be raised - exit()ing is not generally allowed.
+        :param table: input table, containing a single row group of the file
+        :param file_name: the file name of the file containing the given row group.
+        :return: a tuple of a list of 0 or 1 converted tables and a dictionary of statistics that will be
+        propagated to metadata
+        """
+        return self.transform(table=table, file_name=file_name)
+
     def flush_binary(self) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
         """
         This is supporting method for transformers, that implement buffering of tables, for example coalesce.
@@ -100,6 +129,96 @@ class AbstractTableTransform(AbstractBinaryTransform):
         """
         return [], {}
 
+    def _transform_binary_streaming(
+        self, file_name: str, byte_array: bytes
+    ) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        """
+        Streaming implementation of transform_binary. Row groups of the input file are decoded and passed to
+        transform_batch() one at a time, and the results are written incrementally with a ParquetWriter, so
+        that only a single row group is kept in memory as an Arrow table.
+        :param file_name: the file name of the file containing the given byte_array.
+        :param byte_array: contents of the input file to be transformed.
+        :return: same as transform_binary or None if the input can not be read as a parquet file, or the results
+                 of its row groups have incompatible schemas. In this case the caller falls back to the non
+                 streaming implementation
+        """
+        try:
+            parquet_file = pq.ParquetFile(pa.BufferReader(byte_array))
+        except Exception as e:
+            self.logger.warning(f"Could not open {file_name} for streaming: {e}, reading it as a whole")
+            return None
+        source_docs = parquet_file.metadata.num_rows
+        if source_docs == 0:
+            self.logger.warning(f"table is empty, skipping processing")
+            return [], {"skipped empty tables": 1}
+        stats = {}
+        out_docs = 0
+        sink = pa.BufferOutputStream()
+        writer = None
+        try:
+            for rg in range(parquet_file.num_row_groups):
+                out_tables, batch_stats = self.transform_batch(
+                    table=parquet_file.read_row_group(rg), file_name=file_name
+                )
+                for key, val in batch_stats.items():
+                    stats[key] = stats.get(key, 0) + val
+                if len(out_tables) == 0:
+                    continue
+                if len(out_tables) > 1:
+                    raise ValueError(f"streamable transform returned {len(out_tables)} tables for a row group")
+                out_table = out_tables[0]
+                if writer is None:
+                    if not TransformUtils.verify_no_duplicate_columns(table=out_table, file=""):
+                        self.logger.warning("Transformer created file with the duplicate columns")
+                        return [], {"duplicate columns result": 1}
+                    # Use ZSTD compression, same as TransformUtils.convert_arrow_to_binary
+                    writer = pq.ParquetWriter(where=sink, schema=out_table.schema, compression="ZSTD")
+                elif not out_table.schema.equals(writer.schema):
+                    unified = self._unify_output_schema(writer=writer, sink=sink, table=out_table)
+                    if unified is None:
+                        self.logger.warning(f"Incompatible row group results of {file_name}, reading it as a whole")
+                        return None
+                    writer, sink, out_table = unified
+                writer.write_table(out_table)
+                out_docs += out_table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        stats = stats | {"source_doc_count": source_docs, "result_doc_count": out_docs}
+        if writer is None:
+            return [], stats
+        return [(bytes(sink.getvalue()), ".parquet")], stats
+
+    @staticmethod
+    def _unify_output_schema(
+        writer: pq.ParquetWriter, sink: pa.BufferOutputStream, table: pa.Table
+    ) -> tuple[pq.ParquetWriter, pa.BufferOutputStream, pa.Table]:
+        """
+        Unify the schema of a row group result with the schema of the results written so far. If the result
+        can not be cast to the written schema (for example, a column is null typed in the previous results),
+        the written results are rewritten with the unified schema
+        :param writer: current writer, it is closed if the written results are rewritten
+        :param sink: output of the current writer
+        :param table: row group result
+        :return: a tuple of the writer, its output and the result cast to the schema of the writer or None,
+                 if the schemas can not be unified
+        """
+        try:
+            return writer, sink, table.cast(writer.schema)
+        except (ValueError, pa.ArrowException):
+            pass
+        try:
+            schema = pa.unify_schemas([writer.schema, table.schema], promote_options="permissive")
+            table = table.cast(schema)
+            writer.close()
+            written = pq.read_table(pa.BufferReader(sink.getvalue())).cast(schema)
+        except (ValueError, pa.ArrowException):
+            return None
+        sink = pa.BufferOutputStream()
+        writer = pq.ParquetWriter(where=sink, schema=schema, compression="ZSTD")
+        writer.write_table(written)
+        return writer, sink, table
+
     def _check_and_convert_tables(
         self, out_tables: list[pa.Table], stats: dict[str, Any]
     ) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
@@ -10,16 +10,22 @@
 # limitations under the License.
 ################################################################################
 
+import bz2
 import gzip
 import json
+import lzma
 import os
+import shutil
+import tempfile
+import zipfile
 from pathlib import Path
 from unittest.mock import patch
 
 import pyarrow
 import pytest
-from data_processing.data_access import DataAccessLocal
-from data_processing.utils import GB, MB, get_logger
+from data_processing.data_access import CheckpointLedger, DataAccessLocal
+from data_processing.data_access.file_listing import ListingCache
+from data_processing.utils import GB, MB, TransformUtils, get_logger
 
 
 logger = get_logger(__name__)
@@ -629,3 +635,267 @@ class TestSaveFile(TestInit):
     def test_invalid_filename(self):
         file_info, _ = self.dal.save_file("", b"Data")
         assert file_info is None
+
+
+class TestRowGroupUnits:
+    path_dict = {
+        "input_folder": os.path.join(os.sep, "tmp", "input_rg"),
+        "output_folder": os.path.join(os.sep, "tmp", "output_rg"),
+    }
+    table = pyarrow.Table.from_pydict({"id": list(range(1000)), "text": [f"document {i}" for i in range(1000)]})
+
+    def _create_file(self) -> str:
+        os.makedirs(self.path_dict["input_folder"], exist_ok=True)
+        file_path = os.path.join(self.path_dict["input_folder"], "large.parquet")
+        pyarrow.parquet.write_table(self.table, file_path, row_group_size=100)
+        return file_path
+
+    def test_split_files(self):
+        file_path = self._create_file()
+        metadata = pyarrow.parquet.read_metadata(file_path)
+        rg_size = sum(metadata.row_group(0).column(c).total_compressed_size for c in range(2))
+        # every unit gets (at least) 3 row groups
+        dal = DataAccessLocal(self.path_dict, split_size=3 * rg_size - 1)
+        files, _, _ = dal.get_files_to_process()
+        assert files == [
+            DataAccessLocal.get_row_group_unit(file_path, first, min(first + 3, 10)) for first in range(0, 10, 3)
+        ]
+        assert DataAccessLocal.parse_work_unit(files[1]) == (file_path, (3, 6))
+        assert DataAccessLocal.get_work_unit_name_extension(files[1]) == (
+            file_path[: -len(".parquet")] + "_rg3-6",
+            ".parquet",
+        )
+        # units read only their row groups
+        data, _ = dal.get_work_unit(files[1])
+        assert TransformUtils.convert_binary_to_arrow(data) == self.table.slice(300, 300)
+        # no splitting
+        files, _, _ = DataAccessLocal(self.path_dict).get_files_to_process()
+        os.remove(file_path)
+        assert files == [file_path]
+
+
+class TestCheckpointLedger:
+    table = pyarrow.Table.from_pydict({"id": list(range(1000)), "text": [f"document {i}" for i in range(1000)]})
+
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path_dict = {
+            "input_folder": os.path.join(self.tmp, "input"),
+            "output_folder": os.path.join(self.tmp, "output"),
+        }
+        os.makedirs(self.path_dict["input_folder"])
+        self.files = [os.path.join(self.path_dict["input_folder"], f"file{i}.parquet") for i in range(3)]
+        for file_path in self.files:
+            pyarrow.parquet.write_table(self.table, file_path, row_group_size=100)
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp)
+
+    def test_ledger(self):
+        dal = DataAccessLocal(self.path_dict, checkpoint=True)
+        # no ledger, all files are processed
+        assert CheckpointLedger.load(dal) == (None, 0)
+        files, _, _ = dal.get_files_to_process()
+        assert files == self.files
+        # record files, discarded ones are not saved
+        ledger = CheckpointLedger(dal)
+        for file_path in self.files[:2]:
+            ledger.record(file_path)
+        ledger.discard(self.files[1])
+        assert len(ledger) == 1
+        ledger.flush()
+        assert len(ledger) == 0
+        ledger.record(self.files[1])
+        ledger.flush()
+        entries, _ = CheckpointLedger.load(dal)
+        assert sorted(entries.keys()) == ["file0.parquet", "file1.parquet"]
+        # the outputs are not listed, recorded files are skipped
+        files, _, _ = dal.get_files_to_process()
+        assert files == self.files[2:]
+        # modified files are processed again
+        pyarrow.parquet.write_table(self.table.slice(0, 10), self.files[0])
+        files, _, _ = dal.get_files_to_process()
+        assert files == [self.files[0], self.files[2]]
+
+    def test_ledger_existing_outputs(self):
+        dal = DataAccessLocal(self.path_dict, checkpoint=True)
+        # output of a run before the ledger existed
+        os.makedirs(self.path_dict["output_folder"])
+        pyarrow.parquet.write_table(self.table, os.path.join(self.path_dict["output_folder"], "file0.parquet"))
+        files, _, _ = dal.get_files_to_process()
+        assert files == self.files[1:]
+        # the first run with the ledger records only the files it processed
+        ledger = CheckpointLedger(dal)
+        for file_path in files:
+            ledger.record(file_path)
+        ledger.flush()
+        entries, _ = CheckpointLedger.load(dal)
+        assert sorted(entries.keys()) == ["file1.parquet", "file2.parquet"]
+        # the next run still skips the file processed before the ledger existed
+        files, _, _ = dal.get_files_to_process()
+        assert files == []
+        # modified files recorded in the ledger are processed again
+        pyarrow.parquet.write_table(self.table.slice(0, 10), self.files[1])
+        files, _, _ = dal.get_files_to_process()
+        assert files == [self.files[1]]
+
+    def test_ledger_work_units(self):
+        dal = DataAccessLocal(self.path_dict, checkpoint=True, split_size=1)
+        files, _, _ = dal.get_files_to_process()
+        assert len(files) == 30
+        ledger = CheckpointLedger(dal)
+        for unit in files[:15]:
+            ledger.record(unit)
+        ledger.flush()
+        # only the remaining units of the partially processed file are processed
+        files, _, _ = dal.get_files_to_process()
+        assert files == [DataAccessLocal.get_row_group_unit(self.files[1], i, i + 1) for i in range(5, 10)] + [
+            DataAccessLocal.get_row_group_unit(self.files[2], i, i + 1) for i in range(10)
+        ]
+
+
+class TestListing:
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path_dict = {
+            "input_folder": os.path.join(self.tmp, "input"),
+            "output_folder": os.path.join(self.tmp, "output"),
+        }
+        self.files = []
+        for folder in ["a", "a/b", "c", ""]:
+            os.makedirs(os.path.join(self.path_dict["input_folder"], folder), exist_ok=True)
+            for i in range(3):
+                file_path = os.path.join(self.path_dict["input_folder"], folder, f"file{i}.parquet")
+                Path(file_path).write_bytes(b"data" * (i + 1))
+                self.files.append(file_path)
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp)
+
+    def test_parallel_listing(self):
+        files, profile, _ = DataAccessLocal(self.path_dict, listing_threads=4).get_files_to_process()
+        assert files == sorted(self.files)
+        assert (files, profile, 0) == DataAccessLocal(self.path_dict).get_files_to_process()
+        # max files are the first ones
+        files, _, _ = DataAccessLocal(self.path_dict, m_files=5, listing_threads=4).get_files_to_process()
+        assert files == sorted(self.files)[:5]
+
+    def test_symlinked_folders(self):
+        # symbolic links to folders (here a cycle) are not followed
+        os.symlink(self.path_dict["input_folder"], os.path.join(self.path_dict["input_folder"], "a", "loop"))
+        files, _, _ = DataAccessLocal(self.path_dict, listing_threads=4).get_files_to_process()
+        assert files == sorted(self.files)
+
+    def test_listing_cache(self):
+        cache_folder = os.path.join(self.tmp, "cache")
+        dal = DataAccessLocal(self.path_dict, listing_cache_ttl=60)
+        dal.listing_cache = ListingCache(ttl=60, cache_folder=cache_folder)
+        files, _, _ = dal.get_files_to_process()
+        assert len(os.listdir(cache_folder)) == 1
+        # new files are not visible until the cached listing expires
+        Path(os.path.join(self.path_dict["input_folder"], "new.parquet")).write_bytes(b"data")
+        assert dal.get_files_to_process()[0] == files
+        dal.listing_cache.ttl = 0
+        assert len(dal.get_files_to_process()[0]) == len(files) + 1
+
+
+class TestProjectedReads:
+    table = pyarrow.Table.from_pydict(
+        {
+            "id": list(range(1000)),
+            "repo": [f"repo{i // 250}" for i in range(1000)],
+            "text": [f"document {i}" for i in range(1000)],
+        }
+    )
+
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path_dict = {
+            "input_folder": os.path.join(self.tmp, "input"),
+            "output_folder": os.path.join(self.tmp, "output"),
+        }
+        os.makedirs(self.path_dict["input_folder"])
+        self.file_path = os.path.join(self.path_dict["input_folder"], "file.parquet")
+        pyarrow.parquet.write_table(self.table, self.file_path, row_group_size=100)
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp)
+
+    def test_projected_table(self):
+        dal = DataAccessLocal(self.path_dict)
+        table, _ = dal.get_table(self.file_path, columns=["text"])
+        assert table == self.table.select(["text"])
+        # filter columns are read, but not returned
+        table, _ = dal.get_table(self.file_path, columns=["text"], filters=[("repo", "==", "repo1")])
+        assert table == self.table.slice(250, 250).select(["text"])
+        # disjunction of conjunctions
+        table, _ = dal.get_table(
+            self.file_path, filters=[[("id", "<", 10)], [("id", ">=", 990), ("repo", "==", "repo3")]]
+        )
+        assert table["id"].to_pylist() == list(range(10)) + list(range(990, 1000))
+
+    def test_row_group_pruning(self):
+        metadata = pyarrow.parquet.read_metadata(self.file_path)
+        row_groups = [metadata.row_group(rg) for rg in range(metadata.num_row_groups)]
+        # repo1 spans rows 250-499, that is row groups 2-4
+        assert [DataAccessLocal._may_match(rg, [("repo", "==", "repo1")]) for rg in row_groups] == [
+            False,
+            False,
+            True,
+            True,
+            True,
+            False,
+            False,
+            False,
+            False,
+            False,
+        ]
+        assert [DataAccessLocal._may_match(rg, [("id", "in", [5, 950])]) for rg in row_groups].count(True) == 2
+        # predicates without statistics based pruning keep all row groups
+        assert all(DataAccessLocal._may_match(rg, [("id", "!=", 5)]) for rg in row_groups)
+        assert all(DataAccessLocal._may_match(rg, [("missing", "==", 5)]) for rg in row_groups)
+
+    def test_projected_work_unit(self):
+        dal = DataAccessLocal(self.path_dict, split_size=1)
+        unit = DataAccessLocal.get_row_group_unit(self.file_path, 2, 4)
+        data, _ = dal.get_work_unit(unit, columns=["id"], filters=[("id", "<", 250)])
+        assert TransformUtils.convert_binary_to_arrow(data) == self.table.slice(200, 50).select(["id"])
+        # files are projected too
+        data, _ = dal.get_work_unit(self.file_path, columns=["id"])
+        assert TransformUtils.convert_binary_to_arrow(data) == self.table.select(["id"])
+
+
+class TestFileStreams:
+    content = b"".join(f'{{"id": {i}, "text": "document {i}"}}\n'.encode() for i in range(1000))
+
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.dal = DataAccessLocal({"input_folder": self.tmp, "output_folder": self.tmp})
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp)
+
+    @pytest.mark.parametrize(
+        "extension, compress", [(".gz", gzip.compress), (".bz2", bz2.compress), (".xz", lzma.compress)]
+    )
+    def test_compressed_files(self, extension, compress):
+        path = os.path.join(self.tmp, f"file.jsonl{extension}")
+        with open(path, "wb") as f:
+            f.write(compress(self.content))
+        data, _ = self.dal.get_file(path)
+        assert data == self.content
+        stream, _ = self.dal.get_file_stream(path)
+        with stream:
+            assert stream.readline() == b'{"id": 0, "text": "document 0"}\n'
+            assert len(stream.readlines()) == 999
+
+    def test_uncompressed_file(self):
+        path = os.path.join(self.tmp, "file.zip")
+        with zipfile.ZipFile(path, "w") as opened_zip:
+            opened_zip.writestr("file.jsonl", self.content)
+        stream, _ = self.dal.get_file_stream(path)
+        # streams of uncompressed files are seekable, so that archives can be read member by member
+        with stream, zipfile.ZipFile(stream) as opened_zip:
+            assert opened_zip.read("file.jsonl") == self.content
+        assert stream.closed
+        assert self.dal.get_file_stream(os.path.join(self.tmp, "missing.zip")) == (None, 0)
@@ -0,0 +1,168 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import multiprocessing
+import os
+import sys
+import uuid
+
+import pyarrow as pa
+from data_processing.data_access import (
+    DataAccessFactory,
+    DataAccessMemory,
+    DataAccessSharedMemory,
+)
+from data_processing.runtime.pure_python import PythonTransformLauncher
+from data_processing.test_support.transform import NOOPPythonTransformConfiguration
+from data_processing.utils import ParamsUtils
+
+
+memory_conf = {
+    "input_folder": "/pipeline/input",
+    "output_folder": "/pipeline/output",
+}
+
+
+def _save_tables(store: str, n_tables: int) -> None:
+    """
+    Save tables to a shared memory store, used by a separate process
+    :param store: store name
+    :param n_tables: number of tables
+    :return: None
+    """
+    d_a = DataAccessSharedMemory(memory_config=memory_conf, store=store)
+    for i in range(n_tables):
+        d_a.save_table(path=f"{d_a.get_input_folder()}/table{i}.parquet", table=pa.table({"id": [i] * 10}))
+
+
+def test_memory():
+    """
+    Testing data access keeping files in the memory of the process
+    :return: None
+    """
+    d_a = DataAccessMemory(memory_config=memory_conf, store=uuid.uuid4().hex)
+    table = pa.table({"id": list(range(100))})
+    for name in ["a.parquet", "dir/b.parquet", "c.txt"]:
+        d_a.save_table(path=f"{d_a.get_input_folder()}{name}", table=table)
+    # files are shared by the data access instances of the store
+    other = DataAccessMemory(memory_config=memory_conf, store=d_a.store)
+    files, profile, _ = other.get_files_to_process()
+    assert files == ["/pipeline/input/a.parquet", "/pipeline/input/dir/b.parquet"]
+    assert profile["total_file_size"] > 0
+    result, _ = other.get_table(path=files[1])
+    assert result == table
+    result, _ = other.get_table(path=files[0], columns=["id"], filters=[("id", "<", 10)])
+    assert result == table.slice(0, 10)
+    # checkpointing skips the files, that were already processed
+    d_a.save_table(path=d_a.get_output_location(files[0]), table=table)
+    d_a.checkpoint = True
+    files, _, _ = d_a.get_files_to_process()
+    assert files == ["/pipeline/input/dir/b.parquet"]
+    # data sets
+    d_a.checkpoint = False
+    d_a.d_sets = ["dir"]
+    files, _, _ = d_a.get_files_to_process()
+    assert files == ["/pipeline/input/dir/b.parquet"]
+    assert DataAccessMemory(memory_config=memory_conf, store=uuid.uuid4().hex).get_files_to_process()[0] == []
+    d_a.clear()
+    assert other.get_file(path="/pipeline/input/a.parquet")[0] is None
+
+
+def test_shared_memory():
+    """
+    Testing data access sharing files across processes using shared memory
+    :return: None
+    """
+    d_a = DataAccessSharedMemory(memory_config=memory_conf, store=uuid.uuid4().hex)
+    try:
+        # tables saved by another process
+        process = multiprocessing.get_context("spawn").Process(
+            target=_save_tables, args=(os.path.basename(d_a.store_folder), 3)
+        )
+        process.start()
+        process.join()
+        files, _, _ = d_a.get_files_to_process()
+        assert len(files) == 3
+        for i, file in enumerate(files):
+            table, _ = d_a.get_table(path=file)
+            assert table == pa.table({"id": [i] * 10})
+        # no temporary files are left
+        assert all(name.endswith(".parquet") for name in os.listdir(d_a.get_input_folder()))
+    finally:
+        d_a.clear()
+    assert not os.path.exists(d_a.store_folder)
+
+
+def test_memory_factory():
+    """
+    Testing creation of the memory data access by the factory and processing of the memory data
+    :return: None
+    """
+    for shared in [False, True]:
+        params = {
+            "data_memory_config": ParamsUtils.convert_to_ast(memory_conf),
+            "data_memory_shared": shared,
+            "runtime_pipeline_id": "pipeline_id",
+            "runtime_job_id": "job_id",
+            "noop_sleep_sec": 0,
+        }
+        daf = DataAccessFactory()
+        assert daf.apply_input_params({"data_memory_config": memory_conf, "data_memory_shared": shared})
+        d_a = daf.create_data_access()
+        assert isinstance(d_a, DataAccessSharedMemory if shared else DataAccessMemory)
+        try:
+            table = pa.table({"id": list(range(100))})
+            d_a.save_table(path=f"{d_a.get_input_folder().rstrip('/')}/test.parquet", table=table)
+            # the launcher creates its own data access instances, that share the data
+            sys.argv = ParamsUtils.dict_to_req(d=params)
+            assert PythonTransformLauncher(NOOPPythonTransformConfiguration()).launch() == 0
+            result, _ = d_a.get_table(path=f"{d_a.get_output_folder().rstrip('/')}/test.parquet")
+            assert result == table
+        finally:
+            d_a.clear()
+    # only one data access configuration is allowed
+    assert not DataAccessFactory().apply_input_params(
+        {"data_memory_config": memory_conf, "data_local_config": memory_conf}
+    )
+
+
+def test_memory_processes():
+    """
+    Testing that the memory data access is rejected by the execution in worker processes, that can not see
+    its files, while the shared memory data access and the threads execution are supported
+    :return: None
+    """
+    for shared, mode, expected in [(False, "processes", 1), (False, "threads", 0), (True, "processes", 0)]:
+        params = {
+            "data_memory_config": ParamsUtils.convert_to_ast(memory_conf),
+            "data_memory_shared": shared,
+            "runtime_num_processors": 2,
+            "runtime_execution_mode": mode,
+            "runtime_pipeline_id": "pipeline_id",
+            "runtime_job_id": "job_id",
+            "noop_sleep_sec": 0,
+        }
+        daf = DataAccessFactory()
+        assert daf.apply_input_params({"data_memory_config": memory_conf, "data_memory_shared": shared})
+        d_a = daf.create_data_access()
+        try:
+            tables = [pa.table({"id": [i] * 10}) for i in range(3)]
+            for i, table in enumerate(tables):
+                d_a.save_table(path=f"{d_a.get_input_folder().rstrip('/')}/test{i}.parquet", table=table)
+            sys.argv = ParamsUtils.dict_to_req(d=params)
+            assert PythonTransformLauncher(NOOPPythonTransformConfiguration()).launch() == expected
+            if expected == 0:
+                for i, table in enumerate(tables):
+                    result, _ = d_a.get_table(path=f"{d_a.get_output_folder().rstrip('/')}/test{i}.parquet")
+                    assert result == table
+        finally:
+            d_a.clear()
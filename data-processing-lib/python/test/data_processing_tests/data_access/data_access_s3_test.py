@@ -10,9 +10,19 @@
 # limitations under the License.
 ################################################################################
 
+import bz2
+import gzip
+import io
+import lzma
 import os
+import tempfile
+import zipfile
 
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
 from data_processing.data_access import DataAccessS3
+from data_processing.utils import MB, TransformUtils
 from moto import mock_aws
 
 
@@ -137,3 +147,246 @@ def test_files_to_process():
         assert 0.034458160400390625 == profile["max_file_size"]
         assert 0.034458160400390625 == profile["min_file_size"]
         assert 0.06891632080078125 == profile["total_file_size"]
+
+
+def test_row_group_units():
+    """
+    Testing splitting of files into row group work units and their ranged reads
+    :return: None
+    """
+    with mock_aws():
+        # create data access
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf, split_size=1)
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        table = pa.Table.from_pydict({"id": list(range(1000))})
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, row_group_size=250)
+        d_a.save_file(path=f"{s3_conf['input_folder']}large.parquet", data=bytes(sink.getvalue()))
+        # every row group is a work unit
+        files, _, _ = d_a.get_files_to_process()
+        assert 4 == len(files)
+        data, _ = d_a.get_work_unit(files[2])
+        assert TransformUtils.convert_binary_to_arrow(data) == table.slice(500, 250)
+        # checkpointing skips the units with existing outputs
+        d_a.checkpoint = True
+        d_a.save_file(path=f"{s3_conf['output_folder']}large_rg2-3.parquet", data=data)
+        files, _, _ = d_a.get_files_to_process()
+        assert [d_a.parse_work_unit(f)[1] for f in files] == [(0, 1), (1, 2), (3, 4)]
+
+
+def test_parallel_listing():
+    """
+    Testing listing of the sub folders in parallel
+    :return: None
+    """
+    with mock_aws():
+        # create data access
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf, listing_threads=4)
+        # populate bucket
+        for d_set in ["d1", "d2/d3", "d4"]:
+            _create_and_populate_bucket(
+                d_a=d_a, input_location=f"{s3_conf['input_folder']}dataset={d_set}/", n_files=3
+            )
+        files, _ = d_a.arrS3.list_files(key=s3_conf["input_folder"], threads=4)
+        assert 9 == len(files)
+        # parallel listing returns the same (sorted) files as the sequential one
+        parallel_files, _, _ = d_a.get_files_to_process()
+        d_a.listing_threads = 1
+        files, _, _ = d_a.get_files_to_process()
+        assert parallel_files == files
+        assert files == sorted(f["name"] for f in d_a.arrS3.list_files(key=s3_conf["input_folder"])[0])
+        # etags are recorded
+        assert all(d_a.file_versions[f] is not None for f in files)
+        # listing failing part way fails as a whole, instead of returning the files listed before the error
+        iterate_files = d_a.arrS3.iterate_files
+
+        def _failing_iterate_files(key: str, threads: int):
+            for page in iterate_files(key=key, threads=threads):
+                yield page
+                raise OSError("listing failed")
+
+        d_a.arrS3.iterate_files = _failing_iterate_files
+        with pytest.raises(OSError):
+            d_a.get_files_to_process()
+        # listing cache keys include the endpoint
+        other = DataAccessS3(s3_credentials=s3_cred | {"url": "http://localhost:9000"}, s3_config=s3_conf)
+        assert d_a._get_listing_cache_key("test/") != other._get_listing_cache_key("test/")
+
+
+def test_multipart_transfers():
+    """
+    Testing concurrent ranged reads and multipart uploads
+    :return: None
+    """
+    with mock_aws():
+        # create data access, transferring files larger than 5MB (minimal upload part size) in parts
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf)
+        d_a.arrS3.part_size = d_a.arrS3.multipart_threshold = 5 * MB
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        data = os.urandom(12 * MB + 1)
+        res, _ = d_a.save_file(path=f"{s3_conf['output_folder']}large.bin", data=data)
+        # multipart upload etags end with the number of parts
+        assert res["ETag"].endswith('-3"')
+        read, _ = d_a.get_file(path=f"{s3_conf['output_folder']}large.bin")
+        assert read == data
+        # small and empty files take a single request
+        for small in [b"", b"small"]:
+            d_a.save_file(path=f"{s3_conf['output_folder']}small.bin", data=small)
+            assert d_a.get_file(path=f"{s3_conf['output_folder']}small.bin")[0] == small
+        # tables are read from the transfer buffer
+        table = pa.Table.from_pydict({"data": [os.urandom(1024) for _ in range(6 * 1024)]})
+        size, _, _ = d_a.save_table(path=f"{s3_conf['output_folder']}large.parquet", table=table)
+        assert size > 5 * MB
+        assert d_a.get_table(path=f"{s3_conf['output_folder']}large.parquet")[0] == table
+
+
+def test_projected_table():
+    """
+    Testing reads of a subset of columns and row groups using ranged GETs
+    :return: None
+    """
+    with mock_aws():
+        # create data access
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf)
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        table = pa.Table.from_pydict({"id": list(range(1000)), "data": [os.urandom(1000) for _ in range(1000)]})
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, row_group_size=250)
+        data = bytes(sink.getvalue())
+        path = f"{s3_conf['input_folder']}table.parquet"
+        d_a.save_file(path=path, data=data)
+        # count the bytes read by ranged GETs
+        read_bytes = []
+        read_file_range = d_a.arrS3.read_file_range
+
+        def counting_read_file_range(**kwargs):
+            res = read_file_range(**kwargs)
+            read_bytes.append(len(res[0]))
+            return res
+
+        d_a.arrS3.read_file_range = counting_read_file_range
+        projected, _ = d_a.get_table(path=path, columns=["id"], filters=[("id", ">=", 900)])
+        assert projected == table.slice(900, 100).select(["id"])
+        # neither the data column, nor the other row groups are read
+        assert sum(read_bytes) < len(data) / 10
+        # reads of modified or removed files are not retried
+        info, _ = d_a.arrS3.get_file_info(key=path)
+        d_a.save_file(path=path, data=data[:100])
+        assert read_file_range(key=path, offset=0, length=10, etag=info["etag"]) == (None, 0)
+        d_a.arrS3.delete_file(key=path)
+        assert read_file_range(key=path, offset=0, length=10) == (None, 0)
+
+
+def test_read_cache():
+    """
+    Testing reads through the local read cache
+    :return: None
+    """
+    with mock_aws(), tempfile.TemporaryDirectory() as cache_folder:
+        # create data access
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf, cache_folder=cache_folder, cache_size=MB)
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        table = pa.Table.from_pydict({"id": list(range(100))})
+        path = f"{s3_conf['input_folder']}table.parquet"
+        d_a.save_table(path=path, table=table)
+        # the first read misses the cache, the following reads hit it
+        for _ in range(3):
+            result, _ = d_a.get_table(path=path)
+            assert result == table
+        stats = d_a.collect_stats()
+        assert stats["data access cache misses"] == 1
+        assert stats["data access cache hits"] == 2
+        assert stats["data access cache hit bytes"] > 0
+        # statistics are reset by their collection
+        assert d_a.collect_stats() == {}
+        # a modified file (with a new etag) is read from S3
+        d_a.save_table(path=path, table=table.slice(0, 10))
+        result, _ = d_a.get_table(path=path)
+        assert result == table.slice(0, 10)
+        assert d_a.collect_stats() == {"data access cache misses": 1}
+        # cached parquet files are opened locally
+        parquet_file, _ = d_a.get_parquet_file(path=path)
+        assert parquet_file.read() == table.slice(0, 10)
+        assert d_a.collect_stats()["data access cache hits"] == 1
+        # the least recently used files are evicted, once the cache grows above its maximum size
+        data = os.urandom(MB // 20)
+        for i in range(30):
+            d_a.save_file(path=f"{s3_conf['input_folder']}file{i}.bin", data=data)
+            file_data, _ = d_a.get_file(path=f"{s3_conf['input_folder']}file{i}.bin")
+            assert file_data == data
+        cached = [os.path.join(root, name) for root, _, names in os.walk(cache_folder) for name in names]
+        assert sum(os.path.getsize(name) for name in cached) <= MB
+        file_data, _ = d_a.get_file(path=f"{s3_conf['input_folder']}file29.bin")
+        assert file_data == data
+        assert d_a.collect_stats()["data access cache hits"] == 1
+        # streamed files are downloaded through the cache, and read locally once they are cached
+        content = b"".join(f"line {i}\n".encode() for i in range(1000))
+        path = f"{s3_conf['input_folder']}file.txt.gz"
+        d_a.save_file(path=path, data=gzip.compress(content))
+        for _ in range(2):
+            stream, _ = d_a.get_file_stream(path=path)
+            with stream:
+                assert stream.read() == content
+        assert d_a.collect_stats() == {
+            "data access cache misses": 1,
+            "data access cache hits": 1,
+            "data access cache hit bytes": len(gzip.compress(content)),
+        }
+        # files too large for the cache are streamed from S3
+        large_path = f"{s3_conf['input_folder']}large.bin"
+        d_a.save_file(path=large_path, data=os.urandom(MB // 5))
+        stream, _ = d_a.get_file_stream(path=large_path)
+        with stream:
+            assert len(stream.read()) == MB // 5
+        assert d_a.collect_stats() == {}
+
+
+def test_file_streams():
+    """
+    Testing reads of files as streams, decompressing them incrementally
+    :return: None
+    """
+    with mock_aws():
+        # create data access, with small parts, so that the files are read with multiple ranged GETs
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf)
+        d_a.arrS3.part_size = 1024
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        content = b"".join(f"line {i}\n".encode() for i in range(10000))
+        for extension, compress in [(".gz", gzip.compress), (".bz2", bz2.compress), (".xz", lzma.compress)]:
+            path = f"{s3_conf['input_folder']}file.txt{extension}"
+            d_a.save_file(path=path, data=compress(content))
+            assert d_a.get_file(path=path)[0] == content
+            stream, _ = d_a.get_file_stream(path=path)
+            with stream:
+                assert stream.readline() == b"line 0\n"
+                assert stream.read() == content[len(b"line 0\n") :]
+        # streams of uncompressed files are seekable
+        zip_data = io.BytesIO()
+        with zipfile.ZipFile(zip_data, "w") as opened_zip:
+            opened_zip.writestr("file.txt", content)
+        path = f"{s3_conf['input_folder']}file.zip"
+        d_a.save_file(path=path, data=zip_data.getvalue())
+        stream, _ = d_a.get_file_stream(path=path)
+        with stream, zipfile.ZipFile(stream) as opened_zip:
+            assert opened_zip.read("file.txt") == content
+        assert d_a.get_file_stream(path=f"{s3_conf['input_folder']}missing.zip")[0] is None
+
+
+def test_zstd_file_streams():
+    """
+    Testing reads of zstd compressed files as streams
+    :return: None
+    """
+    zstandard = pytest.importorskip("zstandard")
+    with mock_aws():
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf)
+        d_a.arrS3.part_size = 1024
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        content = b"".join(f"line {i}\n".encode() for i in range(10000))
+        path = f"{s3_conf['input_folder']}file.txt.zst"
+        d_a.save_file(path=path, data=zstandard.ZstdCompressor().compress(content))
+        assert d_a.get_file(path=path)[0] == content
+        stream, _ = d_a.get_file_stream(path=path)
+        with stream:
+            assert stream.readline() == b"line 0\n"
+            assert stream.read() == content[len(b"line 0\n") :]
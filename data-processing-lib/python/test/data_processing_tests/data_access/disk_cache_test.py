@@ -0,0 +1,99 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from data_processing.data_access.disk_cache import EVICTION_LOCK_FILE, DiskCache
+from data_processing.utils import KB
+
+
+def _fill(cache: DiskCache, n_entries: int) -> None:
+    """
+    Fill cache with entries of 1KB, without triggering eviction
+    :param cache: cache
+    :param n_entries: number of entries
+    :return: None
+    """
+    for i in range(n_entries):
+        path = cache._get_entry_path(DiskCache.get_key(path=f"file{i}", version="1"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(os.urandom(KB))
+
+
+def _size(cache: DiskCache) -> int:
+    """
+    Get size of the cache entries
+    :param cache: cache
+    :return: size
+    """
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(cache.folder)
+        for name in names
+        if name != EVICTION_LOCK_FILE
+    )
+
+
+def test_eviction():
+    with tempfile.TemporaryDirectory() as folder:
+        cache = DiskCache(folder=folder, max_size=100 * KB)
+        _fill(cache=cache, n_entries=50)
+        assert _size(cache) == 50 * KB
+        # eviction is skipped below the maximum size
+        cache.evict()
+        assert _size(cache) == 50 * KB
+        _fill(cache=cache, n_entries=120)
+        cache.evict()
+        assert _size(cache) <= 90 * KB
+
+
+def test_eviction_lock():
+    with tempfile.TemporaryDirectory() as folder:
+        cache = DiskCache(folder=folder, max_size=100 * KB)
+        _fill(cache=cache, n_entries=120)
+        # another thread of the process is evicting, eviction is skipped
+        cache.eviction_lock.acquire()
+        cache.evict()
+        cache.eviction_lock.release()
+        assert _size(cache) == 120 * KB
+        # another process is evicting, eviction is skipped without waiting
+        holder = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import fcntl, os, sys, time\n"
+                f"fd = os.open({os.path.join(folder, EVICTION_LOCK_FILE)!r}, os.O_RDWR | os.O_CREAT)\n"
+                "fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+                "print('locked', flush=True)\n"
+                "sys.stdin.readline()\n",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert holder.stdout.readline().strip() == "locked"
+            start = time.time()
+            cache.evict()
+            assert time.time() - start < 0.5
+            assert _size(cache) == 120 * KB
+        finally:
+            holder.communicate(input="\n")
+        # the lock is released
+        cache.evict()
+        assert _size(cache) <= 90 * KB
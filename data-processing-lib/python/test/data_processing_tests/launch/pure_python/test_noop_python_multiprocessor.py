@@ -34,4 +34,9 @@ class TestPythonNOOPTransform(AbstractTransformLauncherTest):
             launcher,
             {"noop_sleep_sec": 0, "runtime_num_processors": 2},
             basedir + "/input", basedir + "/expected"))
+        for execution_mode in ["processes", "threads"]:
+            fixtures.append((
+                launcher,
+                {"noop_sleep_sec": 0, "runtime_num_processors": 2, "runtime_execution_mode": execution_mode},
+                basedir + "/input", basedir + "/expected"))
         return fixtures
@@ -0,0 +1,71 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import uuid
+from typing import Any
+
+import pytest
+from data_processing.data_access import DataAccessFactory, DataAccessMemory
+from data_processing.runtime.pure_python import PythonTransformFileProcessor
+from data_processing.transform import AbstractBinaryTransform, TransformStatistics
+
+
+class SplitTransform(AbstractBinaryTransform):
+    """
+    Transform splitting every input into 4 outputs
+    """
+
+    def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        return [(byte_array, ".txt") for _ in range(4)], {}
+
+
+class FailingDataAccess(DataAccessMemory):
+    """
+    Memory data access failing the write of the first output
+    """
+
+    def __init__(self, memory_config: dict[str, str], store: str):
+        super().__init__(memory_config=memory_config, store=store)
+        self.writes = []
+
+    def save_file(self, path: str, data: bytes) -> tuple[dict[str, Any], int]:
+        self.writes.append(path)
+        if path.endswith("_0.txt"):
+            return None, 0
+        return super().save_file(path=path, data=data)
+
+
+@pytest.mark.parametrize("write_behind", [0, 1])
+def test_failed_write(write_behind: int):
+    memory_conf = {"input_folder": "/split/input", "output_folder": "/split/output"}
+    daf = DataAccessFactory()
+    d_a = FailingDataAccess(memory_config=memory_conf, store=uuid.uuid4().hex)
+    daf.create_data_access = lambda: d_a
+    d_a.save_file(path="/split/input/file.txt", data=b"content")
+    d_a.files_to_use = [".txt"]
+    files, _, _ = d_a.get_files_to_process()
+    d_a.writes = []
+    statistics = TransformStatistics()
+    processor = PythonTransformFileProcessor(
+        data_access_factory=daf,
+        statistics=statistics,
+        transform_params={},
+        transform_class=SplitTransform,
+        is_folder=False,
+        write_behind=write_behind,
+    )
+    processor.process_file(f_name=files[0])
+    processor.flush()
+    # the remaining outputs are not written once the write of the first one failed
+    assert d_a.writes == ["/split/output/file_0.txt"]
+    assert statistics.get_execution_stats()["failed_writes"] == 1
+    d_a.clear()
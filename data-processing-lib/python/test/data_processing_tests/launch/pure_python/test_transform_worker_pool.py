@@ -0,0 +1,68 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+import tempfile
+
+import pytest
+from data_processing.data_access import DataAccessFactory, DataAccessLocal
+from data_processing.runtime.pure_python import (
+    PythonTransformExecutionConfiguration,
+    PythonTransformWorkerPool,
+)
+from data_processing.test_support.transform.noop_transform import NOOPTransform
+from data_processing.transform import AbstractTableTransform
+
+
+@pytest.mark.parametrize(
+    "use_threads,read_ahead,write_behind", [(False, 0, 0), (True, 0, 0), (False, 1, 2), (True, 1, 2)]
+)
+def test_worker_pool(use_threads: bool, read_ahead: int, write_behind: int):
+    basedir = "../../../../test-data/data_processing/python/noop/"
+    basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), basedir))
+    with tempfile.TemporaryDirectory() as output_folder:
+        config = {"input_folder": basedir + "/input", "output_folder": output_folder}
+        data_access_factory = DataAccessFactory()
+        data_access_factory.apply_input_params({"data_local_config": config})
+        data_access = DataAccessLocal(config)
+        files, _, _ = data_access.get_files_to_process()
+        sizes = data_access.get_file_sizes(files)
+        assert len(files) == 3 and all(size > 0 for size in sizes)
+        pool = PythonTransformWorkerPool(
+            size=2,
+            data_access_factory=data_access_factory,
+            transform_params={"sleep_sec": 0},
+            transform_class=NOOPTransform,
+            is_folder=False,
+            use_threads=use_threads,
+            read_ahead=read_ahead,
+            write_behind=write_behind,
+        )
+        results = list(pool.process_files(files=files, sizes=sizes))
+        # every file is processed once, and every worker is flushed exactly once, when no files are left
+        assert sorted(flushed for flushed, _ in results) == [False] * 3 + [True] * 2
+        assert sum(stats.get("source_files", 0) for _, stats in results) == 3
+        assert sum(stats.get("source_size", 0) for _, stats in results) == sum(sizes)
+        assert len(os.listdir(output_folder)) == 3
+
+
+def test_execution_mode():
+    config = PythonTransformExecutionConfiguration(name="noop")
+    config.num_processors = 2
+    # thread safe transforms run in threads in the auto mode, unless processes are requested explicitly
+    assert config.get_execution_mode(NOOPTransform) == "threads"
+    assert config.get_execution_mode(AbstractTableTransform) == "processes"
+    config.execution_mode = "processes"
+    assert config.get_execution_mode(NOOPTransform) == "processes"
+    config.execution_mode = "auto"
+    config.num_processors = 0
+    assert config.get_execution_mode(NOOPTransform) == "sequential"
@@ -0,0 +1,103 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+from data_processing.transform import (
+    AbstractTableTransform,
+    PipelineTransform,
+    pipeline_transforms_key,
+)
+from data_processing.utils import UnrecoverableException
+
+
+class MinValueTransform(AbstractTableTransform):
+    """
+    Removes rows with value below a given minimum
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        super().__init__(config)
+        self.streamable = True
+        self.min_value = config.get("min_value", 0)
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        result = table.filter(pc.greater_equal(table["value"], self.min_value))
+        return [result], {"removed": table.num_rows - result.num_rows}
+
+
+class BufferingTransform(AbstractTableTransform):
+    """
+    Buffers all of the tables until flush, doubling the values
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        super().__init__(config)
+        self.buffer = []
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        self.buffer.append(table.set_column(0, "value", pc.multiply(table["value"], 2)))
+        return [], {"buffered": table.num_rows}
+
+    def flush(self) -> tuple[list[pa.Table], dict[str, Any]]:
+        tables = [pa.concat_tables(self.buffer)] if len(self.buffer) > 0 else []
+        self.buffer = []
+        return tables, {"flushed": sum(table.num_rows for table in tables)}
+
+
+def _get_table(values: list[int]) -> pa.Table:
+    return pa.Table.from_pydict({"value": pa.array(values)})
+
+
+def test_pipeline_chains_transforms():
+    transform = PipelineTransform(
+        {
+            pipeline_transforms_key: [
+                (MinValueTransform, {"min_value": 2}),
+                (MinValueTransform, {"min_value": 4}),
+            ]
+        }
+    )
+    assert transform.streamable
+    tables, stats = transform.transform(_get_table([1, 2, 3, 4, 5]))
+    assert len(tables) == 1
+    assert tables[0]["value"].to_pylist() == [4, 5]
+    assert stats == {"removed": 3}
+
+
+def test_pipeline_flush_propagates():
+    transform = PipelineTransform(
+        {
+            pipeline_transforms_key: [
+                (BufferingTransform, {}),
+                (MinValueTransform, {"min_value": 5}),
+            ]
+        }
+    )
+    assert not transform.streamable
+    tables, stats = transform.transform(_get_table([1, 2, 3]))
+    assert tables == []
+    assert stats == {"buffered": 3}
+    tables, stats = transform.flush()
+    assert len(tables) == 1
+    assert tables[0]["value"].to_pylist() == [6]
+    assert stats == {"flushed": 3, "removed": 2}
+
+
+def test_pipeline_validation():
+    with pytest.raises(UnrecoverableException):
+        PipelineTransform({pipeline_transforms_key: []})
+    with pytest.raises(UnrecoverableException):
+        PipelineTransform({pipeline_transforms_key: [(dict, {})]})
@@ -0,0 +1,69 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import gzip
+import json
+import uuid
+from typing import Any, BinaryIO
+
+import pyarrow as pa
+from data_processing.data_access import DataAccessFactory, DataAccessMemory
+from data_processing.runtime.pure_python import PythonTransformFileProcessor
+from data_processing.transform import AbstractBinaryTransform, TransformStatistics
+from data_processing.utils import TransformUtils
+
+
+class JsonlToParquetTransform(AbstractBinaryTransform):
+    """
+    Simple transform, converting JSON lines files to parquet, consuming its input line by line
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        super().__init__(config)
+        self.streams = 0
+
+    def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        raise ValueError("inputs are expected to be streamed")
+
+    def transform_stream(self, file_name: str, stream: BinaryIO) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        self.streams += 1
+        table = pa.Table.from_pylist([json.loads(line) for line in stream])
+        return [(TransformUtils.convert_arrow_to_binary(table), ".parquet")], {"rows": table.num_rows}
+
+
+def test_stream_transform():
+    memory_conf = {"input_folder": "/stream/input", "output_folder": "/stream/output"}
+    rows = [{"id": i, "text": f"document {i}"} for i in range(100)]
+    content = "".join(f"{json.dumps(row)}\n" for row in rows).encode()
+    daf = DataAccessFactory()
+    store = uuid.uuid4().hex
+    daf.create_data_access = lambda: DataAccessMemory(memory_config=memory_conf, store=store)
+    d_a = daf.create_data_access()
+    d_a.save_file(path="/stream/input/file.jsonl.gz", data=gzip.compress(content))
+    d_a.files_to_use = [".gz"]
+    files, _, _ = d_a.get_files_to_process()
+    statistics = TransformStatistics()
+    processor = PythonTransformFileProcessor(
+        data_access_factory=daf,
+        statistics=statistics,
+        transform_params={},
+        transform_class=JsonlToParquetTransform,
+        is_folder=False,
+    )
+    processor.process_file(f_name=files[0])
+    assert processor.transform.streams == 1
+    stats = statistics.get_execution_stats()
+    assert stats["rows"] == 100
+    assert stats["source_size"] == len(gzip.compress(content))
+    table, _ = d_a.get_table(path="/stream/output/file.jsonl.parquet")
+    assert table.to_pylist() == rows
+    d_a.clear()
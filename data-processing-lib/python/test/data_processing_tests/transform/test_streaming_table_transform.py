@@ -0,0 +1,115 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from data_processing.transform import AbstractTableTransform
+from data_processing.utils import TransformUtils
+
+
+class AgeFilterTransform(AbstractTableTransform):
+    """
+    Simple row-local transform, removing rows with age below a given value
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        super().__init__(config)
+        self.streamable = config.get("streamable", False)
+        self.min_age = config.get("min_age", 0)
+        self.calls = 0
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        self.calls += 1
+        result = table.filter(pc.greater_equal(table["age"], self.min_age))
+        return [result], {"removed": table.num_rows - result.num_rows}
+
+
+def _get_input(n_rows: int, row_group_size: int) -> bytes:
+    table = pa.Table.from_pydict(
+        {"name": pa.array([f"name_{i}" for i in range(n_rows)]), "age": pa.array(list(range(n_rows)))}
+    )
+    writer = pa.BufferOutputStream()
+    pq.write_table(table=table, where=writer, row_group_size=row_group_size)
+    return bytes(writer.getvalue())
+
+
+def test_streaming_matches_table_mode():
+    data = _get_input(n_rows=10, row_group_size=3)
+    table_transform = AgeFilterTransform({"min_age": 5})
+    stream_transform = AgeFilterTransform({"min_age": 5, "streamable": True})
+    expected_files, expected_stats = table_transform.transform_binary(file_name="test.parquet", byte_array=data)
+    files, stats = stream_transform.transform_binary(file_name="test.parquet", byte_array=data)
+    # every row group is processed separately
+    assert table_transform.calls == 1
+    assert stream_transform.calls == 4
+    assert stats == expected_stats
+    assert stats == {"removed": 5, "source_doc_count": 10, "result_doc_count": 5}
+    assert len(files) == 1
+    assert files[0][1] == ".parquet"
+    expected = TransformUtils.convert_binary_to_arrow(expected_files[0][0])
+    result = TransformUtils.convert_binary_to_arrow(files[0][0])
+    assert result.equals(expected)
+
+
+def test_streaming_all_rows_removed():
+    data = _get_input(n_rows=10, row_group_size=4)
+    files, stats = AgeFilterTransform({"min_age": 100, "streamable": True}).transform_binary(
+        file_name="test.parquet", byte_array=data
+    )
+    assert stats == {"removed": 10, "source_doc_count": 10, "result_doc_count": 0}
+    assert len(files) == 1
+    assert TransformUtils.convert_binary_to_arrow(files[0][0]).num_rows == 0
+
+
+def test_streaming_wrong_file_type():
+    files, stats = AgeFilterTransform({"streamable": True}).transform_binary(file_name="test.jsonl", byte_array=b"{}")
+    assert files == []
+    assert stats == {"wrong file type": 1}
+
+
+class MatchColumnTransform(AbstractTableTransform):
+    """
+    Streamable transform adding a column of the names of the matching rows, which is null typed for tables
+    without a match, or a struct column of the ages of the rows, for the tables starting with a given age
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        super().__init__(config)
+        self.streamable = True
+        self.age_start = config.get("age_start", None)
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        if table["age"][0].as_py() == self.age_start:
+            return [table.append_column("match", pa.array([{"age": age} for age in table["age"].to_pylist()]))], {}
+        names = [
+            name if age % 4 == 3 else None for name, age in zip(table["name"].to_pylist(), table["age"].to_pylist())
+        ]
+        column = pa.nulls(table.num_rows) if all(name is None for name in names) else pa.array(names)
+        return [table.append_column("match", column)], {}
+
+
+def test_streaming_schema_unification():
+    # the first row group results in a null typed column, the written row groups are rewritten as strings
+    data = _get_input(n_rows=10, row_group_size=3)
+    files, stats = MatchColumnTransform({}).transform_binary(file_name="test.parquet", byte_array=data)
+    assert stats == {"source_doc_count": 10, "result_doc_count": 10}
+    result = TransformUtils.convert_binary_to_arrow(files[0][0])
+    assert result.schema.field("match").type == pa.string()
+    assert result["match"].to_pylist() == [None, None, None, "name_3", None, None, None, "name_7", None, None]
+    # results with incompatible schemas (strings and structures) are processed as a whole table
+    transform = MatchColumnTransform({"age_start": 6})
+    files, stats = transform.transform_binary(file_name="test.parquet", byte_array=data)
+    assert stats == {"source_doc_count": 10, "result_doc_count": 10}
+    assert TransformUtils.convert_binary_to_arrow(files[0][0])["match"].to_pylist() == result["match"].to_pylist()
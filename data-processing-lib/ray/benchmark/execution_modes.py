@@ -0,0 +1,145 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""
+Benchmark comparing the Ray execution modes (files and dataset) on a synthetic data set, using the
+noop and filter (if dpk_filter is installed) transforms. Usage:
+    python execution_modes.py --files 64 --rows 20000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.utils import ParamsUtils
+from data_processing_ray.runtime.ray import (
+    RayTransformLauncher,
+    RayTransformRuntimeConfiguration,
+)
+from data_processing_ray.test_support.transform import NOOPRayTransformConfiguration
+
+
+def create_data(folder: str, n_files: int, n_rows: int) -> None:
+    """
+    Create synthetic data set
+    :param folder: output folder
+    :param n_files: number of files
+    :param n_rows: number of rows per file
+    :return: None
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(42)
+    words = np.array(["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"])
+    for i in range(n_files):
+        contents = [" ".join(rng.choice(words, size=n)) for n in rng.integers(10, 300, size=n_rows)]
+        table = pa.table(
+            {
+                "document_id": [f"{i}_{j}" for j in range(n_rows)],
+                "contents": contents,
+                "docq_total_words": [len(c.split(" ")) for c in contents],
+                "ibmkenlm_docq_perplex_score": rng.uniform(0, 500, size=n_rows),
+            }
+        )
+        pq.write_table(table, os.path.join(folder, f"data_{i:05d}.parquet"))
+
+
+def get_transforms() -> dict[str, tuple]:
+    """
+    Get transforms to benchmark
+    :return: dictionary of transform name to (configuration, transform parameters)
+    """
+    transforms = {"noop": (NOOPRayTransformConfiguration(), {"noop_sleep_sec": 0})}
+    try:
+        from dpk_filter.ray.transform import FilterRayTransformConfiguration
+        from dpk_filter.transform import (
+            filter_criteria_cli_param,
+            filter_logical_operator_cli_param,
+        )
+
+        transforms["filter"] = (
+            FilterRayTransformConfiguration(),
+            {
+                filter_criteria_cli_param: ["docq_total_words > 100", "ibmkenlm_docq_perplex_score < 230"],
+                filter_logical_operator_cli_param: "AND",
+            },
+        )
+    except ImportError:
+        print("dpk_filter is not installed, skipping filter")
+    return transforms
+
+
+def run(
+    configuration: RayTransformRuntimeConfiguration,
+    transform_params: dict[str, Any],
+    mode: str,
+    input_folder: str,
+    output_folder: str,
+    workers: int,
+) -> float:
+    """
+    Run a transform
+    :param configuration: transform configuration
+    :param transform_params: transform parameters
+    :param mode: execution mode
+    :param input_folder: input folder
+    :param output_folder: output folder
+    :param workers: number of workers
+    :return: execution time (sec) reported in the job metadata
+    """
+    params = {
+        "run_locally": True,
+        "data_local_config": ParamsUtils.convert_to_ast(
+            {"input_folder": input_folder, "output_folder": output_folder}
+        ),
+        "runtime_worker_options": ParamsUtils.convert_to_ast({"num_cpus": 0.8}),
+        "runtime_num_workers": workers,
+        "runtime_execution_mode": mode,
+    } | transform_params
+    sys.argv = ParamsUtils.dict_to_req(d=params)
+    if RayTransformLauncher(configuration).launch() != 0:
+        raise RuntimeError(f"execution in {mode} mode failed")
+    with open(os.path.join(output_folder, "metadata.json"), "r") as fp:
+        return json.load(fp)["execution_stats"]["execution time, min"] * 60
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ray execution modes benchmark")
+    parser.add_argument("--files", type=int, default=64, help="number of input files")
+    parser.add_argument("--rows", type=int, default=20000, help="number of rows per file")
+    parser.add_argument("--workers", type=int, default=4, help="number of workers")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_folder = os.path.join(tmp, "input")
+        create_data(folder=input_folder, n_files=args.files, n_rows=args.rows)
+        results = []
+        for name, (configuration, transform_params) in get_transforms().items():
+            for mode in ["files", "dataset"]:
+                start = time.time()
+                execution = run(
+                    configuration=configuration,
+                    transform_params=transform_params,
+                    mode=mode,
+                    input_folder=input_folder,
+                    output_folder=os.path.join(tmp, f"{name}_{mode}"),
+                    workers=args.workers,
+                )
+                results.append((name, mode, execution, time.time() - start))
+    print(f"{'transform':<10} {'mode':<8} {'execution, sec':>15} {'total, sec':>11}")
+    for name, mode, execution, total in results:
+        print(f"{name:<10} {mode:<8} {execution:>15.2f} {total:>11.2f}")
@@ -1,9 +1,18 @@
-from data_processing_ray.runtime.ray.ray_utils import RayUtils
-from data_processing_ray.runtime.ray.transform_statistics import TransformStatisticsRay
+from data_processing_ray.runtime.ray.ray_utils import RayFileScheduler, RayUtils
+from data_processing_ray.runtime.ray.transform_statistics import (
+    StatisticsAccumulator,
+    TransformStatisticsAggregatorRay,
+    TransformStatisticsRay,
+)
 from data_processing_ray.runtime.ray.transform_runtime import DefaultRayTransformRuntime
 from data_processing_ray.runtime.ray.runtime_configuration import RayTransformRuntimeConfiguration
+from data_processing_ray.runtime.ray.pipeline_transform_runtime import (
+    RayPipelineTransformRuntime,
+    RayPipelineTransformRuntimeConfiguration,
+)
 from data_processing_ray.runtime.ray.transform_file_processor import RayTransformFileProcessor
 from data_processing_ray.runtime.ray.execution_configuration import RayTransformExecutionConfiguration
 from data_processing_ray.runtime.ray.transform_orchestrator import orchestrate
+from data_processing_ray.runtime.ray.dataset_orchestrator import RayDatasetTransformMapper, orchestrate_dataset
 from data_processing_ray.runtime.ray.transform_launcher import RayTransformLauncher
 from data_processing_ray.runtime.ray.transform_invoker import execute_ray_transform
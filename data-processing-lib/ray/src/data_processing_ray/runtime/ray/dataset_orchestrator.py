@@ -0,0 +1,222 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Iterator
+
+import pyarrow as pa
+import ray
+from data_processing.data_access import DataAccess, DataAccessFactoryBase, DataAccessS3
+from data_processing.transform import AbstractTableTransform
+from data_processing.utils import UnrecoverableException
+from data_processing_ray.runtime.ray import (
+    RayTransformExecutionConfiguration,
+    RayTransformRuntimeConfiguration,
+    RayUtils,
+    TransformStatisticsRay,
+)
+from ray.actor import ActorHandle
+
+
+class RayDatasetTransformMapper:
+    """
+    Callable class applying a table transform to the batches of a Ray dataset. Ray Data creates an instance
+    of it in every actor of its actor pool, so the transform is created once per actor
+    """
+
+    def __init__(
+        self,
+        data_access_factory: DataAccessFactoryBase,
+        transform_class: type[AbstractTableTransform],
+        transform_params: dict[str, Any],
+        statistics: ActorHandle,
+    ):
+        """
+        Init method
+        :param data_access_factory: data access factory
+        :param transform_class: table transform class
+        :param transform_params: transform parameters
+        :param statistics: statistics actor
+        """
+        self.validate_transform(transform_class)
+        self.statistics = statistics
+        transform_params = dict(transform_params)
+        transform_params["data_access"] = data_access_factory.create_data_access()
+        transform_params["statistics"] = statistics
+        self.transform = transform_class(transform_params)
+
+    @staticmethod
+    def validate_transform(transform_class: type) -> None:
+        """
+        Check that a transform can be executed by the mapper. It has to be a table transform, that does not buffer
+        data until flush (for example, coalesce or resize), as Ray Data provides no end of stream hook to flush
+        the transforms of its actor pool, so their buffered data would be lost
+        :param transform_class: transform class
+        :return: None
+        """
+        if not issubclass(transform_class, AbstractTableTransform):
+            raise UnrecoverableException(f"dataset execution requires a table transform, got {transform_class}")
+        if (
+            transform_class.flush is not AbstractTableTransform.flush
+            or transform_class.flush_binary is not AbstractTableTransform.flush_binary
+        ):
+            raise UnrecoverableException(
+                f"dataset execution does not support transforms buffering data until flush, got {transform_class}"
+            )
+
+    def __call__(self, table: pa.Table) -> Iterator[pa.Table]:
+        """
+        Transform a batch
+        :param table: batch
+        :return: iterator of the transformed tables
+        """
+        if table.num_rows == 0:
+            return
+        t_start = time.time()
+        out_tables, stats = self.transform.transform(table=table)
+        self.statistics.add_stats.remote(
+            stats
+            | {
+                "source_doc_count": table.num_rows,
+                "result_doc_count": sum(out_table.num_rows for out_table in out_tables),
+                "processing_time": time.time() - t_start,
+            }
+        )
+        yield from out_tables
+
+
+def _get_filesystem(data_access: DataAccess, data_access_factory: DataAccessFactoryBase) -> Any:
+    """
+    Get pyarrow file system for Ray Data to access the data
+    :param data_access: data access
+    :param data_access_factory: data access factory
+    :return: file system, None for local data
+    """
+    if not isinstance(data_access, DataAccessS3):
+        return None
+    from pyarrow.fs import S3FileSystem
+
+    credentials = data_access_factory.s3_cred
+    return S3FileSystem(
+        access_key=credentials.get("access_key"),
+        secret_key=credentials.get("secret_key"),
+        endpoint_override=credentials.get("url", None),
+        region=credentials.get("region", None),
+    )
+
+
+@ray.remote(num_cpus=1, scheduling_strategy="SPREAD")
+def orchestrate_dataset(
+    preprocessing_params: RayTransformExecutionConfiguration,
+    data_access_factory: DataAccessFactoryBase,
+    runtime_config: RayTransformRuntimeConfiguration,
+) -> int:
+    """
+    orchestrator for table transformer execution using a Ray Data pipeline: read_parquet ->
+    map_batches (using an actor pool of transforms) -> write_parquet. Ray Data's streaming executor provides
+    backpressure, object store aware memory management and overlapping of reads, transforms and writes
+    :param preprocessing_params: orchestrator configuration
+    :param data_access_factory: data access factory
+    :param runtime_config: transformer runtime configuration
+    :return: 0 - success or 1 - failure
+    """
+    from data_processing.utils import get_logger
+
+    logger = get_logger(__name__)
+    start_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    start_time = time.time()
+    logger.info(f"dataset orchestrator started at {start_ts}")
+    # create data access
+    data_access = data_access_factory.create_data_access()
+    if data_access is None:
+        logger.error("No DataAccess instance provided - exiting")
+        return 1
+    if data_access.is_process_local():
+        logger.error(
+            "memory data access keeps the files in the memory of the orchestrator process, so they are not visible "
+            "to the Ray workers - use shared memory (--data_memory_shared True) instead"
+        )
+        return 1
+    statistics = TransformStatisticsRay.remote({})
+    # create transformer runtime
+    runtime = runtime_config.create_transform_runtime()
+    resources = RayUtils.get_cluster_resources()
+    try:
+        transform_class = runtime_config.get_transform_class()
+        RayDatasetTransformMapper.validate_transform(transform_class)
+        # Ray Data splits the input files into blocks itself
+        files, profile, retries = data_access.get_files_to_process(split_files=False)
+        if len(files) == 0:
+            logger.error("No input files to process - exiting")
+            return 0
+        # log retries
+        if retries > 0:
+            statistics.add_stats.remote({"data access retries": retries})
+        logger.info(f"Number of files is {len(files)}, source profile {profile}")
+        logger.info(f"Cluster resources: {resources}")
+        logger.info(
+            f"Number of workers - {preprocessing_params.n_workers} " f"with {preprocessing_params.worker_options} each"
+        )
+        filesystem = _get_filesystem(data_access=data_access, data_access_factory=data_access_factory)
+        dataset = ray.data.read_parquet(files, filesystem=filesystem)
+        dataset = dataset.map_batches(
+            RayDatasetTransformMapper,
+            fn_constructor_kwargs={
+                "data_access_factory": data_access_factory,
+                "transform_class": transform_class,
+                "transform_params": runtime.get_transform_config(
+                    data_access_factory=data_access_factory, statistics=statistics, files=files
+                ),
+                "statistics": statistics,
+            },
+            batch_format="pyarrow",
+            batch_size=None,
+            concurrency=preprocessing_params.n_workers,
+            **preprocessing_params.worker_options,
+        )
+        dataset.write_parquet(data_access.get_output_folder(), filesystem=filesystem)
+        sizes = data_access.get_file_sizes(files)
+        statistics.add_stats.remote({"source_files": len(files), "source_size": sum(sizes)})
+        status = "success"
+        return_code = 0
+    except Exception as e:
+        logger.error(f"Exception during execution {e}: {traceback.print_exc()}")
+        status = "failure"
+        return_code = 1
+    try:
+        # Compute execution statistics
+        logger.debug("Computing execution stats")
+        stats = runtime.compute_execution_stats(ray.get(statistics.get_execution_stats.remote()))
+        if "processing_time" in stats:
+            stats["processing_time"] = round(stats["processing_time"], 3)
+        # build and save metadata
+        logger.debug("Building job metadata")
+        metadata = {
+            "pipeline": preprocessing_params.pipeline_id,
+            "job details": preprocessing_params.job_details
+            | {"start_time": start_ts, "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "status": status},
+            "code": preprocessing_params.code_location,
+            "job_input_params": runtime_config.get_transform_metadata()
+            | data_access_factory.get_input_params()
+            | preprocessing_params.get_input_params(),
+            "execution_stats": resources | {"execution time, min": round((time.time() - start_time) / 60.0, 3)},
+            "job_output_stats": stats,
+        }
+        logger.debug(f"Saving job metadata: {metadata}.")
+        data_access.save_job_metadata(metadata)
+        logger.debug("Saved job metadata.")
+        return return_code
+    except Exception as e:
+        logger.error(f"Exception during execution {e}: {traceback.print_exc()}")
+        return 1
@@ -15,7 +15,7 @@ import ast
 from typing import Any
 
 from data_processing.runtime import TransformExecutionConfiguration
-from data_processing.utils import CLIArgumentProvider, ParamsUtils, get_logger
+from data_processing.utils import CLIArgumentProvider, ParamsUtils, get_logger, str2bool
 
 
 logger = get_logger(__name__)
@@ -23,6 +23,9 @@ logger = get_logger(__name__)
 
 cli_prefix = "runtime_"
 
+# supported execution modes
+execution_modes = ["files", "dataset"]
+
 
 class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
     """
@@ -37,6 +40,17 @@ class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
         self.worker_options = {}
         self.n_workers = 1
         self.creation_delay = 0
+        self.read_ahead = 0
+        self.write_behind = 0
+        self.tasks_per_actor = 2
+        self.resource_poll_interval = 10.0
+        self.stats_flush_interval = 5.0
+        self.stats_flush_count = 100
+        self.stats_aggregators = 0
+        self.warm_pool = False
+        self.warm_pool_name = "dpk"
+        self.warm_pool_release = False
+        self.execution_mode = "files"
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
         """
@@ -67,6 +81,80 @@ class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
             + ParamsUtils.get_ast_help_text(help_example_dict),
         )
         parser.add_argument(f"--{cli_prefix}creation_delay", type=int, default=0, help="delay between actor' creation")
+        parser.add_argument(
+            f"--{cli_prefix}read_ahead",
+            type=int,
+            default=0,
+            help="number of files an actor downloads in the background while the current one is transformed. "
+            "If greater than 0, files are dispatched to actors in groups of read_ahead + 1",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}write_behind",
+            type=int,
+            default=0,
+            help="max number of output files an actor writes in the background, 0 disables it",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}tasks_per_actor",
+            type=int,
+            default=2,
+            help="max number of requests in flight per actor. Values greater than 1 allow an actor to start "
+            "the next request without waiting for the orchestrator",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}resource_poll_interval",
+            type=float,
+            default=10.0,
+            help="interval (sec) of the sampling of the available cluster resources",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}stats_flush_interval",
+            type=float,
+            default=5.0,
+            help="max time (sec) an actor accumulates execution statistics locally before publishing them",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}stats_flush_count",
+            type=int,
+            default=100,
+            help="max number of statistics updates an actor merges locally before publishing them",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}stats_aggregators",
+            type=int,
+            default=0,
+            help="number of intermediate statistics aggregators, merging statistics of the workers before "
+            "forwarding them to the statistics actor. 0 means workers publish to the statistics actor directly",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}warm_pool",
+            type=lambda x: bool(str2bool(x)),
+            default=False,
+            help="keep workers alive after execution and reuse them for the next executions in the same cluster",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}warm_pool_name",
+            type=str,
+            default="dpk",
+            help="name of the warm pool. Only the executions using the same pool name reuse its workers, "
+            "use different names for unrelated jobs sharing a cluster",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}warm_pool_release",
+            type=lambda x: bool(str2bool(x)),
+            default=False,
+            help="kill the workers of the warm pool at the end of the execution, for example for the last "
+            "execution of a sequence",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}execution_mode",
+            type=str,
+            choices=execution_modes,
+            default="files",
+            help="execution mode: files - actors transform whole files, dataset - the input is streamed through "
+            "a Ray Data pipeline (read_parquet, transform actor pool, write_parquet). dataset only supports "
+            "table transforms, that do not rely on flush",
+        )
         return TransformExecutionConfiguration.add_input_params(self, parser=parser)
 
     def apply_input_params(self, args: argparse.Namespace) -> bool:
@@ -82,6 +170,32 @@ class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
         self.worker_options = captured["worker_options"]
         self.n_workers = captured["num_workers"]
         self.creation_delay = captured["creation_delay"]
+        self.read_ahead = captured["read_ahead"]
+        self.write_behind = captured["write_behind"]
+        self.tasks_per_actor = captured["tasks_per_actor"]
+        self.resource_poll_interval = captured["resource_poll_interval"]
+        self.stats_flush_interval = captured["stats_flush_interval"]
+        self.stats_flush_count = captured["stats_flush_count"]
+        self.stats_aggregators = captured["stats_aggregators"]
+        self.warm_pool = captured["warm_pool"]
+        self.warm_pool_name = captured["warm_pool_name"]
+        self.warm_pool_release = captured["warm_pool_release"]
+        self.execution_mode = captured["execution_mode"]
+        if self.read_ahead < 0 or self.write_behind < 0:
+            logger.error(f"read ahead {self.read_ahead} and write behind {self.write_behind} can not be negative")
+            return False
+        if self.tasks_per_actor < 1 or self.resource_poll_interval <= 0:
+            logger.error(
+                f"tasks per actor {self.tasks_per_actor} and resource poll interval {self.resource_poll_interval} "
+                f"have to be positive"
+            )
+            return False
+        if self.stats_flush_interval < 0 or self.stats_flush_count < 1 or self.stats_aggregators < 0:
+            logger.error(
+                f"stats flush interval {self.stats_flush_interval}, stats flush count {self.stats_flush_count} "
+                f"and stats aggregators {self.stats_aggregators} are invalid"
+            )
+            return False
         self.job_details = {
             "job category": "preprocessing",
             "job name": self.name,
@@ -95,6 +209,18 @@ class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
         # print them
         logger.info(f"number of workers {self.n_workers} worker options {self.worker_options}")
         logger.info(f"actor creation delay {self.creation_delay}")
+        logger.info(f"read ahead {self.read_ahead}, write behind {self.write_behind}")
+        logger.info(
+            f"tasks per actor {self.tasks_per_actor}, resource poll interval {self.resource_poll_interval} sec"
+        )
+        logger.info(
+            f"stats flush interval {self.stats_flush_interval} sec, stats flush count {self.stats_flush_count}, "
+            f"stats aggregators {self.stats_aggregators}"
+        )
+        logger.info(
+            f"warm pool {self.warm_pool}, warm pool name {self.warm_pool_name}, "
+            f"warm pool release {self.warm_pool_release}, execution mode {self.execution_mode}"
+        )
         logger.info(f"job details {self.job_details}")
         return True
 
@@ -107,4 +233,15 @@ class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
             "number of workers": self.n_workers,
             "worker options": self.worker_options,
             "actor creation delay": self.creation_delay,
+            "read ahead": self.read_ahead,
+            "write behind": self.write_behind,
+            "tasks per actor": self.tasks_per_actor,
+            "resource poll interval": self.resource_poll_interval,
+            "stats flush interval": self.stats_flush_interval,
+            "stats flush count": self.stats_flush_count,
+            "stats aggregators": self.stats_aggregators,
+            "warm pool": self.warm_pool,
+            "warm pool name": self.warm_pool_name,
+            "warm pool release": self.warm_pool_release,
+            "execution mode": self.execution_mode,
         }
@@ -0,0 +1,99 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from typing import Any
+
+from data_processing.data_access import DataAccessFactoryBase
+from data_processing.transform import (
+    PipelineTransformConfiguration,
+    pipeline_transforms_key,
+)
+from data_processing_ray.runtime.ray import (
+    DefaultRayTransformRuntime,
+    RayTransformRuntimeConfiguration,
+)
+from ray.actor import ActorHandle
+
+
+class RayPipelineTransformRuntime(DefaultRayTransformRuntime):
+    """
+    Pipeline transform runtime, delegating to the runtimes of the participating transforms
+    """
+
+    def __init__(self, params: dict[str, Any], pipeline: list[RayTransformRuntimeConfiguration]):
+        """
+        Create/config this runtime.
+        :param params: pipeline parameters
+        :param pipeline: runtime configurations of the participating transforms
+        """
+        super().__init__(params)
+        self.runtimes = [(config.get_transform_class(), config.create_transform_runtime()) for config in pipeline]
+
+    def get_transform_config(
+        self, data_access_factory: DataAccessFactoryBase, statistics: ActorHandle, files: list[str]
+    ) -> dict[str, Any]:
+        """
+        Get the dictionary of configuration that will be provided to the pipeline transform's initializer.
+        It contains the configurations, created by the runtimes of the participating transforms.
+        :param data_access_factory - data access factory class being used by the RayOrchestrator.
+        :param statistics - reference to statistics actor
+        :param files - list of files to process
+        :return: dictionary of transform init params
+        """
+        return self.params | {
+            pipeline_transforms_key: [
+                (
+                    transform_class,
+                    runtime.get_transform_config(
+                        data_access_factory=data_access_factory, statistics=statistics, files=files
+                    ),
+                )
+                for transform_class, runtime in self.runtimes
+            ]
+        }
+
+    def compute_execution_stats(self, stats: dict[str, Any]) -> dict[str, Any]:
+        """
+        Update/augment the given stats by the runtimes of all participating transforms.
+        :param stats: output of statistics as aggregated across all calls to all transforms.
+        :return: job execution statistics.  These are generally reported as metadata by the Ray Orchestrator.
+        """
+        for _, runtime in self.runtimes:
+            stats = runtime.compute_execution_stats(stats=stats)
+        return stats
+
+
+class RayPipelineTransformRuntimeConfiguration(RayTransformRuntimeConfiguration):
+    """
+    Runtime configuration for executing a chain of table transforms as a single fused transform
+    """
+
+    def __init__(self, pipeline: list[RayTransformRuntimeConfiguration], name: str = "pipeline"):
+        """
+        Initialization
+        :param pipeline: runtime configurations of the participating transforms, in the order of execution
+        :param name: pipeline name
+        """
+        super().__init__(
+            transform_config=PipelineTransformConfiguration(
+                pipeline=[config.transform_config for config in pipeline], name=name
+            ),
+            runtime_class=RayPipelineTransformRuntime,
+        )
+        self.pipeline = pipeline
+
+    def create_transform_runtime(self) -> DefaultRayTransformRuntime:
+        """
+        Create pipeline transform runtime with the parameters captured during apply_input_params()
+        :return: transform runtime object
+        """
+        return RayPipelineTransformRuntime(params=self.transform_config.get_transform_params(), pipeline=self.pipeline)
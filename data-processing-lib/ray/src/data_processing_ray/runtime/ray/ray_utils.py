@@ -10,22 +10,76 @@
 # limitations under the License.
 ################################################################################
 
+import collections
+import hashlib
+import json
 import logging
+import threading
 import time
 from typing import Any
 
 import ray
 from data_processing.utils import GB, UnrecoverableException
 from ray.actor import ActorHandle
-from ray.exceptions import RayError
-from ray.experimental.state.api import list_actors
-from ray.util.actor_pool import ActorPool
+from ray.exceptions import RayActorError, RayError
 
 
-# This value matches the constant `RAY_MAX_LIMIT_FROM_API_SERVER` defined in the ray source code here:
-# https://github.com/ray-project/ray/blob/569f7df9067c5654fb57ba7bc4792b3ba5aaa846/python/ray/util/state/common.py#L50-L53
+# time (sec) to wait for the created actors to become ready
+ACTOR_READY_TIMEOUT = 120
+# namespace of the (detached) actors of the warm pools and the name of their registry
+WARM_POOL_NAMESPACE = "dpk_warm_pool"
+WARM_POOL_REGISTRY = "_registry"
 
-RAY_MAX_ACTOR_LIMIT = 10000
+
+@ray.remote(num_cpus=0)
+class WarmPoolRegistry:
+    """
+    Registry of the leases of the warm pool actors. An actor is leased by a single execution at a time, so that
+    concurrent executions never rebind actors, that are used by another one
+    """
+
+    def __init__(self):
+        """
+        Init method
+        """
+        # actor names to the leases using them
+        self.leases = {}
+
+    def acquire(self, prefix: str, n_actors: int, lease: str) -> list[str]:
+        """
+        Lease actors, skipping the ones leased by other executions
+        :param prefix: prefix of the actor names (pool name and actor options hash)
+        :param n_actors: number of actors
+        :param lease: lease id of the execution
+        :return: list of the leased actor names
+        """
+        names = []
+        i = 0
+        while len(names) < n_actors:
+            name = f"{prefix}-{i}"
+            if self.leases.get(name, lease) == lease:
+                self.leases[name] = lease
+                names.append(name)
+            i += 1
+        return names
+
+    def release(self, lease: str) -> list[str]:
+        """
+        Release the actors of a lease
+        :param lease: lease id of the execution
+        :return: list of the released actor names
+        """
+        names = [name for name, owner in self.leases.items() if owner == lease]
+        for name in names:
+            del self.leases[name]
+        return names
+
+    def get_leased(self) -> list[str]:
+        """
+        Get names of the leased actors
+        :return: list of the leased actor names
+        """
+        return list(self.leases.keys())
 
 
 class RayUtils:
@@ -115,22 +169,124 @@ class RayUtils:
             time.sleep(creation_delay)
             return clazz.options(**actor_options).remote(params)
 
-        cls_name = clazz.__class__.__name__.replace("ActorClass(", "").replace(")", "")
         actors = [operator() for _ in range(n_actors)]
-        for i in range(120):
-            time.sleep(1)
-            alive = list_actors(
-                filters=[("class_name", "=", cls_name), ("state", "=", "ALIVE")], limit=RAY_MAX_ACTOR_LIMIT
-            )
-            if len(actors) == len(alive):
-                return actors
-        # failed - raise an exception
-        print(f"created {actors}, alive {alive}")
-        raise UnrecoverableException(f"out of {len(actors)} created actors only {len(alive)} alive")
+        RayUtils.wait_for_actors(actors=actors)
+        return actors
+
+    @staticmethod
+    def wait_for_actors(actors: list[ActorHandle], replies: list[ray.ObjectRef] = None) -> None:
+        """
+        Wait for the actors to become ready, using a lightweight remote call to every one of them
+        :param actors: list of actor handles
+        :param replies: additional requests to wait for, for example rebinding of the warm actors
+        :return: None
+        """
+        replies = [actor.__ray_ready__.remote() for actor in actors] + (replies or [])
+        ready, not_ready = ray.wait(replies, num_returns=len(replies), timeout=ACTOR_READY_TIMEOUT)
+        if len(not_ready) > 0:
+            raise UnrecoverableException(f"out of {len(actors)} created actors only {len(ready)} ready")
+        # surface actors' creation errors
+        try:
+            ray.get(ready)
+        except Exception as e:
+            raise UnrecoverableException(f"failed to create actors {e}")
+
+    @staticmethod
+    def _get_warm_pool_registry() -> ActorHandle:
+        """
+        Get (or create) the registry of the warm pool leases
+        :return: registry actor handle
+        """
+        return WarmPoolRegistry.options(
+            name=WARM_POOL_REGISTRY, namespace=WARM_POOL_NAMESPACE, lifetime="detached", get_if_exists=True
+        ).remote()
+
+    @staticmethod
+    def get_warm_actors(
+        clazz: type,
+        params: dict[str, Any],
+        actor_options: dict[str, Any],
+        n_actors: int,
+        lease: str,
+        pool_name: str = "dpk",
+        creation_delay: int = 0,
+    ) -> list[ActorHandle]:
+        """
+        Get a set of actors from a warm pool. The actors of the pool are named (and detached), so that they
+        outlive the execution creating them and are reused by the next ones (in the same Ray cluster) with
+        the same pool name and actor options. Actors are leased by the execution until it returns them
+        (return_warm_actors), actors leased by other executions are never rebound. Existing actors are rebound
+        to the new parameters using their rebind method, missing ones are created
+        :param clazz: actor class, has to be annotated as remote and implement rebind(params)
+        :param params: actor init (rebind) params
+        :param actor_options: dictionary of actor options.
+        :param n_actors: number of actors
+        :param lease: lease id of the execution, unique for every execution
+        :param pool_name: name of the pool
+        :param creation_delay - delay between actor's creations
+        :return: a list of actor handles
+        """
+        options_hash = hashlib.sha256(json.dumps(actor_options, sort_keys=True, default=str).encode()).hexdigest()
+        registry = RayUtils._get_warm_pool_registry()
+        names = ray.get(
+            registry.acquire.remote(prefix=f"{pool_name}-{options_hash[:12]}", n_actors=n_actors, lease=lease)
+        )
+        actors = []
+        replies = []
+        for name in names:
+            try:
+                actor = ray.get_actor(name=name, namespace=WARM_POOL_NAMESPACE)
+                replies.append(actor.rebind.remote(params))
+            except ValueError:
+                # actor does not exist yet
+                time.sleep(creation_delay)
+                actor = clazz.options(
+                    **actor_options, name=name, namespace=WARM_POOL_NAMESPACE, lifetime="detached", get_if_exists=True
+                ).remote(params)
+            actors.append(actor)
+        try:
+            RayUtils.wait_for_actors(actors=actors, replies=replies)
+        except Exception:
+            RayUtils.return_warm_actors(lease=lease)
+            raise
+        return actors
+
+    @staticmethod
+    def return_warm_actors(lease: str) -> int:
+        """
+        Return the actors leased by an execution to the warm pool, so that the next executions can reuse them
+        :param lease: lease id of the execution
+        :return: number of returned actors
+        """
+        registry = RayUtils._get_warm_pool_registry()
+        return len(ray.get(registry.release.remote(lease=lease)))
+
+    @staticmethod
+    def release_warm_actors(pool_name: str = "dpk", lease: str = None) -> int:
+        """
+        Kill the actors of a warm pool, except for the ones leased by the running executions
+        :param pool_name: name of the pool
+        :param lease: lease id of the execution releasing the pool, its actors are killed as well
+        :return: number of killed actors
+        """
+        registry = RayUtils._get_warm_pool_registry()
+        if lease is not None:
+            ray.get(registry.release.remote(lease=lease))
+        leased = set(ray.get(registry.get_leased.remote()))
+        killed = 0
+        for actor in ray.util.list_named_actors(all_namespaces=True):
+            if (
+                actor["namespace"] == WARM_POOL_NAMESPACE
+                and actor["name"].startswith(f"{pool_name}-")
+                and actor["name"] not in leased
+            ):
+                ray.kill(ray.get_actor(name=actor["name"], namespace=WARM_POOL_NAMESPACE))
+                killed += 1
+        return killed
 
     @staticmethod
     def process_files(
-        executors: ActorPool,
+        executors: list[ActorHandle],
         files: list[str],
         print_interval: int,
         files_in_progress_gauge: Gauge,
@@ -140,10 +296,14 @@ class RayUtils:
         available_memory_gauge: Gauge,
         object_memory_gauge: Gauge,
         logger: logging.Logger,
+        batch_size: int = 1,
+        sizes: list[int] = None,
+        tasks_per_actor: int = 1,
+        resource_poll_interval: float = 10.0,
     ) -> int:
         """
         Process files
-        :param executors: actor pool of executors
+        :param executors: list of executor actors
         :param files: list of files to process
         :param print_interval: print interval
         :param files_in_progress_gauge: ray Gauge to report files in process
@@ -153,85 +313,27 @@ class RayUtils:
         :param available_memory_gauge: ray Gauge to report available memory
         :param object_memory_gauge: ray Gauge to report available object memory
         :param logger: logger
+        :param batch_size: number of files submitted to an actor in a single request. Groups of files are
+                           processed by the actor's process_batch, allowing it to download them ahead
+        :param sizes: optional list of file sizes, used to process the largest files first
+        :param tasks_per_actor: max number of requests in flight per actor
+        :param resource_poll_interval: interval (sec) of the sampling of the available cluster resources
         :return: number of actors failures
         """
-        logger.debug("Begin processing files")
-        actor_failures = 0
-        RayUtils.get_available_resources(
+        scheduler = RayFileScheduler(
+            actors=executors,
+            logger=logger,
+            batch_size=batch_size,
+            tasks_per_actor=tasks_per_actor,
+            resource_poll_interval=resource_poll_interval,
+            files_in_progress_gauge=files_in_progress_gauge,
+            files_completed_gauge=files_completed_gauge,
             available_cpus_gauge=available_cpus_gauge,
             available_gpus_gauge=available_gpus_gauge,
             available_memory_gauge=available_memory_gauge,
             object_memory_gauge=object_memory_gauge,
         )
-        terminate = False
-        running = 0
-        t_start = time.time()
-        completed = 0
-        for path in files:
-            if executors.has_free():  # still have room
-                executors.submit(lambda a, v: a.process_file.remote(v), path)
-                running += 1
-                files_in_progress_gauge.set(running)
-            else:  # need to wait for some actors
-                while True:
-                    # we can have several workers fail here
-                    try:
-                        res = executors.get_next_unordered()
-                        break
-                    except Exception as e:
-                        if isinstance(e, RayError):
-                            # Ray exception - terminate
-                            logger.error(f"Got Ray worker exception {e}, terminating")
-                            terminate = True
-                            break
-                        logger.error(f"Failed to process request worker exception {e}")
-                        actor_failures += 1
-                        completed += 1
-                        break
-                if terminate:
-                    raise UnrecoverableException
-                executors.submit(lambda a, v: a.process_file.remote(v), path)
-
-                completed += 1
-                files_completed_gauge.set(completed)
-                RayUtils.get_available_resources(
-                    available_cpus_gauge=available_cpus_gauge,
-                    available_gpus_gauge=available_gpus_gauge,
-                    available_memory_gauge=available_memory_gauge,
-                    object_memory_gauge=object_memory_gauge,
-                )
-                if completed % print_interval == 0:
-                    logger.info(f"Completed {completed} files in {round((time.time() - t_start)/60., 3)} min")
-        # Wait for completion
-        files_completed_gauge.set(completed)
-        # Wait for completion
-        logger.info(
-            f"Completed {completed} files ({round(100 * completed / len(files), 3)}%)  "
-            f"in {round((time.time() - t_start)/60., 3)} min. Waiting for completion"
-        )
-        while executors.has_next():
-            while True:
-                # we can have several workers fail here
-                try:
-                    executors.get_next_unordered()
-                    break
-                except Exception as e:
-                    logger.error(f"Failed to process request worker exception {e}")
-                    actor_failures += 1
-                    completed += 1
-            running -= 1
-            completed += 1
-            files_in_progress_gauge.set(running)
-            files_completed_gauge.set(completed)
-            RayUtils.get_available_resources(
-                available_cpus_gauge=available_cpus_gauge,
-                available_gpus_gauge=available_gpus_gauge,
-                available_memory_gauge=available_memory_gauge,
-                object_memory_gauge=object_memory_gauge,
-            )
-
-        logger.info(f"Completed processing {completed} files in {round((time.time() - t_start)/60, 3)} min")
-        return actor_failures
+        return scheduler.process_files(files=files, sizes=sizes, print_interval=print_interval)
 
     @staticmethod
     def wait_for_execution_completion(logger: logging.Logger, replies: list[ray.ObjectRef]) -> int:
@@ -252,3 +354,181 @@ class RayUtils:
                 not_ready = replies - 1
             replies = not_ready
         return actor_failures
+
+
+class RayFileScheduler:
+    """
+    Scheduler dispatching files (or groups of files) to a set of actors. Work is dispatched largest first,
+    so that big files do not end up in the tail of the execution, and every actor keeps up to tasks_per_actor
+    requests in flight, so that it does not wait for the coordinator between files. Requests failing because
+    their actor died are re-queued, and the available cluster resources are sampled by a background thread,
+    instead of after every completed file.
+    """
+
+    from ray.util.metrics import Gauge
+
+    def __init__(
+        self,
+        actors: list[ActorHandle],
+        logger: logging.Logger,
+        batch_size: int = 1,
+        tasks_per_actor: int = 1,
+        max_retries: int = 3,
+        resource_poll_interval: float = 10.0,
+        files_in_progress_gauge: Gauge = None,
+        files_completed_gauge: Gauge = None,
+        available_cpus_gauge: Gauge = None,
+        available_gpus_gauge: Gauge = None,
+        available_memory_gauge: Gauge = None,
+        object_memory_gauge: Gauge = None,
+    ):
+        """
+        Init method
+        :param actors: list of executor actors, implementing process_file and process_batch methods
+        :param logger: logger
+        :param batch_size: number of files submitted to an actor in a single request
+        :param tasks_per_actor: max number of requests in flight per actor
+        :param max_retries: max number of re-submissions of a request failing because of its actor death.
+                            It is also the number of consecutive failures after which an actor is not used anymore
+        :param resource_poll_interval: interval (sec) of the sampling of the available cluster resources
+        :param files_in_progress_gauge: ray Gauge to report files in process
+        :param files_completed_gauge: ray Gauge to report completed files
+        :param available_cpus_gauge: ray Gauge to report available CPU
+        :param available_gpus_gauge: ray Gauge to report available GPU
+        :param available_memory_gauge: ray Gauge to report available memory
+        :param object_memory_gauge: ray Gauge to report available object memory
+        """
+        self.actors = actors
+        self.logger = logger
+        self.batch_size = max(batch_size, 1)
+        self.tasks_per_actor = max(tasks_per_actor, 1)
+        self.max_retries = max_retries
+        self.resource_poll_interval = resource_poll_interval
+        self.files_in_progress_gauge = files_in_progress_gauge
+        self.files_completed_gauge = files_completed_gauge
+        self.resource_gauges = {
+            "available_cpus_gauge": available_cpus_gauge,
+            "available_gpus_gauge": available_gpus_gauge,
+            "available_memory_gauge": available_memory_gauge,
+            "object_memory_gauge": object_memory_gauge,
+        }
+        # number of requests re-submitted because of actor failures
+        self.requeued = 0
+
+    def _work_items(self, files: list[str], sizes: list[int] = None) -> list[str | list[str]]:
+        """
+        Build work items (largest first, if file sizes are known)
+        :param files: list of files to process
+        :param sizes: optional list of file sizes
+        :return: list of work items
+        """
+        if sizes is not None:
+            files = [f for _, f in sorted(zip(sizes, files), key=lambda size_file: -size_file[0])]
+        if self.batch_size > 1:
+            return [files[i : i + self.batch_size] for i in range(0, len(files), self.batch_size)]
+        return files
+
+    def _submit(self, actor: ActorHandle, item: str | list[str]) -> ray.ObjectRef:
+        if isinstance(item, list):
+            return actor.process_batch.remote(item)
+        return actor.process_file.remote(item)
+
+    def _sample_resources(self, stop: threading.Event) -> None:
+        """
+        Sample available cluster resources until stopped
+        :param stop: stop event
+        :return: None
+        """
+        while not stop.wait(self.resource_poll_interval):
+            try:
+                RayUtils.get_available_resources(**self.resource_gauges)
+            except Exception as e:
+                self.logger.warning(f"Failed to get available resources {e}")
+
+    def process_files(self, files: list[str], sizes: list[int] = None, print_interval: int = 1) -> int:
+        """
+        Process files
+        :param files: list of files to process
+        :param sizes: optional list of file sizes, used to process the largest files first
+        :param print_interval: print interval
+        :return: number of actors failures
+        """
+        self.logger.debug("Begin processing files")
+        work = collections.deque((item, 0) for item in self._work_items(files=files, sizes=sizes))
+        # free request slots, interleaved between actors, so that the work is spread across all of them
+        slots = collections.deque(i for _ in range(self.tasks_per_actor) for i in range(len(self.actors)))
+        consecutive_failures = [0] * len(self.actors)
+        # in flight requests - reference to actor index, work item and the number of its retries
+        in_flight: dict[ray.ObjectRef, tuple[int, str | list[str], int]] = {}
+        actor_failures = 0
+        completed = 0
+        next_print = print_interval
+        t_start = time.time()
+        RayUtils.get_available_resources(**self.resource_gauges)
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_resources, args=(stop,), daemon=True)
+        sampler.start()
+        try:
+            while work or in_flight:
+                while work and slots:
+                    actor_index = slots.popleft()
+                    item, retries = work.popleft()
+                    in_flight[self._submit(actor=self.actors[actor_index], item=item)] = (actor_index, item, retries)
+                if not in_flight:
+                    raise UnrecoverableException(f"all {len(self.actors)} actors failed, {len(work)} requests left")
+                if self.files_in_progress_gauge is not None:
+                    self.files_in_progress_gauge.set(len(in_flight))
+                # wait for at least one request, and collect all the ones completed in the meanwhile
+                waiting = list(in_flight)
+                ready, not_ready = ray.wait(waiting, num_returns=1)
+                if not_ready:
+                    more, _ = ray.wait(not_ready, num_returns=len(not_ready), timeout=0)
+                    ready += more
+                for ref in ready:
+                    actor_index, item, retries = in_flight.pop(ref)
+                    n_files = len(item) if isinstance(item, list) else 1
+                    try:
+                        ray.get(ref)
+                        consecutive_failures[actor_index] = 0
+                    except RayActorError as e:
+                        consecutive_failures[actor_index] += 1
+                        if retries < self.max_retries:
+                            self.logger.warning(f"Actor {actor_index} died ({e}), re-queueing {item}")
+                            work.appendleft((item, retries + 1))
+                            self.requeued += 1
+                        else:
+                            self.logger.error(f"Failed to process {item} after {retries} retries, {e}")
+                            actor_failures += 1
+                            completed += n_files
+                        if consecutive_failures[actor_index] < self.max_retries:
+                            slots.append(actor_index)
+                        else:
+                            self.logger.error(f"Actor {actor_index} failed {self.max_retries} times, not using it")
+                        continue
+                    except RayError as e:
+                        # Ray exception - terminate
+                        self.logger.error(f"Got Ray worker exception {e}, terminating")
+                        raise UnrecoverableException(f"Got Ray worker exception {e}")
+                    except Exception as e:
+                        self.logger.error(f"Failed to process request worker exception {e}")
+                        actor_failures += 1
+                    completed += n_files
+                    slots.append(actor_index)
+                if self.files_completed_gauge is not None:
+                    self.files_completed_gauge.set(completed)
+                if completed >= next_print:
+                    next_print = (completed // print_interval + 1) * print_interval
+                    self.logger.info(
+                        f"Completed {completed} files ({round(100 * completed / len(files), 3)}%) "
+                        f"in {round((time.time() - t_start)/60., 3)} min"
+                    )
+        finally:
+            stop.set()
+            sampler.join()
+        if self.files_in_progress_gauge is not None:
+            self.files_in_progress_gauge.set(0)
+        RayUtils.get_available_resources(**self.resource_gauges)
+        if self.requeued > 0:
+            self.logger.warning(f"Re-queued {self.requeued} requests because of actor failures")
+        self.logger.info(f"Completed processing {completed} files in {round((time.time() - t_start)/60, 3)} min")
+        return actor_failures
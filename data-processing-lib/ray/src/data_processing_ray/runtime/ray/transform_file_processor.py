@@ -10,11 +10,15 @@
 # limitations under the License.
 ################################################################################
 
+import random
 from typing import Any
 
 import ray
 from data_processing.runtime import AbstractTransformFileProcessor
 from data_processing.utils import UnrecoverableException
+from data_processing_ray.runtime.ray.transform_statistics import (
+    StatisticsAccumulator,
+)
 
 
 @ray.remote(scheduling_strategy="SPREAD")
@@ -31,11 +35,19 @@ class RayTransformFileProcessor(AbstractTransformFileProcessor):
             transform_class: local transform class
             transform_params: dictionary of parameters for local transform creation
             statistics: object reference to statistics
+            stats_aggregators: optional list of object references to intermediate statistics aggregators.
+                If defined, execution statistics are published to a randomly chosen one of them
+            stats_flush_interval: max time (sec) between publishing of the execution statistics
+            stats_flush_count: max number of statistics updates merged before publishing them
+            read_ahead: number of files to download in the background
+            write_behind: max number of output files written in the background
         """
         super().__init__(
             data_access_factory=params.get("data_access_factory", None),
             transform_parameters=dict(params.get("transform_params", {})),
-            is_folder=params.get("is_folder", False)
+            is_folder=params.get("is_folder", False),
+            read_ahead=params.get("read_ahead", 0),
+            write_behind=params.get("write_behind", 0),
         )
         # Create statistics
         self.stats = params.get("statistics", None)
@@ -43,6 +55,14 @@ class RayTransformFileProcessor(AbstractTransformFileProcessor):
             self.logger.error("Transform file processor: statistics is not specified")
             raise UnrecoverableException("statistics is None")
         self.transform_params["statistics"] = self.stats
+        # execution statistics are merged locally and published periodically
+        aggregators = params.get("stats_aggregators", None)
+        self.stats_target = random.choice(aggregators) if aggregators else self.stats
+        self.stats_accumulator = StatisticsAccumulator(
+            publish=self.stats_target.add_stats.remote,
+            flush_interval=params.get("stats_flush_interval", 5.0),
+            flush_count=params.get("stats_flush_count", 100),
+        )
         # Create local processor
         try:
             self.transform = params.get("transform_class", None)(self.transform_params)
@@ -50,5 +70,33 @@ class RayTransformFileProcessor(AbstractTransformFileProcessor):
             self.logger.error(f"Exception creating transform  {e}")
             raise UnrecoverableException("failed creating transform")
 
+    def rebind(self, params: dict[str, Any]) -> None:
+        """
+        Rebind a warm (reused between executions) processor to a new execution, re-creating its data access
+        and transform with the new parameters. Process level state, for example imported libraries and
+        models cached by the transform's module, is preserved
+        :param params: dictionary of parameters, same as the init ones
+        :return: None
+        """
+        self.__init__(params)
+
+    def process_batch(self, f_names: list[str]) -> int:
+        """
+        Process a group of files, downloading the next ones (up to read_ahead) while the current one is transformed
+        :param f_names: file names
+        :return: number of processed files
+        """
+        return sum(1 for _ in self.process_files(f_names))
+
+    def flush(self) -> None:
+        """
+        Flush transform and publish all the accumulated statistics, waiting for their delivery
+        :return: None
+        """
+        super().flush()
+        ref = self.stats_accumulator.flush()
+        if ref is not None:
+            ray.get(ref)
+
     def _publish_stats(self, stats: dict[str, Any]) -> None:
-        self.stats.add_stats.remote(stats)
+        self.stats_accumulator.add_stats(stats)
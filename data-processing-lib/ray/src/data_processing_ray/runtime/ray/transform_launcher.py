@@ -22,6 +22,7 @@ from data_processing_ray.runtime.ray import (
     RayTransformExecutionConfiguration,
     RayTransformRuntimeConfiguration,
     orchestrate,
+    orchestrate_dataset,
 )
 
 
@@ -82,15 +83,19 @@ class RayTransformLauncher(AbstractTransformLauncher):
             if self.run_locally:
                 # Will create a local Ray cluster
                 logger.debug("running locally creating Ray cluster")
-                # enable metrics for local Ray
-                ray.init(_metrics_export_port=8088)
+                # enable metrics for local Ray. With warm pool, the local cluster is kept between launches
+                ray.init(_metrics_export_port=8088, ignore_reinit_error=self.execution_config.warm_pool)
             else:
                 # connect to the existing cluster
                 logger.info("Connecting to the existing Ray cluster")
                 ray.init(f"ray://localhost:10001", ignore_reinit_error=True)
             logger.debug("Starting orchestrator")
+            if self.execution_config.execution_mode == "dataset":
+                orchestrator = orchestrate_dataset
+            else:
+                orchestrator = orchestrate
             res = ray.get(
-                orchestrate.remote(
+                orchestrator.remote(
                     preprocessing_params=self.execution_config,
                     data_access_factory=self.data_access_factory,
                     runtime_config=self.runtime_config,
@@ -102,7 +107,10 @@ class RayTransformLauncher(AbstractTransformLauncher):
             logger.info(f"Exception running ray remote orchestration\n{e}")
         finally:
             logger.info(f"Completed execution in {round((time.time() - start)/60., 3)} min, execution result {res}")
-            ray.shutdown()
+            if not (
+                self.run_locally and self.execution_config.warm_pool and not self.execution_config.warm_pool_release
+            ):
+                ray.shutdown()
             return res
 
     def launch(self) -> int:
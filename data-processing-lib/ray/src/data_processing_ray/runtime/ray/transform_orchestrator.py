@@ -12,19 +12,21 @@
 
 import time
 import traceback
+import uuid
 from datetime import datetime
 
 import ray
 from data_processing.data_access import DataAccessFactoryBase
 from data_processing.transform import AbstractFolderTransform
 from data_processing_ray.runtime.ray import (
+    RayFileScheduler,
     RayTransformExecutionConfiguration,
     RayTransformFileProcessor,
     RayTransformRuntimeConfiguration,
     RayUtils,
+    TransformStatisticsAggregatorRay,
     TransformStatisticsRay,
 )
-from ray.util import ActorPool
 
 
 @ray.remote(num_cpus=1, scheduling_strategy="SPREAD")
@@ -53,11 +55,18 @@ def orchestrate(
     if data_access is None:
         logger.error("No DataAccess instance provided - exiting")
         return 1
+    if data_access.is_process_local():
+        logger.error(
+            "memory data access keeps the files in the memory of the orchestrator process, so they are not visible "
+            "to the Ray actors - use shared memory (--data_memory_shared True) instead"
+        )
+        return 1
     statistics = TransformStatisticsRay.remote({})
     # create transformer runtime
     runtime = runtime_config.create_transform_runtime()
     resources = RayUtils.get_cluster_resources()
     is_folder = issubclass(runtime_config.get_transform_class(), AbstractFolderTransform)
+    lease = None
     try:
         if is_folder:
             # folder transform
@@ -91,16 +100,45 @@ def orchestrate(
             ),
             "statistics": statistics,
             "is_folder": is_folder,
+            "read_ahead": preprocessing_params.read_ahead,
+            "write_behind": preprocessing_params.write_behind,
+            "stats_flush_interval": preprocessing_params.stats_flush_interval,
+            "stats_flush_count": preprocessing_params.stats_flush_count,
         }
+        # for very wide jobs, shard statistics collection between intermediate aggregators
+        aggregators = [
+            TransformStatisticsAggregatorRay.remote(
+                {
+                    "statistics": statistics,
+                    "flush_interval": preprocessing_params.stats_flush_interval,
+                    "flush_count": preprocessing_params.stats_flush_count,
+                }
+            )
+            for _ in range(preprocessing_params.stats_aggregators)
+        ]
+        if len(aggregators) > 0:
+            processor_params["stats_aggregators"] = aggregators
         logger.debug("Creating actors")
-        processors = RayUtils.create_actors(
-            clazz=RayTransformFileProcessor,
-            params=processor_params,
-            actor_options=preprocessing_params.worker_options,
-            n_actors=preprocessing_params.n_workers,
-            creation_delay=preprocessing_params.creation_delay,
-        )
-        processors_pool = ActorPool(processors)
+        if preprocessing_params.warm_pool:
+            # reuse processors of the previous executions, leasing them for this execution
+            lease = uuid.uuid4().hex
+            processors = RayUtils.get_warm_actors(
+                clazz=RayTransformFileProcessor,
+                params=processor_params,
+                actor_options=preprocessing_params.worker_options,
+                n_actors=preprocessing_params.n_workers,
+                lease=lease,
+                pool_name=preprocessing_params.warm_pool_name,
+                creation_delay=preprocessing_params.creation_delay,
+            )
+        else:
+            processors = RayUtils.create_actors(
+                clazz=RayTransformFileProcessor,
+                params=processor_params,
+                actor_options=preprocessing_params.worker_options,
+                n_actors=preprocessing_params.n_workers,
+                creation_delay=preprocessing_params.creation_delay,
+            )
         # create gauges
         files_in_progress_gauge = Gauge("files_in_progress", "Number of files in progress")
         files_completed_gauge = Gauge("files_processed_total", "Number of files completed")
@@ -110,20 +148,28 @@ def orchestrate(
         available_object_memory_gauge = Gauge("available_object_store", "Available object store")
         # process data
         logger.debug("Begin processing files")
-        failures = RayUtils.process_files(
-            executors=processors_pool,
-            files=files,
-            print_interval=print_interval,
+        scheduler = RayFileScheduler(
+            actors=processors,
+            logger=logger,
+            batch_size=preprocessing_params.read_ahead + 1,
+            tasks_per_actor=preprocessing_params.tasks_per_actor,
+            resource_poll_interval=preprocessing_params.resource_poll_interval,
             files_in_progress_gauge=files_in_progress_gauge,
             files_completed_gauge=files_completed_gauge,
             available_cpus_gauge=available_cpus_gauge,
             available_gpus_gauge=available_gpus_gauge,
             available_memory_gauge=available_memory_gauge,
             object_memory_gauge=available_object_memory_gauge,
-            logger=logger,
+        )
+        failures = scheduler.process_files(
+            files=files,
+            sizes=None if is_folder else data_access.get_file_sizes(files),
+            print_interval=print_interval,
         )
         if failures > 0:
             statistics.add_stats.remote({"actor failures": failures})
+        if scheduler.requeued > 0:
+            statistics.add_stats.remote({"actor requeues": scheduler.requeued})
         logger.debug("Done processing files, waiting for flush() completion.")
         # invoke flush to ensure that all results are returned
         start = time.time()
@@ -131,6 +177,8 @@ def orchestrate(
         failures = RayUtils.wait_for_execution_completion(logger=logger, replies=replies)
         if failures > 0:
             statistics.add_stats.remote({"actor failures": failures})
+        # forward statistics remaining in the aggregators
+        ray.get([aggregator.flush.remote() for aggregator in aggregators])
         logger.info(f"done flushing in {round(time.time() - start, 3)} sec")
         status = "success"
         return_code = 0
@@ -138,6 +186,15 @@ def orchestrate(
         logger.error(f"Exception during execution {e}: {traceback.print_exc()}")
         status = "failure"
         return_code = 1
+    if lease is not None:
+        # return the warm processors to the pool or kill them
+        try:
+            if preprocessing_params.warm_pool_release:
+                RayUtils.release_warm_actors(pool_name=preprocessing_params.warm_pool_name, lease=lease)
+            else:
+                RayUtils.return_warm_actors(lease=lease)
+        except Exception as e:
+            logger.warning(f"Failed to release warm pool {preprocessing_params.warm_pool_name}: {e}")
     try:
         # Compute execution statistics
         logger.debug("Computing execution stats")
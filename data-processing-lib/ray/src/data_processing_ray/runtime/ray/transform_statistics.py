@@ -10,7 +10,9 @@
 # limitations under the License.
 ################################################################################
 
-from typing import Any
+import threading
+import time
+from typing import Any, Callable
 
 import ray
 from data_processing.transform import TransformStatistics
@@ -74,3 +76,100 @@ class TransformStatisticsRay(TransformStatistics):
                     self.transform_exceptions_counter.inc(val)
                 if key == "data access retries":
                     self.data_retries_counter.inc(val)
+
+
+class StatisticsAccumulator:
+    """
+    Local (non actor) accumulator of statistics deltas. Deltas are merged locally and published to the
+    statistics actor as a single dictionary when either the time or the count interval expires, or on flush,
+    so that statistics actors do not get a remote call for every statistics update.
+    """
+
+    def __init__(self, publish: Callable[[dict[str, Any]], Any], flush_interval: float = 5.0, flush_count: int = 100):
+        """
+        Init method
+        :param publish: function publishing merged statistics, for example statistics.add_stats.remote
+        :param flush_interval: max time (sec) between publishing of the statistics
+        :param flush_count: max number of statistics updates merged before publishing them
+        """
+        self.publish = publish
+        self.flush_interval = flush_interval
+        self.flush_count = flush_count
+        self.pending = {}
+        self.count = 0
+        self.last_publish = time.time()
+        # statistics can be added by the background writer threads
+        self.lock = threading.Lock()
+
+    def add_stats(self, stats: dict[str, Any]) -> None:
+        """
+        Add statistics, publishing all the accumulated ones if the time or the count interval expired
+        :param stats: dictionary of statistics deltas
+        :return: None
+        """
+        with self.lock:
+            for key, val in stats.items():
+                self.pending[key] = self.pending.get(key, 0) + val
+            self.count += 1
+            if self.count < self.flush_count and time.time() - self.last_publish < self.flush_interval:
+                return
+            pending = self._take()
+        self.publish(pending)
+
+    def flush(self) -> Any:
+        """
+        Publish all the accumulated statistics
+        :return: result of publishing, None if there was nothing to publish
+        """
+        with self.lock:
+            pending = self._take()
+        if len(pending) == 0:
+            return None
+        return self.publish(pending)
+
+    def _take(self) -> dict[str, Any]:
+        pending = self.pending
+        self.pending = {}
+        self.count = 0
+        self.last_publish = time.time()
+        return pending
+
+
+@ray.remote(num_cpus=0.1, scheduling_strategy="SPREAD")
+class TransformStatisticsAggregatorRay:
+    """
+    Intermediate statistics aggregator, merging statistics of a group of file processors and forwarding
+    them to the (root) statistics actor. Used to shard statistics collection for very wide jobs
+    """
+
+    def __init__(self, params: dict[str, Any]):
+        """
+        Init method
+        :param params: dictionary that has the following key
+            statistics: object reference to the parent statistics (root or another aggregator)
+            flush_interval: max time (sec) between forwarding of the statistics
+            flush_count: max number of statistics updates merged before forwarding them
+        """
+        self.parent = params["statistics"]
+        self.accumulator = StatisticsAccumulator(
+            publish=self.parent.add_stats.remote,
+            flush_interval=params.get("flush_interval", 5.0),
+            flush_count=params.get("flush_count", 100),
+        )
+
+    def add_stats(self, stats=dict[str, Any]) -> None:
+        """
+        Add statistics
+        :param stats - dictionary creating new statistics
+        :return: None
+        """
+        self.accumulator.add_stats(stats)
+
+    def flush(self) -> None:
+        """
+        Forward all the accumulated statistics to the parent, waiting for their delivery
+        :return: None
+        """
+        ref = self.accumulator.flush()
+        if ref is not None:
+            ray.get(ref)
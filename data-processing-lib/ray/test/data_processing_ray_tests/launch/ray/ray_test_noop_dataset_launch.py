@@ -0,0 +1,39 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+
+from data_processing.test_support.launch.transform_test import (
+    AbstractTransformLauncherTest,
+)
+from data_processing_ray.runtime.ray import RayTransformLauncher
+from data_processing_ray.test_support.transform import NOOPRayTransformConfiguration
+
+
+class TestRayNOOPDatasetTransform(AbstractTransformLauncherTest):
+    """
+    Runs the NOOP transform in the dataset execution mode and checks the output against the expected
+    output of the files mode. The name of this class MUST begin with the word Test so that pytest recognizes it
+    as a test class.
+    """
+
+    def get_test_transform_fixtures(self) -> list[tuple]:
+        basedir = "../../../../test-data/data_processing/ray/noop/"
+        basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), basedir))
+        launcher = RayTransformLauncher(NOOPRayTransformConfiguration())
+        cli_params = {"noop_sleep_sec": 0, "run_locally": True, "runtime_execution_mode": "dataset"}
+        fixtures = [(launcher, cli_params, basedir + "/input", basedir + "/expected")]
+        return fixtures
+
+    def _validate_directory_contents_match(self, dir: str, expected: str, ignore_columns: list[str] = []):
+        # Ray datasets choose their own output file names
+        self.validate_directory_tables(dir, expected, ignore_columns)
@@ -10,11 +10,23 @@
 # limitations under the License.
 ################################################################################
 
+import os
+import tempfile
+
 import pyarrow as pa
 import pytest
 import ray
-from data_processing.utils import GB, TransformUtils
-from data_processing_ray.runtime.ray import RayUtils, TransformStatisticsRay
+from data_processing.data_access import DataAccessFactory
+from data_processing.test_support.transform import NOOPTransform
+from data_processing.utils import GB, TransformUtils, UnrecoverableException, get_logger
+from data_processing_ray.runtime.ray import (
+    RayDatasetTransformMapper,
+    RayFileScheduler,
+    RayUtils,
+    StatisticsAccumulator,
+    TransformStatisticsAggregatorRay,
+    TransformStatisticsRay,
+)
 
 
 params = {}
@@ -103,3 +115,162 @@ def test_actor_creation():
     assert 1 == res["memory"] - res1["memory"]
 
     ray.shutdown()
+
+
+@ray.remote(max_restarts=-1)
+class _FileRecorder:
+    """
+    Test actor recording processed files, and dying the first time it sees a file named "die"
+    """
+
+    def __init__(self, marker_dir: str):
+        self.marker_dir = marker_dir
+        self.processed = []
+
+    def process_file(self, f_name: str) -> None:
+        marker = os.path.join(self.marker_dir, f_name)
+        if f_name == "die" and not os.path.exists(marker):
+            open(marker, "w").close()
+            os._exit(1)
+        self.processed.append(f_name)
+
+    def process_batch(self, f_names: list[str]) -> int:
+        for f_name in f_names:
+            self.process_file(f_name)
+        return len(f_names)
+
+    def get_processed(self) -> list[str]:
+        return self.processed
+
+
+def test_file_scheduler():
+    ray.init(num_cpus=1)
+    try:
+        with tempfile.TemporaryDirectory() as marker_dir:
+            actor = _FileRecorder.options(num_cpus=0.1).remote(marker_dir)
+            scheduler = RayFileScheduler(actors=[actor], logger=get_logger(__name__), tasks_per_actor=2)
+            # files are dispatched largest first
+            failures = scheduler.process_files(files=["a", "b", "c"], sizes=[1, 3, 2])
+            assert failures == 0
+            assert ray.get(actor.get_processed.remote()) == ["b", "c", "a"]
+            # files of a dead actor are re-queued
+            actor = _FileRecorder.options(num_cpus=0.1).remote(marker_dir)
+            scheduler = RayFileScheduler(actors=[actor], logger=get_logger(__name__), batch_size=2)
+            failures = scheduler.process_files(files=["a", "die", "b"])
+            assert failures == 0
+            assert scheduler.requeued == 1
+            assert sorted(ray.get(actor.get_processed.remote())) == ["a", "b", "die"]
+    finally:
+        ray.shutdown()
+
+
+def test_statistics_accumulator():
+    published = []
+    accumulator = StatisticsAccumulator(publish=published.append, flush_interval=1000, flush_count=2)
+    accumulator.add_stats({"source_files": 1, "source_size": 500})
+    assert published == []
+    accumulator.add_stats({"source_files": 1, "source_size": 300, "result_files": 1})
+    assert published == [{"source_files": 2, "source_size": 800, "result_files": 1}]
+    accumulator.add_stats({"result_files": 1})
+    accumulator.flush()
+    assert published[1:] == [{"result_files": 1}]
+    # nothing left to publish
+    assert accumulator.flush() is None and len(published) == 2
+
+
+def test_statistics_aggregator():
+    ray.init(num_cpus=1)
+    try:
+        statistics = TransformStatisticsRay.options(num_cpus=0.1).remote({})
+        aggregator = TransformStatisticsAggregatorRay.remote(
+            {"statistics": statistics, "flush_interval": 1000, "flush_count": 1000}
+        )
+        for _ in range(10):
+            aggregator.add_stats.remote({"source_files": 1, "source_size": 100})
+        ray.get(aggregator.flush.remote())
+        stats = ray.get(statistics.get_execution_stats.remote())
+        assert stats == {"source_files": 10, "source_size": 1000}
+    finally:
+        ray.shutdown()
+
+
+@ray.remote(num_cpus=0.1)
+class _Rebindable:
+    """
+    Test actor recording its parameters
+    """
+
+    def __init__(self, params: dict):
+        self.params = params
+
+    def rebind(self, params: dict) -> None:
+        self.params = params
+
+    def get_params(self) -> dict:
+        return self.params
+
+
+def test_warm_actors():
+    ray.init(num_cpus=1)
+    try:
+        actors = RayUtils.get_warm_actors(
+            clazz=_Rebindable, params={"run": 1}, actor_options={}, n_actors=2, lease="run1"
+        )
+        assert [ray.get(actor.get_params.remote()) for actor in actors] == [{"run": 1}] * 2
+        # a concurrent execution does not rebind the leased actors
+        other = RayUtils.get_warm_actors(
+            clazz=_Rebindable, params={"other": 1}, actor_options={}, n_actors=1, lease="other"
+        )
+        assert other[0]._actor_id not in [actor._actor_id for actor in actors]
+        assert [ray.get(actor.get_params.remote()) for actor in actors] == [{"run": 1}] * 2
+        # the next execution reuses the returned actors, rebinding them to its parameters
+        assert RayUtils.return_warm_actors(lease="run1") == 2
+        warm = RayUtils.get_warm_actors(
+            clazz=_Rebindable, params={"run": 2}, actor_options={}, n_actors=2, lease="run2"
+        )
+        assert [actor._actor_id for actor in warm] == [actor._actor_id for actor in actors]
+        assert [ray.get(actor.get_params.remote()) for actor in warm] == [{"run": 2}] * 2
+        # actors of a different pool are separate
+        named = RayUtils.get_warm_actors(
+            clazz=_Rebindable, params={"run": 3}, actor_options={}, n_actors=1, lease="run3", pool_name="job"
+        )
+        assert named[0]._actor_id not in [actor._actor_id for actor in warm + other]
+        # leased actors are not killed, unless released by their execution
+        assert RayUtils.release_warm_actors(pool_name="job") == 0
+        assert RayUtils.release_warm_actors(pool_name="job", lease="run3") == 1
+        assert RayUtils.return_warm_actors(lease="other") == 1
+        assert RayUtils.release_warm_actors(lease="run2") == 3
+    finally:
+        ray.shutdown()
+
+
+class _BufferingTransform(NOOPTransform):
+    """
+    Test transform buffering tables until flush
+    """
+
+    def flush(self) -> tuple[list[pa.Table], dict]:
+        return [], {}
+
+
+def test_dataset_mapper():
+    ray.init(num_cpus=1)
+    try:
+        statistics = TransformStatisticsRay.remote({})
+        mapper = RayDatasetTransformMapper(
+            data_access_factory=DataAccessFactory(),
+            transform_class=NOOPTransform,
+            transform_params={"sleep_sec": 0},
+            statistics=statistics,
+        )
+        table = _create_table()
+        assert list(mapper(table)) == [table]
+        # empty batches are skipped
+        assert list(mapper(table.slice(0, 0))) == []
+        stats = ray.get(statistics.get_execution_stats.remote())
+        assert stats["source_doc_count"] == 3 and stats["result_doc_count"] == 3
+        # transforms buffering data until flush are rejected
+        with pytest.raises(UnrecoverableException):
+            RayDatasetTransformMapper.validate_transform(_BufferingTransform)
+    finally:
+        ray.shutdown()
@@ -12,6 +12,11 @@
 from data_processing_spark.runtime.spark.transform_runtime import DefaultSparkTransformRuntime
 from data_processing_spark.runtime.spark.execution_configuration import SparkTransformExecutionConfiguration
 from data_processing_spark.runtime.spark.runtime_configuration import SparkTransformRuntimeConfiguration
+from data_processing_spark.runtime.spark.pipeline_transform_runtime import (
+    SparkPipelineTransformRuntime,
+    SparkPipelineTransformRuntimeConfiguration,
+)
 from data_processing_spark.runtime.spark.transform_file_processor import SparkTransformFileProcessor
+from data_processing_spark.runtime.spark.dataframe_processor import SparkDataFrameTransformProcessor
 from data_processing_spark.runtime.spark.transform_orchestrator import orchestrate
 from data_processing_spark.runtime.spark.transform_launcher import SparkTransformLauncher
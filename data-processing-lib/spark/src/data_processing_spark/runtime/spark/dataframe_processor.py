@@ -0,0 +1,289 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import math
+import time
+from typing import Any, Callable, Iterator
+
+import pyarrow as pa
+from data_processing.data_access import DataAccess, DataAccessFactoryBase, DataAccessS3
+from data_processing.transform import AbstractTableTransform, TransformStatistics
+from data_processing.utils import MB, UnrecoverableException, get_logger
+from data_processing_spark.runtime.spark import SparkTransformRuntimeConfiguration
+from pyspark import Accumulator, AccumulatorParam, Broadcast, TaskContext
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql.pandas.types import from_arrow_schema, to_arrow_schema
+
+
+logger = get_logger(__name__)
+
+# number of rows used to infer the schema of the transform output
+SCHEMA_SAMPLE_ROWS = 100
+
+
+class _StatisticsAccumulatorParam(AccumulatorParam):
+    """
+    Spark accumulator of the statistics dictionaries of the partitions, keyed by the partition id. Spark can
+    execute a partition more than once (task retries, speculative execution or recomputation of lost shuffle
+    outputs) and accumulators updated in transformations receive the updates of all the successful executions,
+    so the statistics of a partition are replaced, instead of summed up, to count every partition once
+    """
+
+    def zero(self, value: dict[int, dict[str, Any]]) -> dict[int, dict[str, Any]]:
+        return {}
+
+    def addInPlace(
+        self, value1: dict[int, dict[str, Any]], value2: dict[int, dict[str, Any]]
+    ) -> dict[int, dict[str, Any]]:
+        value1.update(value2)
+        return value1
+
+
+def _to_arrow(data_frame: DataFrame) -> pa.Table:
+    """
+    Collect a (small) data frame as an Arrow table
+    :param data_frame: data frame
+    :return: table
+    """
+    if hasattr(data_frame, "toArrow"):
+        # pyspark 4.0 and later
+        return data_frame.toArrow()
+    batches = data_frame._collect_as_arrow()
+    if len(batches) == 0:
+        return to_arrow_schema(data_frame.schema).empty_table()
+    return pa.Table.from_batches(batches)
+
+
+class SparkDataFrameTransformProcessor:
+    """
+    Processor executing a table transform over the input files read as a Spark DataFrame. The transform is
+    applied to the Arrow record batches of the DataFrame partitions (using mapInArrow) and the results are
+    written by Spark's parquet writer. Unlike the file based execution, the input is split into balanced
+    partitions by Spark's parquet reader, independently of the input file sizes, and the output files are
+    sized by Spark's writer. As a result, the transform sees record batches, not whole files, so this is
+    only suitable for row-local transforms (filter, doc_quality, lang_id, etc.)
+    """
+
+    def __init__(
+        self,
+        spark_session: SparkSession,
+        data_access_factory: DataAccessFactoryBase,
+        runtime_configuration: SparkTransformRuntimeConfiguration,
+        bcast_params: dict[str, Any],
+        target_file_size: int = 128 * MB,
+    ):
+        """
+        Init method
+        :param spark_session: spark session
+        :param data_access_factory: data access factory
+        :param runtime_configuration: transform runtime configuration
+        :param bcast_params: broadcast transform parameters
+        :param target_file_size: target size of the input partitions and of the output files, 0 to use
+                                 Spark's defaults
+        """
+        self.spark_session = spark_session
+        self.data_access_factory = data_access_factory
+        self.runtime_configuration = runtime_configuration
+        self.bcast_params = bcast_params
+        self.target_file_size = target_file_size
+        self.num_partitions = 0
+        transform_class = runtime_configuration.get_transform_class()
+        if not issubclass(transform_class, AbstractTableTransform):
+            raise UnrecoverableException(f"data frame execution requires a table transform, got {transform_class}")
+
+    def process(self, files: list[str], sizes: list[int]) -> dict[str, Any]:
+        """
+        Process files
+        :param files: list of files to process
+        :param sizes: list of file sizes
+        :return: execution statistics
+        """
+        data_access = self.data_access_factory.create_data_access()
+        self._configure_data_access(data_access)
+        if self.target_file_size > 0:
+            self.spark_session.conf.set("spark.sql.files.maxPartitionBytes", str(self.target_file_size))
+        source = self.spark_session.read.parquet(*[self._get_path(data_access, f) for f in files])
+        self.num_partitions = source.rdd.getNumPartitions()
+        logger.info(f"Reading {len(files)} files in {self.num_partitions} partitions")
+        # the output schema has to be known upfront
+        schema = self._get_output_schema(source)
+        sc = self.spark_session.sparkContext
+        statistics = sc.accumulator({}, _StatisticsAccumulatorParam())
+        result = source.mapInArrow(
+            _create_batch_processor(
+                runtime_configuration=self.runtime_configuration,
+                data_access_factory=self.data_access_factory,
+                bcast_params=sc.broadcast(self.bcast_params),
+                schema=schema,
+                statistics=statistics,
+            ),
+            schema=from_arrow_schema(schema),
+        )
+        if self.target_file_size > 0:
+            # output size is estimated using the input one
+            result = result.repartition(max(1, math.ceil(sum(sizes) / self.target_file_size)))
+        result.write.mode("append").parquet(self._get_path(data_access, data_access.get_output_folder()))
+        # sum up statistics of the partitions
+        execution_stats = TransformStatistics()
+        for partition_stats in statistics.value.values():
+            execution_stats.add_stats(partition_stats)
+        return execution_stats.get_execution_stats() | {"source_files": len(files), "source_size": sum(sizes)}
+
+    def _get_output_schema(self, source: DataFrame) -> pa.Schema:
+        """
+        Get the schema of the transform output. The transform is first applied to an empty table with the
+        input schema, so that no data has to be collected on the driver. Transforms that produce no tables for
+        empty input are applied to a sample of the input. If neither produces a table, the input schema is used
+        :param source: input data frame
+        :return: output schema
+        """
+        input_schema = to_arrow_schema(source.schema)
+        transform = self._create_schema_transform()
+        try:
+            out_tables, _ = transform.transform(table=input_schema.empty_table())
+        except Exception as e:
+            logger.debug(f"Failed to transform an empty table ({e}), using a sample of the input")
+            out_tables = []
+        if len(out_tables) == 0:
+            sample = _to_arrow(source.limit(SCHEMA_SAMPLE_ROWS))
+            out_tables, _ = self._create_schema_transform().transform(table=sample)
+        if len(out_tables) == 0:
+            logger.warning("transform produced no output tables to get the schema from, using the input schema")
+            return input_schema
+        # tables can be empty, but they still carry the schema
+        return out_tables[0].schema
+
+    def _create_schema_transform(self) -> AbstractTableTransform:
+        """
+        Create transform used to get the output schema on the driver
+        :return: transform
+        """
+        return _create_transform(
+            runtime_configuration=self.runtime_configuration,
+            data_access_factory=self.data_access_factory,
+            bcast_params=self.bcast_params,
+            partition=0,
+            statistics=TransformStatistics(),
+        )
+
+    def _configure_data_access(self, data_access: DataAccess) -> None:
+        """
+        Configure Spark (Hadoop S3A file system) to access S3 data
+        :param data_access: data access
+        :return: None
+        """
+        if not isinstance(data_access, DataAccessS3):
+            return
+        hadoop_config = self.spark_session.sparkContext._jsc.hadoopConfiguration()
+        credentials = self.data_access_factory.s3_cred
+        hadoop_config.set("fs.s3a.access.key", credentials.get("access_key"))
+        hadoop_config.set("fs.s3a.secret.key", credentials.get("secret_key"))
+        if credentials.get("url", None) is not None:
+            hadoop_config.set("fs.s3a.endpoint", credentials.get("url"))
+            hadoop_config.set("fs.s3a.path.style.access", "true")
+
+    @staticmethod
+    def _get_path(data_access: DataAccess, path: str) -> str:
+        """
+        Convert data access path to Spark path
+        :param data_access: data access
+        :param path: path
+        :return: Spark path
+        """
+        if isinstance(data_access, DataAccessS3):
+            return f"s3a://{path}"
+        return path
+
+
+def _create_transform(
+    runtime_configuration: SparkTransformRuntimeConfiguration,
+    data_access_factory: DataAccessFactoryBase,
+    bcast_params: dict[str, Any],
+    partition: int,
+    statistics: TransformStatistics,
+) -> AbstractTableTransform:
+    """
+    Create transform for a given partition
+    :param runtime_configuration: transform runtime configuration
+    :param data_access_factory: data access factory
+    :param bcast_params: broadcast transform parameters
+    :param partition: partition number
+    :param statistics: partition statistics
+    :return: transform
+    """
+    runtime = runtime_configuration.create_transform_runtime()
+    transform_params = (
+        runtime.get_transform_config(
+            partition=partition, data_access_factory=data_access_factory, statistics=statistics
+        )
+        | bcast_params
+    )
+    transform_params["data_access"] = data_access_factory.create_data_access()
+    transform_params["statistics"] = statistics
+    return runtime_configuration.get_transform_class()(transform_params)
+
+
+def _create_batch_processor(
+    runtime_configuration: SparkTransformRuntimeConfiguration,
+    data_access_factory: DataAccessFactoryBase,
+    bcast_params: Broadcast,
+    schema: pa.Schema,
+    statistics: Accumulator,
+) -> Callable[[Iterator[pa.RecordBatch]], Iterator[pa.RecordBatch]]:
+    """
+    Create function transforming the record batches of a partition. It is executed by Spark executors, so it
+    can only reference serializable objects
+    :param runtime_configuration: transform runtime configuration
+    :param data_access_factory: data access factory
+    :param bcast_params: broadcast transform parameters
+    :param schema: output schema
+    :param statistics: accumulator of the statistics of the partitions
+    :return: function for mapInArrow
+    """
+
+    def conform(table: pa.Table) -> list[pa.RecordBatch]:
+        return table.select(schema.names).cast(schema).to_batches()
+
+    def process_batches(batches: Iterator[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+        partition_stats = TransformStatistics()
+        partition = TaskContext.get().partitionId()
+        transform = _create_transform(
+            runtime_configuration=runtime_configuration,
+            data_access_factory=data_access_factory,
+            bcast_params=bcast_params.value,
+            partition=partition,
+            statistics=partition_stats,
+        )
+        for batch in batches:
+            if batch.num_rows == 0:
+                continue
+            t_start = time.time()
+            table = pa.Table.from_batches([batch])
+            out_tables, stats = transform.transform(table=table)
+            partition_stats.add_stats(
+                stats
+                | {
+                    "source_doc_count": table.num_rows,
+                    "result_doc_count": sum(t.num_rows for t in out_tables),
+                    "processing_time": time.time() - t_start,
+                }
+            )
+            for out_table in out_tables:
+                yield from conform(out_table)
+        out_tables, stats = transform.flush()
+        partition_stats.add_stats(stats | {"result_doc_count": sum(t.num_rows for t in out_tables)})
+        for out_table in out_tables:
+            yield from conform(out_table)
+        runtime_configuration.create_transform_runtime().compute_execution_stats(partition_stats)
+        statistics.add({partition: partition_stats.get_execution_stats()})
+
+    return process_batches
@@ -17,6 +17,10 @@ from data_processing.runtime import TransformExecutionConfiguration, runtime_cli
 from data_processing.utils import CLIArgumentProvider, get_logger
 
 
+execution_modes = ["files", "dataframe"]
+""" Supported execution modes """
+
+
 logger = get_logger(__name__)
 
 
@@ -31,6 +35,10 @@ class SparkTransformExecutionConfiguration(TransformExecutionConfiguration):
         """
         super().__init__(name=name, print_params=False)
         self.parallelization = -1
+        self.read_ahead = 0
+        self.write_behind = 0
+        self.execution_mode = "files"
+        self.target_file_size_mb = 128
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
         """
@@ -51,6 +59,34 @@ class SparkTransformExecutionConfiguration(TransformExecutionConfiguration):
         (number of workers).    
         """
         parser.add_argument(f"--{runtime_cli_prefix}parallelization", type=int, default=-1, help="parallelization.")
+        parser.add_argument(
+            f"--{runtime_cli_prefix}read_ahead",
+            type=int,
+            default=0,
+            help="number of files a partition downloads in the background while the current one is transformed",
+        )
+        parser.add_argument(
+            f"--{runtime_cli_prefix}write_behind",
+            type=int,
+            default=0,
+            help="max number of output files a partition writes in the background, 0 disables it",
+        )
+        parser.add_argument(
+            f"--{runtime_cli_prefix}execution_mode",
+            type=str,
+            default="files",
+            choices=execution_modes,
+            help="execution mode: files - every partition processes a set of input files using data access, "
+            "dataframe - input is read as a Spark DataFrame, a table transform is applied to its Arrow record "
+            "batches and the result is written by Spark (only for row-local table transforms)",
+        )
+        parser.add_argument(
+            f"--{runtime_cli_prefix}target_file_size_mb",
+            type=int,
+            default=128,
+            help="dataframe execution mode: target size (MB) of the input partitions and of the output files, "
+            "0 uses Spark defaults",
+        )
         return TransformExecutionConfiguration.add_input_params(self, parser=parser)
 
     def apply_input_params(self, args: argparse.Namespace) -> bool:
@@ -70,9 +106,21 @@ class SparkTransformExecutionConfiguration(TransformExecutionConfiguration):
             "job id": captured["job_id"],
         }
         self.parallelization = captured["parallelization"]
+        self.read_ahead = captured["read_ahead"]
+        self.write_behind = captured["write_behind"]
+        self.execution_mode = captured["execution_mode"]
+        self.target_file_size_mb = captured["target_file_size_mb"]
+        if self.read_ahead < 0 or self.write_behind < 0:
+            logger.error(f"read ahead {self.read_ahead} and write behind {self.write_behind} can not be negative")
+            return False
+        if self.target_file_size_mb < 0:
+            logger.error(f"target file size {self.target_file_size_mb} can not be negative")
+            return False
         # if the user did not define actor max_restarts set it up for fault tolerance
         logger.info(f"job details {self.job_details}")
         logger.info(f"RDD parallelization {self.parallelization}")
+        logger.info(f"read ahead {self.read_ahead}, write behind {self.write_behind}")
+        logger.info(f"execution mode {self.execution_mode}, target file size {self.target_file_size_mb} MB")
         return True
 
     def get_input_params(self) -> dict[str, Any]:
@@ -82,4 +130,8 @@ class SparkTransformExecutionConfiguration(TransformExecutionConfiguration):
         """
         return {
             "RDD parallelization": self.parallelization,
+            "read ahead": self.read_ahead,
+            "write behind": self.write_behind,
+            "execution mode": self.execution_mode,
+            "target file size MB": self.target_file_size_mb,
         }
@@ -10,6 +10,7 @@
 # limitations under the License.
 ################################################################################
 
+import itertools
 import os
 import socket
 import time
@@ -19,8 +20,9 @@ from datetime import datetime
 import yaml
 from data_processing.data_access import DataAccessFactoryBase
 from data_processing.transform import TransformStatistics, AbstractFolderTransform
-from data_processing.utils import GB, get_logger
+from data_processing.utils import GB, MB, get_logger
 from data_processing_spark.runtime.spark import (
+    SparkDataFrameTransformProcessor,
     SparkTransformExecutionConfiguration,
     SparkTransformFileProcessor,
     SparkTransformRuntimeConfiguration,
@@ -94,6 +96,12 @@ def orchestrate(
     if data_access is None:
         logger.error("No DataAccess instance provided - exiting")
         return 1
+    if data_access.is_process_local():
+        logger.error(
+            "memory data access keeps the files in the memory of the orchestrator process, so they are not visible "
+            "to the Spark executors - use shared memory (--data_memory_shared True) instead"
+        )
+        return 1
     # initialize Spark
     spark_session = _init_spark(runtime_config)
     sc = spark_session.sparkContext
@@ -101,6 +109,8 @@ def orchestrate(
     spark_runtime_config = sc.broadcast(runtime_config)
     daf = sc.broadcast(data_access_factory)
     spark_bcast_params = sc.broadcast(bcast_params)
+    read_ahead = execution_configuration.read_ahead
+    write_behind = execution_configuration.write_behind
 
     def process_partition(iterator):
         """
@@ -121,24 +131,24 @@ def orchestrate(
             runtime_configuration=runtime_conf,
             statistics=statistics,
             is_folder=is_folder,
+            read_ahead=read_ahead,
+            write_behind=write_behind,
         )
-        first = True
-        for f in iterator:
-            # for every file
-            if first:
-                logger.debug(f"partition {f}")
-                # add additional parameters
-                transform_params = (
-                    runtime.get_transform_config(
-                        partition=int(f[1]), data_access_factory=d_access_factory, statistics=statistics
-                    )
-                    | bcast_params
+        first = next(iterator, None)
+        if first is not None:
+            logger.debug(f"partition {first}")
+            # add additional parameters
+            transform_params = (
+                runtime.get_transform_config(
+                    partition=int(first[1]), data_access_factory=d_access_factory, statistics=statistics
                 )
-                # create transform with partition number
-                file_processor.create_transform(transform_params)
-                first = False
-            # process file
-            file_processor.process_file(f_name=f[0])
+                | bcast_params
+            )
+            # create transform with partition number
+            file_processor.create_transform(transform_params)
+            # process files, downloading the next ones in the background, if configured
+            for _ in file_processor.process_files(itertools.chain([first[0]], (f[0] for f in iterator))):
+                pass
         # flush
         file_processor.flush()
         # enhance statistics
@@ -156,24 +166,39 @@ def orchestrate(
             logger.info(f"Number of folders is {len(files)}")        # Get files to process
         else:
             # Get files to process
-            files, profile, retries = data_access.get_files_to_process()
+            # Spark's parquet reader splits the input files itself in the data frame mode
+            files, profile, retries = data_access.get_files_to_process(
+                split_files=execution_configuration.execution_mode != "dataframe"
+            )
             if len(files) == 0:
                 logger.error("No input files to process - exiting")
                 return 0
             logger.info(f"Number of files is {len(files)}, source profile {profile}")
-        # process data
-        logger.debug("Begin processing files")
-        # process files split by partitions
-        logger.debug(f"parallelization {execution_configuration.parallelization}")
-        if execution_configuration.parallelization > 0:
-            source_rdd = sc.parallelize(files, execution_configuration.parallelization)
+        if execution_configuration.execution_mode == "dataframe":
+            # process files as a data frame
+            processor = SparkDataFrameTransformProcessor(
+                spark_session=spark_session,
+                data_access_factory=data_access_factory,
+                runtime_configuration=runtime_config,
+                bcast_params=bcast_params,
+                target_file_size=execution_configuration.target_file_size_mb * MB,
+            )
+            stats = processor.process(files=files, sizes=data_access.get_file_sizes(files))
+            num_partitions = processor.num_partitions
         else:
-            source_rdd = sc.parallelize(files)
-        num_partitions = source_rdd.getNumPartitions()
-        logger.info(f"Parallelizing execution. Using {num_partitions} partitions")
-        stats_rdd = source_rdd.zipWithIndex().mapPartitions(process_partition)
-        # build overall statistics
-        stats = dict(stats_rdd.reduceByKey(lambda a, b: a + b).collect())
+            # process data
+            logger.debug("Begin processing files")
+            # process files split by partitions
+            logger.debug(f"parallelization {execution_configuration.parallelization}")
+            if execution_configuration.parallelization > 0:
+                source_rdd = sc.parallelize(files, execution_configuration.parallelization)
+            else:
+                source_rdd = sc.parallelize(files)
+            num_partitions = source_rdd.getNumPartitions()
+            logger.info(f"Parallelizing execution. Using {num_partitions} partitions")
+            stats_rdd = source_rdd.zipWithIndex().mapPartitions(process_partition)
+            # build overall statistics
+            stats = dict(stats_rdd.reduceByKey(lambda a, b: a + b).collect())
         return_code = 0
         status = "success"
     except Exception as e:
@@ -0,0 +1,43 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+
+from data_processing.test_support.launch.transform_test import (
+    AbstractTransformLauncherTest,
+)
+from data_processing_spark.runtime.spark import SparkTransformLauncher
+from data_processing_spark.test_support.transform import NOOPSparkTransformConfiguration
+
+
+class TestSparkNOOPDataFrameTransform(AbstractTransformLauncherTest):
+    """
+    Runs the NOOP transform in the dataframe execution mode (mapInArrow over the input read as a DataFrame and
+    written by Spark), both with the default repartitioning of the output and with Spark defaults.
+    The name of this class MUST begin with the word Test so that pytest recognizes it as a test class.
+    """
+
+    def get_test_transform_fixtures(self) -> list[tuple]:
+        basedir = "../../../../test-data"
+        basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), basedir))
+        fixtures = []
+        launcher = SparkTransformLauncher(NOOPSparkTransformConfiguration())
+        cli_params = {"noop_sleep_sec": 0, "runtime_execution_mode": "dataframe"}
+        fixtures.append((launcher, cli_params, basedir + "/input", basedir + "/expected"))
+        fixtures.append(
+            (launcher, cli_params | {"runtime_target_file_size_mb": 0}, basedir + "/input", basedir + "/expected")
+        )
+        return fixtures
+
+    def _validate_directory_contents_match(self, dir: str, expected: str, ignore_columns: list[str] = []):
+        # Spark writer names the output files
+        self.validate_directory_tables(dir, expected, ignore_columns)
@@ -18,7 +18,7 @@ import uuid
 import zipfile
 from argparse import ArgumentParser, Namespace
 from datetime import datetime
-from typing import Any
+from typing import Any, BinaryIO
 
 import pyarrow as pa
 from data_processing.data_access import DataAccess, DataAccessFactory
@@ -105,13 +105,20 @@ class CodeToParquetTransform(AbstractBinaryTransform):
         """
         Converts raw data file (ZIP) to Parquet format
         """
+        return self.transform_stream(file_name=file_name, stream=io.BytesIO(bytes(byte_array)))
+
+    def transform_stream(self, file_name: str, stream: BinaryIO) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        """
+        Converts raw data file (ZIP) to Parquet format, reading the archive members one at a time from the
+        stream, so that the archive is not read into memory as a whole
+        """
         # We currently only process .zip files
         if TransformUtils.get_file_extension(file_name)[1] != ".zip":
             self.logger.warning(f"Got unsupported file type {file_name}, skipping")
             return [], {}
         data = []
         number_of_rows = 0
-        with zipfile.ZipFile(io.BytesIO(bytes(byte_array))) as opened_zip:
+        with zipfile.ZipFile(stream) as opened_zip:
             # Loop through each file member in the ZIP archive
             for member in opened_zip.infolist():
                 if not member.is_dir():
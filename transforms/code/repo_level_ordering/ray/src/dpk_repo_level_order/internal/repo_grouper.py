@@ -82,34 +82,17 @@ class GroupByRepo:
         """This function reads the files and filters the tables based on grouping_column value"""
         dfs = []
         for file in files:
-            table, _ = self.data_access.get_table(os.path.normpath(file))
             # filtering each table is more memory efficient than
-            # reading all tables and filtering later.
-            filtered_table = self._filter_table_by_column(table, grouping_column, group)
+            # reading all tables and filtering later. Row groups without
+            # the group's rows (based on their statistics) are not read at all.
+            filtered_table, _ = self.data_access.get_table(
+                os.path.normpath(file), filters=[(grouping_column, "==", group)]
+            )
             dfs.append(filtered_table.to_pandas())
         df = pd.concat(dfs)
 
         return pa.Table.from_pandas(df)
 
-    def _filter_table_by_column(self, table: pa.Table, column_name: str, column_value: str) -> pa.Table:
-        """
-        Filters rows in a PyArrow table based on the specified column value.
-
-        Args:
-            table (pa.Table): The input PyArrow table.
-            column_name (str): The name of the column to filter.
-            column_value (str): The value to match in the specified column.
-
-        Returns:
-            pa.Table: A new table containing only rows where the specified column has the given value.
-        """
-
-        column_data = table.column(column_name)
-        row_mask = pa.compute.equal(column_data, column_value)
-        filtered_table = table.filter(row_mask)
-
-        return filtered_table
-
 
 @ray.remote(scheduling_strategy="SPREAD")
 class GroupByRepoActor(GroupByRepo):
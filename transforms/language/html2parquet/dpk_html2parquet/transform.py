@@ -15,7 +15,7 @@ import io
 import zipfile
 from argparse import ArgumentParser, Namespace
 from datetime import datetime
-from typing import Any
+from typing import Any, BinaryIO
 
 import pyarrow as pa
 import trafilatura
@@ -101,6 +101,13 @@ class Html2ParquetTransform(AbstractBinaryTransform):
     def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
         """
         Converts raw data file (ZIP) / raw HTMLs to Parquet format
+        """
+        return self.transform_stream(file_name=file_name, stream=io.BytesIO(bytes(byte_array)))
+
+    def transform_stream(self, file_name: str, stream: BinaryIO) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        """
+        Converts raw data file (ZIP) / raw HTMLs to Parquet format, reading ZIP archive members one at a time
+        from the stream, so that the archive is not read into memory as a whole
 
         If file_name is detected as a HTML file, it generates a pyarrow table with a single row
         that contains the document converted to a text string.
@@ -116,7 +123,7 @@ class Html2ParquetTransform(AbstractBinaryTransform):
 
         # Process ZIP archive of HTML documents
         if TransformUtils.get_file_extension(file_name)[1] == ".zip":
-            with zipfile.ZipFile(io.BytesIO(bytes(byte_array))) as opened_zip:
+            with zipfile.ZipFile(stream) as opened_zip:
                 # Loop through each file member in the ZIP archive
                 for member in opened_zip.infolist():
                     if not member.is_dir() and TransformUtils.get_file_extension(member.filename)[1] == ".html":
@@ -137,9 +144,8 @@ class Html2ParquetTransform(AbstractBinaryTransform):
         # Process single HTML documents
         elif TransformUtils.get_file_extension(file_name)[1] == ".html":
             try:
-                buf = io.BytesIO(bytes(byte_array))
                 # Read the content of the HTML file
-                content_bytes = buf.read()
+                content_bytes = stream.read()
 
                 row_data = self.convert_html2parquet(
                     member_filename=None, file_name=file_name, content_bytes=content_bytes
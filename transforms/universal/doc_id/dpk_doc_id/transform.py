@@ -79,6 +79,8 @@ class DocIDTransformBase(AbstractTableTransform):
         """
         # Make sure that the param name corresponds to the name used in apply_input_params method
         super().__init__(config)
+        # ids are assigned row by row, so inputs are processed one row group at a time
+        self.streamable = True
         self.doc_column = config.get(doc_column_name_key, doc_column_name_default)
         self.hash_column = config.get(hash_column_name_key, None)
         self.int_column = config.get(int_column_name_key, None)
@@ -10,9 +10,11 @@
 # limitations under the License.
 ################################################################################
 
+import os
 from typing import Tuple
 
 import pyarrow as pa
+import pyarrow.parquet as pq
 from data_processing.test_support.transform import AbstractTableTransformTest
 from data_processing.utils import TransformUtils
 from dpk_doc_id.transform import (
@@ -56,3 +58,23 @@ class TestDocIDTransform(AbstractTableTransformTest):
         }
         fixtures.append((DocIDTransform(config), [table], [expected_table], expected_metadata_list))
         return fixtures
+
+
+def test_doc_id_streaming():
+    basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../test-data"))
+    config = {
+        doc_column_name_key: "contents",
+        hash_column_name_key: "hash_column",
+        int_column_name_key: "int_id_column",
+        id_generator_key: IDGenerator(5),
+    }
+    transform = DocIDTransform(config)
+    assert transform.streamable
+    # write the input in multiple row groups, ids are assigned one row group at a time
+    sink = pa.BufferOutputStream()
+    pq.write_table(pq.read_table(os.path.join(basedir, "input", "sample1.parquet")), sink, row_group_size=2)
+    out_files, metadata = transform.transform_binary(file_name="sample1.parquet", byte_array=sink.getvalue())
+    assert len(out_files) == 1
+    assert metadata == {"source_doc_count": 5, "result_doc_count": 5}
+    expected_table = pq.read_table(os.path.join(basedir, "expected", "sample1.parquet"))
+    assert pq.read_table(pa.BufferReader(out_files[0][0])) == expected_table
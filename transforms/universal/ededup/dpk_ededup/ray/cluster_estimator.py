@@ -13,6 +13,7 @@
 import math
 
 from data_processing.utils import GB
+from dpk_ededup.transform_base import DIGEST_SIZE
 
 
 """
@@ -36,7 +37,9 @@ hash_cpu = 0.5
 
 print(f"suggested number of workers {n_workers}")
 
-n_hashes = math.ceil(number_of_docs * 32 / GB)
+# hash actors keep DIGEST_SIZE bytes per document, a merge of the recent hashes temporarily doubles it.
+# Each hash actor gets 2GB of memory
+n_hashes = math.ceil(number_of_docs * DIGEST_SIZE / GB)
 required_hash_cpu = n_hashes * hash_cpu
 required_hash_mem = n_hashes * 2
 
@@ -10,14 +10,13 @@
 # limitations under the License.
 ################################################################################
 
-import pickle
 import sys
 from argparse import ArgumentParser, Namespace
 from typing import Any
 
 import ray
 from data_processing.data_access import DataAccessFactoryBase, SnapshotUtils
-from data_processing.utils import ParamsUtils, TransformUtils, UnrecoverableException
+from data_processing.utils import ParamsUtils, UnrecoverableException
 from data_processing_ray.runtime.ray import (
     DefaultRayTransformRuntime,
     RayTransformLauncher,
@@ -64,9 +63,10 @@ class EdedupRayTransform(EdedupTransformBase):
         """
         # Build requests - We are building requests for individual hash actors
         request = [[] for _ in range(len(self.hashes))]
-
-        for h in hd.keys():
-            request[TransformUtils.str_to_int(h) % len(self.hashes)].append(h)
+        hashes = list(hd.keys())
+        partitions = HashFilter.get_partitions(HashFilter.to_digests(hashes), len(self.hashes))
+        for h, partition in zip(hashes, partitions):
+            request[partition].append(h)
 
         # Submit requests to appropriate hash actors
         remote_replies = []
@@ -153,13 +153,12 @@ class EdedupRayRuntime(DefaultRayTransformRuntime):
         for file in files.values():
             # convert the file
             try:
-                snaps = pickle.loads(file)
+                snaps = HashFilter.load_snapshot(file)
             except Exception as e:
                 self.logger.warning(f"Failed to load hashes with exception {e}")
                 raise UnrecoverableException("failed to load hashes")
-            request = [[] for _ in range(len(self.filters))]
-            for h in snaps:
-                request[TransformUtils.str_to_int(h) % len(self.filters)].append(h)
+            partitions = HashFilter.get_partitions(snaps, len(self.filters))
+            request = [snaps[partitions == i] for i in range(len(self.filters))]
             # Submit requests to appropriate hash actors
             remote_replies = []
             i = 0
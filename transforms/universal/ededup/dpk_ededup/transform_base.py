@@ -10,11 +10,15 @@
 # limitations under the License.
 ################################################################################
 
+import hashlib
 import pickle
+import string
 from argparse import ArgumentParser, Namespace
-from typing import Any
+from typing import Any, Union
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 from data_processing.data_access import SnapshotUtils
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
 from data_processing.utils import (
@@ -28,6 +32,17 @@ from data_processing.utils import (
 
 
 REQUEST_LEN = 8192
+# size of the binary hash digest (prefix of sha256) kept by the hash filter
+DIGEST_SIZE = 16
+DIGEST_DTYPE = np.dtype(f"S{DIGEST_SIZE}")
+# header of the binary hash filter snapshot
+SNAPSHOT_MAGIC = b"DPKEDH01"
+# minimal number of recently added hashes triggering merge
+MERGE_THRESHOLD = 65536
+# characters removed by document normalization, see TransformUtils.normalize_string
+NORMALIZE_REMOVED = f" \n{string.punctuation}".encode("utf-8")
+# characters, lower case of which depends on the context
+SPECIAL_CASE_CHARACTERS = "\u0130\u03a3"
 short_name = "ededup"
 cli_prefix = f"{short_name}_"
 doc_column_name_key = "doc_column"
@@ -42,7 +57,10 @@ snapshot_directory_cli_param = f"{cli_prefix}{snapshot_directory_key}"
 
 class HashFilter:
     """
-    Implements hash
+    Implements hash filter. Hashes are kept as fixed width binary digests (prefixes of the
+    sha256 hex strings) in sorted numpy arrays - a large main one and a small one for the
+    recently added hashes, that is periodically merged into the main one. This requires
+    DIGEST_SIZE bytes per hash, compared to over 100 bytes for a python set of hex strings
     """
 
     def __init__(self, params: dict[str, Any]):
@@ -51,30 +69,64 @@ class HashFilter:
         """
         self.logger = get_logger(__name__)
         self.actor_id = params.get("id", 1)
+        self.hashes = np.empty(0, dtype=DIGEST_DTYPE)
+        self.recent = np.empty(0, dtype=DIGEST_DTYPE)
         data_access_factory = params.get("data_access_factory", None)
         if data_access_factory is None:
             self.data_access = None
-            self.hashes = set()
         else:
             self.data_access = data_access_factory.create_data_access()
             snapshot = params.get("snapshot", None)
-            if snapshot is None:
-                self.hashes = set()
-            else:
+            if snapshot is not None:
                 try:
                     b_hashes, _ = self.data_access.get_file(snapshot)
-                    self.hashes = pickle.loads(b_hashes)
+                    self.add_hashes(HashFilter.load_snapshot(b_hashes))
                 except Exception as e:
                     self.logger.warning(f"Failed to load hashes collector {self.actor_id} with exception {e}")
                     raise UnrecoverableException("failed to load hashes")
 
-    def add_hashes(self, hashes: set[str]) -> None:
+    @staticmethod
+    def to_digests(hashes: list[str]) -> np.ndarray:
+        """
+        Convert sha256 hex strings to binary digests
+        :param hashes: list of hex strings
+        :return: numpy array of digests
+        """
+        return np.frombuffer(bytes.fromhex("".join([h[: 2 * DIGEST_SIZE] for h in hashes])), dtype=DIGEST_DTYPE)
+
+    @staticmethod
+    def get_partitions(digests: np.ndarray, n_partitions: int) -> np.ndarray:
+        """
+        Get partitions (hash actor indexes) of the digests. Partition is defined by the first 8 bytes of the digest,
+        so that it can be computed both for hex strings and for the digests read from snapshots
+        :param digests: numpy array of digests
+        :param n_partitions: number of partitions
+        :return: numpy array of partition indexes
+        """
+        return np.ascontiguousarray(digests).view(">u8")[:: DIGEST_SIZE // 8] % n_partitions
+
+    @staticmethod
+    def load_snapshot(data: bytes) -> np.ndarray:
+        """
+        Load digests from the snapshot. Snapshots created by the older versions (pickled set of hex strings)
+        are supported as well
+        :param data: snapshot content
+        :return: numpy array of digests
+        """
+        if data[: len(SNAPSHOT_MAGIC)] == SNAPSHOT_MAGIC:
+            return np.frombuffer(data, dtype=DIGEST_DTYPE, offset=len(SNAPSHOT_MAGIC))
+        return HashFilter.to_digests(list(pickle.loads(data)))
+
+    def add_hashes(self, hashes: Union[list[str], np.ndarray]) -> None:
         """
         Adding hashes
-        :param hashes: set of hashes to add
+        :param hashes: list of hashes (hex strings) or numpy array of digests to add
         :return: None
         """
-        self.hashes.update(hashes)
+        if not isinstance(hashes, np.ndarray):
+            hashes = HashFilter.to_digests(list(hashes))
+        digests = np.unique(hashes)
+        self._insert(digests[~self._contains(digests)])
 
     def get_unique(self, ha: list[str]) -> list[str]:
         """
@@ -82,20 +134,22 @@ class HashFilter:
         :param ha: new set of hashes
         :return: list of unique ones
         """
-        unique = []
-        for h in ha:
-            if h not in self.hashes:
-                # If a hash does not exist, add it to unique and add to the local set
-                self.hashes.add(h)
-                unique.append(h)
-        return unique
+        if len(ha) == 0:
+            return []
+        digests = HashFilter.to_digests(ha)
+        # first occurrences of every digest in the request
+        _, first = np.unique(digests, return_index=True)
+        # If a hash does not exist, add it to unique and to the local hashes
+        new = np.sort(first[~self._contains(digests[first])])
+        self._insert(digests[new])
+        return [ha[i] for i in new]
 
     def get_hash_size(self) -> tuple[int, float]:
         """
         Get size of created hashes for statistics
         :return: size of the local set and its memory footprint
         """
-        return len(self.hashes), TransformUtils.deep_get_size(self.hashes) / GB
+        return len(self.hashes) + len(self.recent), (self.hashes.nbytes + self.recent.nbytes) / GB
 
     def snapshot(self) -> None:
         """
@@ -103,16 +157,59 @@ class HashFilter:
         :return: None
         """
         try:
-            # pickle content
-            b_doc = pickle.dumps(self.hashes)
-            # Save it
+            self._merge()
+            # Save digests
             self.data_access.save_file(
-                f"{SnapshotUtils.get_snapshot_folder(self.data_access)}hash_collector_{self.actor_id}", b_doc
+                f"{SnapshotUtils.get_snapshot_folder(self.data_access)}hash_collector_{self.actor_id}",
+                SNAPSHOT_MAGIC + self.hashes.tobytes(),
             )
         except Exception as e:
             self.logger.warning(f"Failed to snapshot doc collector {self.actor_id} with exception {e}")
             raise e
 
+    def _contains(self, digests: np.ndarray) -> np.ndarray:
+        """
+        Check which of the digests are already known
+        :param digests: numpy array of digests
+        :return: boolean mask of the known digests
+        """
+        return HashFilter._in_sorted(self.hashes, digests) | HashFilter._in_sorted(self.recent, digests)
+
+    @staticmethod
+    def _in_sorted(sorted_digests: np.ndarray, digests: np.ndarray) -> np.ndarray:
+        """
+        Batch membership lookup in the sorted array
+        :param sorted_digests: sorted numpy array of digests
+        :param digests: numpy array of digests to look up
+        :return: boolean mask of the found digests
+        """
+        if len(sorted_digests) == 0:
+            return np.zeros(len(digests), dtype=bool)
+        positions = np.minimum(np.searchsorted(sorted_digests, digests), len(sorted_digests) - 1)
+        return sorted_digests[positions] == digests
+
+    def _insert(self, digests: np.ndarray) -> None:
+        """
+        Add new (not known) digests
+        :param digests: numpy array of new digests
+        :return: None
+        """
+        if len(digests) == 0:
+            return
+        digests = np.sort(digests)
+        self.recent = np.insert(self.recent, np.searchsorted(self.recent, digests), digests)
+        if len(self.recent) > max(MERGE_THRESHOLD, len(self.hashes) // 8):
+            self._merge()
+
+    def _merge(self) -> None:
+        """
+        Merge recently added digests into the main array
+        :return: None
+        """
+        if len(self.recent) > 0:
+            self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, self.recent), self.recent)
+            self.recent = np.empty(0, dtype=DIGEST_DTYPE)
+
 
 class EdedupTransformBase(AbstractTableTransform):
     """
@@ -138,18 +235,13 @@ class EdedupTransformBase(AbstractTableTransform):
         """
         # make sure that the doc column exists
         TransformUtils.validate_columns(table=table, required=[self.doc_column, self.doc_id_column])
-        # Inner variables
-        docs = table[self.doc_column]
         doc_ids = table[self.doc_id_column]
+        doc_id_values = doc_ids.to_pylist()
         hashes = set()
         unique = []
         hd = {}
         # Compute unique hashes for the table
-        for n in range(table.num_rows):
-            doc = docs[n].as_py()
-            doc_id = doc_ids[n].as_py()
-            # Compute doc hash
-            h = TransformUtils.str_to_hash(TransformUtils.normalize_string(str(doc)))
+        for h, doc_id in zip(self._get_hashes(table[self.doc_column]), doc_id_values):
             if h not in hashes:  # Processing this hash for the first time
                 hashes.add(h)  # Remember it locally
                 hd[h] = doc_id
@@ -159,19 +251,14 @@ class EdedupTransformBase(AbstractTableTransform):
         if len(hd) > 0:  # Process remaining hashes
             unique = unique + self._process_cached_hashes(hd=hd)
 
-        # Remove duplicates
-        unique_set = set(unique)
-        mask = [False] * table.num_rows
-        removed = []
-        index = 0
-        for id in table[self.doc_id_column]:
-            str_id = str(id)
-            if str_id in unique_set:
-                mask[index] = True
-                unique_set.remove(str_id)
-            else:
-                removed.append(str_id)
-            index += 1
+        # Remove duplicates, keeping the first row for every unique document id
+        mask = pc.is_in(doc_ids, value_set=pa.array(unique, type=doc_ids.type)).to_numpy(zero_copy_only=False)
+        if pc.count_distinct(doc_ids).as_py() < table.num_rows:
+            groups = pc.index_in(doc_ids, value_set=pc.unique(doc_ids)).to_numpy(zero_copy_only=False)
+            first = np.zeros(table.num_rows, dtype=bool)
+            first[np.unique(groups, return_index=True)[1]] = True
+            mask &= first
+        removed = [str(doc_id_values[i]) for i in np.flatnonzero(~mask)]
         # Create output table
         out_table = table.filter(mask)
         # populate removed columns
@@ -184,6 +271,44 @@ class EdedupTransformBase(AbstractTableTransform):
         stats = {"source_documents": table.num_rows, "result_documents": out_table.num_rows}
         return [out_table], stats
 
+    @staticmethod
+    def _get_hashes(docs: pa.ChunkedArray) -> list[str]:
+        """
+        Compute hashes of the normalized documents. String columns are normalized in bulk - lower cased
+        by pyarrow and stripped of the removed (ASCII) characters directly in the utf-8 data buffer.
+        This matches TransformUtils.normalize_string for all characters except for the ones with special
+        lower case rules (dotted capital I and final sigma), so documents containing them are normalized one by one
+        :param docs: documents column
+        :return: list of hashes
+        """
+        if not (pa.types.is_string(docs.type) or pa.types.is_large_string(docs.type)):
+            return [TransformUtils.str_to_hash(TransformUtils.normalize_string(str(doc))) for doc in docs.to_pylist()]
+        hashes = []
+        for chunk in docs.chunks:
+            if chunk.null_count > 0:
+                # nulls are hashed as str(None)
+                chunk = pc.fill_null(chunk, "None")
+            lowered = pc.utf8_lower(chunk)
+            _, b_offsets, b_data = lowered.buffers()
+            offset_type = np.int64 if pa.types.is_large_string(lowered.type) else np.int32
+            offsets = np.frombuffer(b_offsets, dtype=offset_type)[lowered.offset : lowered.offset + len(lowered) + 1]
+            data = b_data.to_pybytes() if b_data is not None else b""
+            # ASCII bytes never occur inside of multibyte utf-8 characters, so they can be removed from utf-8 bytes
+            chunk_hashes = [
+                hashlib.sha256(data[offsets[n] : offsets[n + 1]].translate(None, NORMALIZE_REMOVED)).hexdigest()
+                for n in range(len(lowered))
+            ]
+            # documents with special lower case characters are normalized individually
+            raw = chunk.buffers()[2]
+            raw = raw.to_pybytes() if raw is not None else b""
+            if any(c.encode("utf-8") in raw for c in SPECIAL_CASE_CHARACTERS):
+                special = pc.match_substring_regex(chunk, pattern=f"[{SPECIAL_CASE_CHARACTERS}]")
+                for n in np.flatnonzero(special.to_numpy(zero_copy_only=False)):
+                    doc = chunk[int(n)].as_py()
+                    chunk_hashes[n] = TransformUtils.str_to_hash(TransformUtils.normalize_string(doc))
+            hashes.extend(chunk_hashes)
+        return hashes
+
     def _process_cached_hashes(self, hd: dict[str, str]) -> list[str]:
         """
         check hashes uniqueness with the distributed cache of hashes
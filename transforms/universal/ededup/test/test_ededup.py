@@ -11,11 +11,16 @@
 ################################################################################
 
 import os
+import pickle
 from typing import Tuple
 
+import pyarrow as pa
 from data_processing.test_support import get_tables_in_folder
 from data_processing.test_support.transform import AbstractTableTransformTest
+from data_processing.utils import TransformUtils
 from dpk_ededup.transform_base import (
+    SNAPSHOT_MAGIC,
+    EdedupTransformBase,
     HashFilter,
     doc_column_name_key,
     int_column_name_key,
@@ -39,3 +44,30 @@ class TestEdedupTransform(AbstractTableTransformTest):
         return [
             (EdedupTransform(config), input_tables, expected_tables, expected_metadata_list),
         ]
+
+
+def test_hash_filter():
+    hash_filter = HashFilter({})
+    hashes = [TransformUtils.str_to_hash(f"document {i}") for i in range(10)]
+    assert hash_filter.get_unique(hashes[:6] + hashes[:2]) == hashes[:6]
+    assert hash_filter.get_unique(hashes[4:] + hashes[9:]) == hashes[6:]
+    assert hash_filter.get_unique(hashes) == []
+    assert hash_filter.get_hash_size()[0] == 10
+    # snapshot round trip
+    restored = HashFilter({})
+    restored.add_hashes(
+        HashFilter.load_snapshot(SNAPSHOT_MAGIC + hash_filter.hashes.tobytes() + hash_filter.recent.tobytes())
+    )
+    assert restored.get_unique(hashes) == []
+    # legacy pickled snapshot
+    legacy = HashFilter({})
+    legacy.add_hashes(HashFilter.load_snapshot(pickle.dumps(set(hashes[:5]))))
+    assert legacy.get_unique(hashes) == hashes[5:]
+
+
+def test_document_hashes():
+    docs = ["Hello, World!\n", "  hello world", None, "", "İstanbul ΣΑΣ", "Straße — “quoted”", "ﬁne\tTAB"]
+    for doc_type in [pa.string(), pa.large_string()]:
+        column = pa.chunked_array([pa.array(docs[:3], type=doc_type), pa.array(docs[2:], type=doc_type).slice(1)])
+        expected = [TransformUtils.str_to_hash(TransformUtils.normalize_string(str(doc))) for doc in docs]
+        assert EdedupTransformBase._get_hashes(column) == expected
@@ -110,3 +110,132 @@ class Murmur_MH:
         """
         assert len(mh1) == len(mh2)
         return np.count_nonzero(mh1 == mh2) / len(mh1)
+
+    def minhash_batch(self, hash_values: np.ndarray, offsets: np.ndarray, batch_size: int = 1 << 16) -> np.ndarray:
+        """
+        Vectorized version of minhash for multiple documents at once
+        :param hash_values: 32-bit hashes of the shingles of all documents, concatenated
+        :param offsets: offsets of the shingles of every document in hash_values (number of documents + 1).
+            every document has to have at least one shingle
+        :param batch_size: maximum size of the intermediate (shingles x permutations) matrix, small enough
+            to stay in the CPU cache
+        :return: 2-D array of minhashes - a row of num_perm minhashes per document
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        result = np.full((len(offsets) - 1, self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        max_shingles = max(1, batch_size // self.num_perm)
+        for start in range(0, int(offsets[-1]), max_shingles):
+            end = min(start + max_shingles, int(offsets[-1]))
+            # documents with shingles in this batch; the first and the last ones can span several batches
+            first = int(np.searchsorted(offsets, start, side="right")) - 1
+            last = int(np.searchsorted(offsets, end, side="left"))
+            values = hash_values[start:end].astype(np.uint64)
+            minhashes = np.right_shift(values[:, None] * self.permutations[None, :], np.uint64(32))
+            minhashes = np.minimum.reduceat(minhashes, np.maximum(offsets[first:last], start) - start, axis=0)
+            result[first:last] = np.minimum(result[first:last], minhashes)
+        return result
+
+
+_C1_32 = np.uint32(0xCC9E2D51)
+_C2_32 = np.uint32(0x1B873593)
+_C1_64 = np.uint64(0x87C37B91114253D5)
+_C2_64 = np.uint64(0x4CF5AD432745937F)
+
+
+def _rotl32(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint32(r)) | (x >> np.uint32(32 - r))
+
+
+def _rotl64(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint64(r)) | (x >> np.uint64(64 - r))
+
+
+def _fmix64(k: np.ndarray) -> np.ndarray:
+    k = k ^ (k >> np.uint64(33))
+    k = k * np.uint64(0xFF51AFD7ED558CCD)
+    k = k ^ (k >> np.uint64(33))
+    k = k * np.uint64(0xC4CEB9FE1A85EC53)
+    return k ^ (k >> np.uint64(33))
+
+
+def murmur3_32_batch(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Vectorized MurmurHash3 x86 32-bit hash of multiple byte strings, stored in a single buffer.
+    Produces the same values as mmh3.hash(value, seed=seed, signed=False)
+    :param data: uint8 buffer containing the strings
+    :param starts: start offsets of the strings in the buffer
+    :param lengths: lengths of the strings
+    :param seed: hash seed
+    :return: uint32 array of hashes
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    # little endian 32-bit word starting at every position of the (padded) buffer
+    data = np.concatenate((np.asarray(data, dtype=np.uint8), np.zeros(4, dtype=np.uint8))).astype(np.uint32)
+    words = data[:-3] | (data[1:-2] << 8) | (data[2:-1] << 16) | (data[3:] << 24)
+    n_blocks = lengths // 4
+    # process strings in the order of decreasing number of blocks, so that active strings always form a prefix
+    order = np.argsort(-n_blocks, kind="stable")
+    sorted_blocks = n_blocks[order]
+    sorted_starts = starts[order]
+    sorted_h = np.full(len(starts), seed, dtype=np.uint32)
+    for block in range(int(sorted_blocks[0]) if len(order) > 0 else 0):
+        active = int(np.searchsorted(-sorted_blocks, -block, side="left"))
+        k = words[sorted_starts[:active] + 4 * block]
+        k = _rotl32(k * _C1_32, 15) * _C2_32
+        hh = _rotl32(sorted_h[:active] ^ k, 13)
+        sorted_h[:active] = hh * np.uint32(5) + np.uint32(0xE6546B64)
+    h = np.empty(len(starts), dtype=np.uint32)
+    h[order] = sorted_h
+    # tail of 0 to 3 bytes
+    tail = lengths & 3
+    tail_mask = ((np.uint64(1) << (8 * tail).astype(np.uint64)) - np.uint64(1)).astype(np.uint32)
+    k = words[starts + 4 * n_blocks] & tail_mask
+    h ^= np.where(tail > 0, _rotl32(k * _C1_32, 15) * _C2_32, np.uint32(0))
+    # finalization
+    h ^= lengths.astype(np.uint32)
+    h ^= h >> np.uint32(16)
+    h *= np.uint32(0x85EBCA6B)
+    h ^= h >> np.uint32(13)
+    h *= np.uint32(0xC2B2AE35)
+    h ^= h >> np.uint32(16)
+    return h
+
+
+def murmur3_64_batch(values: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Vectorized MurmurHash3 x64 128-bit hash of the rows of a 2-D uint32 array, returning the first 64 bits.
+    Produces the same values as mmh3.hash64(row.tobytes(), seed=seed, signed=False)[0] on little endian platforms
+    :param values: 2-D uint32 array, every row of which is hashed
+    :param seed: hash seed
+    :return: uint64 array of hashes
+    """
+    values = np.ascontiguousarray(values, dtype="<u4")
+    n_rows, n_words = values.shape
+    h1 = np.full(n_rows, seed, dtype=np.uint64)
+    h2 = np.full(n_rows, seed, dtype=np.uint64)
+    words = values.astype(np.uint64)
+    n_blocks = n_words // 4
+    for block in range(n_blocks):
+        k1 = words[:, 4 * block] | (words[:, 4 * block + 1] << np.uint64(32))
+        k2 = words[:, 4 * block + 2] | (words[:, 4 * block + 3] << np.uint64(32))
+        h1 ^= _rotl64(k1 * _C1_64, 31) * _C2_64
+        h1 = (_rotl64(h1, 27) + h2) * np.uint64(5) + np.uint64(0x52DCE729)
+        h2 ^= _rotl64(k2 * _C2_64, 33) * _C1_64
+        h2 = (_rotl64(h2, 31) + h1) * np.uint64(5) + np.uint64(0x38495AB5)
+    # tail of 1 to 3 words
+    tail = words[:, 4 * n_blocks :]
+    if tail.shape[1] > 2:
+        h2 ^= _rotl64(tail[:, 2] * _C2_64, 33) * _C1_64
+    if tail.shape[1] > 0:
+        k1 = tail[:, 0] | (tail[:, 1] << np.uint64(32)) if tail.shape[1] > 1 else tail[:, 0]
+        h1 ^= _rotl64(k1 * _C1_64, 31) * _C2_64
+    # finalization
+    length = np.uint64(4 * n_words)
+    h1 ^= length
+    h2 ^= length
+    h1 = h1 + h2
+    h2 = h2 + h1
+    h1 = _fmix64(h1)
+    h2 = _fmix64(h2)
+    return h1 + h2
@@ -9,14 +9,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 ################################################################################
-import io
 import os
 import re
 from argparse import ArgumentParser, Namespace
-from typing import Any, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
 
 import numpy as np
 import polars as pl
+from data_processing.data_access import DataAccessLocal
 from data_processing.transform import AbstractFolderTransform, TransformConfiguration
 from data_processing.utils import (
     CLIArgumentProvider,
@@ -24,7 +25,6 @@ from data_processing.utils import (
     UnrecoverableException,
     get_logger,
 )
-from dpk_fdedup.Murmur_MH import Murmur_MH
 
 
 short_name = "cluster"
@@ -39,6 +39,8 @@ jaccard_similarity_threshold_key = "jaccard_similarity_threshold"
 """ This key holds the Jaccard similarity threshold above which two documents are duplicates"""
 sort_output_key = "sort_output"
 """ This key is used to sort"""
+num_jaccard_workers_key = "num_jaccard_workers"
+""" This key holds the number of worker processes used for the Jaccard similarity verification of the clusters"""
 
 # command line arguments
 num_bands_cli_param = f"{cli_prefix}{num_bands_key}"
@@ -49,12 +51,15 @@ num_segments_cli_param = f"{cli_prefix}{num_segments_key}"
 """ The number of segments dividing the hashing space for each band"""
 sort_output_cli_param = f"{cli_prefix}{sort_output_key}"
 """ Sort the output"""
+num_jaccard_workers_cli_param = f"{cli_prefix}{num_jaccard_workers_key}"
+""" The number of worker processes used for the Jaccard similarity verification of the clusters"""
 
 captured_arg_keys = [
     num_bands_key,
     num_segments_key,
     jaccard_similarity_threshold_key,
     sort_output_key,
+    num_jaccard_workers_key,
 ]
 
 # defaults
@@ -65,6 +70,73 @@ jaccard_similarity_threshold_default = 0.75
 num_segments_default = 1
 """ Default number of segments dividing the hashing space for each band"""
 sort_output_default = False
+num_jaccard_workers_default = 1
+""" Default number of worker processes used for the Jaccard similarity verification (1 - no worker pool)"""
+jaccard_batch_size = 10000
+""" Number of documents compared at once, and in every batch of clusters sent to the Jaccard workers"""
+
+
+def verify_clusters(
+    doc_ids: np.ndarray, minhashes: np.ndarray, offsets: np.ndarray, threshold: float
+) -> tuple[list[int], list[list[int]], list[int]]:
+    """
+    Jaccard similarity verification of the documents of multiple clusters. For every cluster, the first
+    document is kept, all the documents similar to it are marked as its duplicates, and the procedure is
+    repeated with the remaining documents of the cluster. Every round processes all the clusters at once,
+    comparing the first remaining document of every cluster against all the other remaining ones
+    :param doc_ids: ids of the documents of all clusters, sorted within a cluster by descending document
+        length and ascending document id
+    :param minhashes: 2-D uint32 array of minhashes - a row per document
+    :param offsets: offsets of the documents of every cluster (number of clusters + 1)
+    :param threshold: Jaccard similarity threshold above which two documents are duplicates
+    :return: a tuple of the kept documents, the lists of their duplicates and the numbers of duplicates
+    """
+    num_minhashes = minhashes.shape[1]
+    clusters = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    # positions of the documents still to be verified, in cluster order
+    active = np.arange(len(doc_ids))
+    kept = []
+    removed = []
+    while len(active) > 1:
+        active_clusters = clusters[active]
+        is_first = np.empty(len(active), dtype=bool)
+        is_first[0] = True
+        is_first[1:] = active_clusters[1:] != active_clusters[:-1]
+        # the first document of every cluster is the one we are going to keep
+        first_docs = active[is_first][np.cumsum(is_first) - 1]
+        similar = np.empty(len(active), dtype=bool)
+        for start in range(0, len(active), jaccard_batch_size):
+            end = min(start + jaccard_batch_size, len(active))
+            matches = np.count_nonzero(minhashes[active[start:end]] == minhashes[first_docs[start:end]], axis=1)
+            similar[start:end] = matches / num_minhashes >= threshold
+        duplicates = similar & ~is_first
+        kept.append(first_docs[duplicates])
+        removed.append(active[duplicates])
+        active = active[~(is_first | duplicates)]
+        if len(active) == 0:
+            break
+        # clusters left with a single document are done
+        active_clusters = clusters[active]
+        boundaries = np.concatenate(([True], active_clusters[1:] != active_clusters[:-1], [True]))
+        active = active[~(boundaries[:-1] & boundaries[1:])]
+    doc_ids_list = []
+    docs_to_remove_list = []
+    len_of_docs2remove_list = []
+    if len(kept) == 0:
+        return doc_ids_list, docs_to_remove_list, len_of_docs2remove_list
+    # documents kept in later rounds of a cluster come after the earlier ones, so ordering by position
+    # restores the order of the clusters and of their rounds
+    kept = np.concatenate(kept)
+    order = np.argsort(kept, kind="stable")
+    kept = kept[order]
+    removed = doc_ids[np.concatenate(removed)[order]]
+    first_docs, starts = np.unique(kept, return_index=True)
+    for first_doc, docs in zip(doc_ids[first_docs].tolist(), np.split(removed, starts[1:])):
+        docs_to_remove = list(set(docs.tolist()))
+        doc_ids_list.append(first_doc)
+        docs_to_remove_list.append(docs_to_remove)
+        len_of_docs2remove_list.append(len(docs_to_remove))
+    return doc_ids_list, docs_to_remove_list, len_of_docs2remove_list
 
 
 class ClusterAnalysisTransform(AbstractFolderTransform):
@@ -94,6 +166,7 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
         num_bands: number of bands used in the banding technique
         jaccard_similarity_threshold: Jaccard similarity threshold above which two documents are duplicates
         num_segments: the number of segments dividing the hashing space for each band
+        num_jaccard_workers: the number of worker processes used for the Jaccard similarity verification
     """
 
     def __init__(self, config: dict[str, Any]):
@@ -109,6 +182,7 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
             jaccard_similarity_threshold_key, jaccard_similarity_threshold_default
         )
         self.sort_output = config.get(sort_output_key, sort_output_default)
+        self.num_jaccard_workers = config.get(num_jaccard_workers_key, num_jaccard_workers_default)
         self.data_access = config.get("data_access")
         if self.data_access is None:
             raise UnrecoverableException("Could not get a pointer to the data access object inside the transform.")
@@ -121,10 +195,8 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
         files, retries = self.data_access.get_folder_files(
             path=input_folder,
             extensions=[".parquet"],
-            return_data=True,
+            return_data=False,
         )
-        if retries > 0:
-            metadata |= {"data_access_retries": retries}
         match = re.match(r"^band=(\d+)/segment=(\d+)$", folder_name)
         if match:
             band = int(match.group(1))
@@ -142,7 +214,10 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
         output_path = os.path.join(output_folder, f"band_{band}_segment_{segment}.parquet")
 
         # consolidate into a single data frame band hashes computed by workers
-        band_segment_dataframe, consolidation_stats = self._consolidate_band_segment_files(files)
+        band_segment_dataframe, consolidation_stats = self._consolidate_band_segment_files(list(files.keys()))
+        retries += consolidation_stats.pop("data_access_retries", 0)
+        if retries > 0:
+            metadata |= {"data_access_retries": retries}
         metadata |= consolidation_stats
         # cluster grouping by band hashes
         cluster_dataframe, cluster_stats = self._get_clusters(band_segment_dataframe)
@@ -157,25 +232,90 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
         metadata |= {"num_duplicate_documents": len(docs_to_remove_dataframe)}
         return [(output_data, output_path)], metadata
 
-    def _consolidate_band_segment_files(self, files: dict[str, bytes]) -> tuple[pl.DataFrame, dict[str, Any]]:
-        band_segment_dataframe = pl.DataFrame()
-        total_input_rows = 0
-        for fname, contents in files.items():
-            df = pl.read_parquet(io.BytesIO(contents))
-            total_input_rows += len(df)
-            self.logger.debug(f"{fname} has {len(df)} rows")
-            band_segment_dataframe = band_segment_dataframe.vstack(df)
+    def _consolidate_band_segment_files(self, files: list[str]) -> tuple[pl.DataFrame, dict[str, Any]]:
+        """
+        Consolidate the documents of all the files of a band segment into a single data frame. Only the
+        documents sharing their band hash with at least another document (the ones that form clusters)
+        are loaded: a first scan reads just the band hashes to find the ones shared by multiple documents,
+        and a second scan loads the documents with these band hashes. Files are read one at a time, local
+        files are scanned lazily and the other ones are read through data access, fetching only the band hash
+        column in the first scan and a row group at a time in the second one
+        :param files: parquet files of the band segment
+        :return: a tuple of the data frame of the clustered documents and the consolidation statistics
+        """
+        retries = 0
+        input_bytes = 0
+        band_hash_dataframes = []
+        for fname in files:
+            df, file_bytes, file_retries = self._read_band_hashes(fname)
+            band_hash_dataframes.append(df)
+            input_bytes += file_bytes
+            retries += file_retries
+        band_hashes = pl.DataFrame(schema={"band_hash": pl.UInt64})
+        if len(band_hash_dataframes) > 0:
+            band_hashes = pl.concat(band_hash_dataframes)
+        del band_hash_dataframes
+        input_rows = len(band_hashes)
+        cluster_hashes = band_hashes.group_by("band_hash").len().filter(pl.col("len") > 1).select("band_hash").lazy()
+        del band_hashes
+        band_segment_dataframes = []
+        for fname in files:
+            df, file_retries = self._read_clustered_documents(fname, cluster_hashes)
+            retries += file_retries
+            self.logger.debug(f"{fname} has {len(df)} rows in clusters")
+            band_segment_dataframes.append(df)
+        band_segment_dataframe = (
+            pl.concat(band_segment_dataframes) if len(band_segment_dataframes) > 0 else pl.DataFrame()
+        )
 
         consolidation_stats = {
             "input_files": len(files),
-            "input_bytes": sum(len(v) for v in files.values()),
-            "input_rows": total_input_rows,
+            "input_bytes": input_bytes,
+            "input_rows": input_rows,
             "consolidated_files": 1,
-            "consolidated_bytes": band_segment_dataframe.to_arrow().nbytes,
+            "consolidated_bytes": band_segment_dataframe.estimated_size(),
             "consolidated_rows": len(band_segment_dataframe),
         }
+        if retries > 0:
+            consolidation_stats["data_access_retries"] = retries
         return band_segment_dataframe, consolidation_stats
 
+    def _read_band_hashes(self, fname: str) -> tuple[pl.DataFrame, int, int]:
+        """
+        Read the band hashes of a band segment file
+        :param fname: file name
+        :return: a tuple of the data frame of the band hashes, file size and number of data access retries
+        """
+        if isinstance(self.data_access, DataAccessLocal):
+            return pl.read_parquet(fname, columns=["band_hash"]), os.path.getsize(fname), 0
+        table, retries = self.data_access.get_table(fname, columns=["band_hash"])
+        if table is None:
+            raise UnrecoverableException(f"Failed to read band hashes from {fname}")
+        file_info, info_retries = self.data_access.get_file_info(fname)
+        file_size = file_info["size"] if file_info is not None else 0
+        return pl.from_arrow(table), file_size, retries + info_retries
+
+    def _read_clustered_documents(self, fname: str, cluster_hashes: pl.LazyFrame) -> tuple[pl.DataFrame, int]:
+        """
+        Read the documents of a band segment file, whose band hashes are shared by multiple documents
+        :param fname: file name
+        :param cluster_hashes: band hashes shared by multiple documents
+        :return: a tuple of the data frame of the documents and number of data access retries
+        """
+        if isinstance(self.data_access, DataAccessLocal):
+            return pl.scan_parquet(fname).join(cluster_hashes, on="band_hash", how="semi").collect(), 0
+        parquet_file, retries = self.data_access.get_parquet_file(fname)
+        if parquet_file is None:
+            raise UnrecoverableException(f"Failed to open {fname}")
+        dataframes = []
+        for i in range(parquet_file.num_row_groups):
+            # row groups are read and filtered one at a time
+            df = pl.from_arrow(parquet_file.read_row_group(i))
+            dataframes.append(df.lazy().join(cluster_hashes, on="band_hash", how="semi").collect())
+        if len(dataframes) == 0:
+            return pl.from_arrow(parquet_file.schema_arrow.empty_table()), retries
+        return pl.concat(dataframes), retries
+
     def _get_clusters(self, band_segment_dataframe: pl.DataFrame) -> tuple[pl.DataFrame, dict[str, Any]]:
         groupby_dataframe = band_segment_dataframe.group_by("band_hash").agg("document_data")
         cluster_dataframe = groupby_dataframe.with_columns(cluster_length=pl.col("document_data").list.len()).filter(
@@ -207,8 +347,7 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
         doc_ids_lists = []
         docs_to_remove_lists = []
         len_of_docs2remove_lists = []
-        for row in df.iter_rows(named=True):
-            doc_ids_list, docs_to_remove_list, len_of_docs2remove_list = self._jaccard_distance_calculation(row)
+        for doc_ids_list, docs_to_remove_list, len_of_docs2remove_list in self._verify_clusters(df):
             doc_ids_lists += doc_ids_list
             docs_to_remove_lists += docs_to_remove_list
             len_of_docs2remove_lists += len_of_docs2remove_list
@@ -242,49 +381,46 @@ class ClusterAnalysisTransform(AbstractFolderTransform):
             filtered_jaccard_dataframe = filtered_jaccard_dataframe.sort(by="first_doc")
         return filtered_jaccard_dataframe, jaccard_stats
 
-    def _jaccard_distance_calculation(self, row: List[pl.Series]) -> list[list]:
-        # Process row and return a new list of Series or a new row
+    def _verify_clusters(self, df: pl.DataFrame) -> list[tuple[list[int], list[list[int]], list[int]]]:
+        """
+        Run the Jaccard similarity verification of the clusters, either in process or, if more than one
+        Jaccard worker is configured, in a pool of worker processes
+        :param df: data frame of clusters, each one with its list of documents
+        :return: results of verify_clusters for the batches of clusters, in the order of the clusters
+        """
+        if len(df) == 0:
+            return []
+        documents = (
+            df.select(pl.col("document_data"))
+            .with_row_index("cluster")
+            .explode("document_data")
+            .unnest("document_data")
+        )
+        id_column = df.schema["document_data"].inner.fields[0].name
+        # sort the documents of every cluster by descending length, and by id for equal lengths
+        documents = documents.sort(
+            ["cluster", "document_length", id_column], descending=[False, True, False], maintain_order=True
+        )
+        doc_ids = documents[id_column].to_numpy()
+        num_minhashes = documents["minhashes"].list.len().max()
+        minhashes = documents["minhashes"].list.to_array(num_minhashes).to_numpy().astype(np.uint32, copy=False)
+        offsets = np.concatenate(([0], np.cumsum(df["cluster_length"].to_numpy(), dtype=np.int64)))
         threshold = self.jaccard_similarity_threshold
-        doc_ids_list = []
-        docs_to_remove_list = []
-        len_of_docs2remove_list = []
-        # sort documents
-        document_data = row["document_data"]
-
-        # Sort the list by 'document_length'
-        sorted_document_data = sorted(document_data, key=lambda x: (-x["document_length"], x["int_id_column"]))
-
-        # Extracting int_id_column values into a list
-        doc_list = [item["int_id_column"] for item in sorted_document_data]
-
-        # Creating a dictionary with int_id_column as key and minhashes as value
-        doc_minhashes = {item["int_id_column"]: item["minhashes"] for item in sorted_document_data}
-
-        while len(doc_list) > 1:
-            docs_to_remove = []
-            new_doc_list = []
-            # this is the document we are going to keep
-            first_doc = doc_list[0]
-            first_mh = doc_minhashes[first_doc]
-            for int_id_column in doc_list[1:]:
-                doc_mh = doc_minhashes[int_id_column]
-                distance = Murmur_MH.jaccard(np.array(first_mh), np.array(doc_mh))
-                if distance >= threshold:
-                    docs_to_remove.append(int_id_column)
-                else:
-                    new_doc_list.append(int_id_column)
-            if len(docs_to_remove) > 0:
-                docs_to_remove = list(set(docs_to_remove))
-                doc_ids_list.append(first_doc)
-                docs_to_remove_list.append(docs_to_remove)
-                len_of_docs2remove_list.append(len(docs_to_remove))
-            doc_list = new_doc_list
-
-        return doc_ids_list, docs_to_remove_list, len_of_docs2remove_list
+        if self.num_jaccard_workers <= 1:
+            return [verify_clusters(doc_ids, minhashes, offsets, threshold)]
+        # split the clusters into batches of about jaccard_batch_size documents
+        boundaries = np.unique(np.searchsorted(offsets, np.arange(0, offsets[-1], jaccard_batch_size)))
+        boundaries = np.append(boundaries, len(offsets) - 1)
+        batches = []
+        for first, last in zip(boundaries[:-1], boundaries[1:]):
+            start, end = offsets[first], offsets[last]
+            batches.append((doc_ids[start:end], minhashes[start:end], offsets[first : last + 1] - start, threshold))
+        self.logger.debug(f"Verifying {len(df)} clusters in {len(batches)} batches")
+        with ProcessPoolExecutor(max_workers=self.num_jaccard_workers) as executor:
+            return list(executor.map(verify_clusters, *zip(*batches)))
 
 
 class ClusterAnalysisTransformConfiguration(TransformConfiguration):
-
     """
     Provides support for configuring and using the associated Transform class include
     configuration with CLI args.
@@ -329,6 +465,12 @@ class ClusterAnalysisTransformConfiguration(TransformConfiguration):
             default=sort_output_default,
             help="Sort the similarity clusters by the document ID of the kept doc (used primarily for testing)",
         )
+        parser.add_argument(
+            f"--{num_jaccard_workers_cli_param}",
+            type=int,
+            default=num_jaccard_workers_default,
+            help="The number of worker processes used for the Jaccard similarity verification of the clusters",
+        )
 
     def apply_input_params(self, args: Namespace) -> bool:
         """
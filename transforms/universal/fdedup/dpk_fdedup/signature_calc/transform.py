@@ -9,8 +9,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 ################################################################################
+import functools
 import os
 import re
+import sys
 import unicodedata
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
@@ -22,8 +24,8 @@ import polars as pl
 import pyarrow as pa
 from data_processing.data_access import DataAccessFactory
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
-from data_processing.utils import CLIArgumentProvider, UnrecoverableException
-from dpk_fdedup.Murmur_MH import Murmur_MH
+from data_processing.utils import MB, CLIArgumentProvider, UnrecoverableException
+from dpk_fdedup.Murmur_MH import Murmur_MH, murmur3_32_batch, murmur3_64_batch
 
 
 short_name = "minhash"
@@ -50,6 +52,8 @@ num_segments_key = "num_segments"
 """ This key holds the number of segments across which we divide the hashing space for each band"""
 shingle_option_key = "shingle_option"
 """ This key holds the option that is used to do shingles calculation for each document"""
+buffer_size_key = "buffer_size"
+""" This key holds the size (in bytes) of the band signatures buffered in memory before they are written out"""
 
 # command line arguments
 document_id_column_cli_param = f"{cli_prefix}{document_id_column_key}"
@@ -72,6 +76,8 @@ num_segments_cli_param = f"{cli_prefix}{num_segments_key}"
 """ The number of segments across which we divide the hashing space for each band"""
 shingle_option_cli_param = f"{cli_prefix}{shingle_option_key}"
 """ The option (word/char) used to do shingles calculation for each document"""
+buffer_size_cli_param = f"{cli_prefix}{buffer_size_key}"
+""" The size (in bytes) of the band signatures buffered in memory before they are written out"""
 
 captured_arg_keys = [
     document_id_column_key,
@@ -84,6 +90,7 @@ captured_arg_keys = [
     word_shingle_size_key,
     num_segments_key,
     shingle_option_key,
+    buffer_size_key,
 ]
 
 # defaults
@@ -107,6 +114,8 @@ num_segments_default = 1
 """ Default number of segments across which we divide the hashing space for each band"""
 shingle_option_default = "word"
 """ Default option of doing shingling"""
+buffer_size_default = 512 * MB
+""" Default size (in bytes) of the band signatures buffered in memory before they are written out"""
 
 
 sigcalc_data_factory_key = "sc_data_factory"
@@ -123,6 +132,15 @@ PUNCTUATION = "!/—”:％１〈&(、━\\【#%「」，】；+^]~“《„';
 )
 PUNCTUATION_SET = set(PUNCTUATION)
 PUNCTUATION_TRANS = str.maketrans(PUNCTUATION, " " * len(PUNCTUATION))
+PUNCTUATION_PATTERN = re.compile(f"[{re.escape(PUNCTUATION)}]")
+
+
+@functools.cache
+def _nonspacing_marks_translation() -> dict[int, None]:
+    """
+    Translation table removing all nonspacing marks (unicode category Mn)
+    """
+    return {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.category(chr(cp)) == "Mn"}
 
 
 class SignatureCalculationTransform(AbstractTableTransform):
@@ -145,6 +163,7 @@ class SignatureCalculationTransform(AbstractTableTransform):
         jaccard_similarity_threshold: Jaccard similarity threshold above which two documents are duplicates
         word_shingle_size: the size of the word shingles calculated for each document
         num_segments: the number of segments across which we divide the hashing space for each band
+        buffer_size: the size (in bytes) of the band signatures buffered in memory before they are written out
     """
 
     def __init__(self, config: dict[str, Any]):
@@ -167,10 +186,20 @@ class SignatureCalculationTransform(AbstractTableTransform):
         self.num_bands = config.get(num_bands_key, num_bands_default)
         self.num_rows = config.get(num_minhashes_per_band_key, num_minhashes_per_band_default)
         self.shingle_option = config.get(shingle_option_key, shingle_option_default)
-        # use this dataframe to store the minhashes and size for each document
-        self.all_minhashes = None
-        # use this dataframe to store the band hashes for each document
-        self.all_band_hashes = None
+        self.buffer_size = config.get(buffer_size_key, buffer_size_default)
+        # boundaries of the segments of the hashing space: segment s holds the hashes h with
+        # segment_bounds[s] < h <= segment_bounds[s + 1]
+        upper_bound = np.uint64(np.iinfo(np.uint64).max)
+        segment_len = np.uint64(upper_bound // self.num_segments)
+        self.segment_bounds = np.append(
+            np.arange(self.num_segments, dtype=np.uint64) * segment_len, upper_bound
+        ).astype(np.uint64)
+        # document data (id, minhashes and length) of every buffered table
+        self.document_data = []
+        # band hashes and rows of document data, for every (band, segment) bucket and buffered table
+        self.buckets = [[[] for _ in range(self.num_segments)] for _ in range(self.num_bands)]
+        self.buffered_docs = 0
+        self.buffered_bytes = 0
         # this variable keeps track of how many files were processed since last
         # data write to properly update metadata
         self.files_processed = 0
@@ -200,51 +229,24 @@ class SignatureCalculationTransform(AbstractTableTransform):
         # instantiate with same seed so every worker use same hash functions
         mm_min_hash = Murmur_MH(num_perm=self.num_permutations, seed=self.seed)
 
-        # load the data from pyarrow table
-        df = pl.from_arrow(table)
-        # read the target columns
-        df = df.select(self.contents_column, self.document_id_column)
-
-        # generate minhash values
-        minhashes = df.map_rows(
-            lambda row: mm_min_hash.minhash2_nosalt(
-                *self._generate_word_shingles(row, self.shingle_option, window_size=self.word_shingle_size)
-            )
-        )
-        # rename columns, cast minhashes to list(uint32)
-        minhashes = minhashes.select(
-            pl.col("column_2").alias(self.document_id_column),
-            pl.col("column_0").cast(pl.List(pl.UInt32)).alias("minhashes"),
-            pl.col("column_1").alias("document_length"),
-        )
-        # store the minhash calculations to send out at the end of execution
-        if self.all_minhashes is None:
-            self.all_minhashes = minhashes
-        else:
-            self.all_minhashes = self.all_minhashes.vstack(minhashes)
-
-        # Calculate band hashes
-        band_hashes_list = self._process_rows_into_bands(
-            minhashes,
-            self.num_bands,
-            self.num_rows,
-        )
-        band_hash_schema = pl.Schema(
-            {
-                "band_hash": pl.UInt64,
-                "band_index": pl.Int32,
-                self.document_id_column: pl.Int64,
-            }
+        # generate minhash values for all documents at once
+        texts = table[self.contents_column].to_pylist()
+        hash_values, offsets = self._generate_shingle_hashes(texts)
+        minhash_matrix = mm_min_hash.minhash_batch(hash_values, offsets)
+        document_data = pl.DataFrame(
+            [
+                pl.struct(
+                    pl.from_arrow(table[self.document_id_column]).cast(pl.Int64).alias(self.document_id_column),
+                    pl.Series("minhashes", minhash_matrix).cast(pl.List(pl.UInt32)),
+                    pl.Series("document_length", [len(text) for text in texts], dtype=pl.Int64),
+                    eager=True,
+                ).alias("document_data")
+            ]
         )
-        band_hashes = pl.DataFrame(band_hashes_list, schema=band_hash_schema)
-
-        # store the band hash calculations to send out at the end of execution
-        if self.all_band_hashes is None:
-            self.all_band_hashes = band_hashes
-        else:
-            self.all_band_hashes = self.all_band_hashes.vstack(band_hashes)
-
-        if len(self.all_minhashes) > 750000:
+        # Calculate band hashes and route them to their (band, segment) buckets
+        band_hashes = self._process_rows_into_bands(minhash_matrix, self.num_bands, self.num_rows)
+        self._buffer_band_hashes(document_data, band_hashes)
+        if self.buffered_bytes >= self.buffer_size:
             tables, metadata = self._write_band_signatures()
         else:
             tables = []
@@ -263,72 +265,66 @@ class SignatureCalculationTransform(AbstractTableTransform):
         propagated to metadata
         """
         self.logger.info(f"Starting flush()")
-        if self.all_band_hashes is not None and self.all_minhashes is not None:
+        if len(self.document_data) > 0:
             tables, metadata = self._write_band_signatures()
         else:
             tables = []
             metadata = {}
         return tables, metadata
 
+    def _buffer_band_hashes(self, document_data: pl.DataFrame, band_hashes: np.ndarray) -> None:
+        """
+        Add the band hashes of a table to the (band, segment) buckets. Buckets only keep the band hashes
+        and the positions of the documents in the table, the document data is buffered once per table
+        :param document_data: data frame with the document data (id, minhashes and length) of the table
+        :param band_hashes: 2-D array of band hashes - a row per document
+        """
+        table_index = len(self.document_data)
+        self.document_data.append(document_data)
+        self.buffered_docs += len(document_data)
+        self.buffered_bytes += document_data.estimated_size()
+        for band_index in range(self.num_bands):
+            hashes = band_hashes[:, band_index]
+            segments = np.searchsorted(self.segment_bounds, hashes, side="left") - 1
+            # the stable sort keeps the documents of every segment in the table order
+            rows = np.argsort(segments, kind="stable")
+            splits = np.searchsorted(segments[rows], np.arange(self.num_segments + 1))
+            for segment_index in range(self.num_segments):
+                segment_rows = rows[splits[segment_index] : splits[segment_index + 1]]
+                self.buckets[band_index][segment_index].append(
+                    (table_index, hashes[segment_rows], segment_rows.astype(np.int32))
+                )
+                self.buffered_bytes += segment_rows.size * (hashes.itemsize + 4)
+
     def _write_band_signatures(self):
-        # define the upper and lower bounds of each band segment
         if self.sc_data_access is None:
             self.sc_data_access = self.sc_daf.create_data_access()
-        segment_bounds_list = []
-        upper_bound = np.uint64(np.iinfo(np.uint64).max)
-        segment_len = np.uint64(upper_bound // self.num_segments)
-        for segment_index in range(self.num_segments):
-            segment_bounds_list.append(np.uint64(segment_index) * segment_len)
-        segment_bounds_list.append(upper_bound)
-        segment_bounds = np.array(segment_bounds_list, dtype=np.uint64)
-        self.logger.debug(f"Calculated {len(segment_bounds)} segment_bounds")
+        if self.sc_data_access.output_folder is None:
+            self.sc_data_access.output_folder = self.data_access.output_folder
+        suffix_path = Path(self.last_file_name).relative_to(self.data_access.input_folder)
         # output stats for the metadata
         num_tables_written = 0
         num_docs_written = 0
         num_bytes_written = 0
-        self.logger.debug(f"dataframe self.all_band_hashes has {len(self.all_band_hashes)} rows")
-        self.logger.debug(f"dataframe self.all_minhashes has {len(self.all_minhashes)} rows")
-        # iterate through the bands, get the band hashes for each band, divide
-        # them into segments, join with minhashes, and upload to storage
+        self.logger.debug(
+            f"Writing {self.buffered_docs} buffered documents ({self.buffered_bytes:,d} bytes) "
+            f"from {len(self.document_data)} tables"
+        )
+        # every bucket holds the band hashes of a single band and segment, so the documents
+        # are gathered by position from the buffered document data, without filters or joins
         for band_ix in range(self.num_bands):
-            # Filtering on, then dropping the `band_index` column
-            band_df = self.all_band_hashes.filter(pl.col("band_index") == band_ix).drop("band_index")
-            # assign each band hash to a segment of the hashing space
-            self.logger.debug(f"band {band_ix} band_df has {len(band_df)} rows")
             for segment_index in range(self.num_segments):
-                segment_band_df = band_df.filter(
-                    (pl.col("band_hash") > segment_bounds[segment_index])
-                    & (pl.col("band_hash") <= segment_bounds[segment_index + 1])
+                segment_band_minhash_df = pl.concat(
+                    [
+                        self.document_data[table_index][rows].select(
+                            pl.Series("band_hash", hashes, dtype=pl.UInt64), pl.col("document_data")
+                        )
+                        for table_index, hashes, rows in self.buckets[band_ix][segment_index]
+                    ]
                 )
                 self.logger.debug(
-                    f"band {band_ix} segment {segment_index} segment_band_df has {len(segment_band_df)} rows"
+                    f"band {band_ix} segment {segment_index} segment_band_df has {len(segment_band_minhash_df)} rows"
                 )
-                # join the band hash dataframe with the minihash and doc length dataframe
-                segment_band_minhash_df = segment_band_df.join(
-                    self.all_minhashes,
-                    on=self.document_id_column,
-                    how="inner",
-                )
-                self.logger.debug(f"band {band_ix} segment {segment_index} joined segment_band_df and minhashes")
-
-                # encapsulate document info in a structure
-                segment_band_minhash_df = segment_band_minhash_df.select(
-                    pl.col("band_hash"),
-                    pl.struct(
-                        [
-                            pl.col(self.document_id_column),
-                            pl.col("minhashes"),
-                            pl.col("document_length"),
-                        ]
-                    ).alias("document_data"),
-                )
-                self.logger.debug(f"band {band_ix} segment {segment_index} encapsulated document info in a structure")
-
-                # append the table to the result list, and the path to metadata
-                last_file_name_path = Path(self.last_file_name)
-                suffix_path = last_file_name_path.relative_to(self.data_access.input_folder)
-                if self.sc_data_access.output_folder is None:
-                    self.sc_data_access.output_folder = self.data_access.output_folder
                 save_path = os.path.join(
                     self.sc_data_access.output_folder,
                     "bands",
@@ -343,10 +339,12 @@ class SignatureCalculationTransform(AbstractTableTransform):
                     num_docs_written += segment_band_minhash_table.num_rows
                     num_bytes_written += bytes_written
                     self.logger.debug(f"Uploaded table for band {band_ix} and segment {segment_index}")
+                # release the bucket as soon as it is written
+                self.buckets[band_ix][segment_index] = []
         # add the stats to metadata
         metadata = {
             "input_files": self.files_processed,
-            "input_docs": len(self.all_minhashes),
+            "input_docs": self.buffered_docs,
             "input_bytes": self.bytes_processed,
             "output_files": num_tables_written,
             "output_docs": num_docs_written,
@@ -355,26 +353,31 @@ class SignatureCalculationTransform(AbstractTableTransform):
         self.logger.info(f"Wrote {num_tables_written} tables with a total size of {num_bytes_written:,d} bytes")
         self.files_processed = 0
         self.bytes_processed = 0
-        self.all_minhashes = None
-        self.all_band_hashes = None
+        self.document_data = []
+        self.buffered_docs = 0
+        self.buffered_bytes = 0
         return [], metadata
 
-    # define shingles generation function
-    def _generate_word_shingles(
-        self, row: tuple, shingling_option: str, window_size: int = 5, delimiter: str = " "
-    ) -> tuple[list, int, int]:
-        text = row[0]
+    @staticmethod
+    def _normalize_text(text: str) -> str:
         # lower case
         text = text.lower()
         # replace numbers with '0'
         text = NUMBERS_PATTERN.sub("0", text)
         # convert punctuation to spaces
-        text = text.translate(PUNCTUATION_TRANS)
+        text = PUNCTUATION_PATTERN.sub(" ", text)
         # remove consecutive spaces, newlines, tabs in the middle and in the beginning / end
         text = WHITESPACE_PATTERN.sub(" ", text.strip())
-        # diacritics/unicode normalization
-        text = "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
-        text = text.strip()
+        # diacritics/unicode normalization (ASCII text is not changed by it)
+        if not text.isascii():
+            text = unicodedata.normalize("NFD", text).translate(_nonspacing_marks_translation())
+        return text.strip()
+
+    # define shingles generation function
+    def _generate_word_shingles(
+        self, row: tuple, shingling_option: str, window_size: int = 5, delimiter: str = " "
+    ) -> tuple[list, int, int]:
+        text = self._normalize_text(row[0])
         self.logger.debug(shingling_option)
         if shingling_option == "char":
             words = list(text)
@@ -388,36 +391,69 @@ class SignatureCalculationTransform(AbstractTableTransform):
             k_shingles.append(delimiter.join(words[i : i + window_size]))
         return k_shingles, doc_len, document_id
 
-    def _emit_bands(self, int_id_column: str, minhashes: np.array, b: int, r: int, seed: int = 42):
-        num_minhashes = len(minhashes)
+    def _generate_shingle_hashes(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Generate shingles of multiple documents and hash them (same as mmh3.hash of every shingle
+        produced by _generate_word_shingles). For the word shingles, a shingle is a substring of the
+        normalized text with words joined by single spaces, so all shingles are hashed directly from
+        a single utf-8 buffer containing all of the documents
+        :param texts: documents
+        :return: a tuple of the shingle hashes of all documents and offsets of the hashes of every document
+        """
+        if self.shingle_option == "char":
+            hashes = []
+            offsets = [0]
+            for text in texts:
+                shingles, _, _ = self._generate_word_shingles((text, None), "char", window_size=self.word_shingle_size)
+                hashes.extend(mmh3.hash(shingle, signed=False) for shingle in shingles)
+                offsets.append(len(hashes))
+            return np.array(hashes, dtype=np.uint32), np.array(offsets, dtype=np.int64)
+        window_size = self.word_shingle_size
+        texts = [" ".join(self._normalize_text(text).split()) for text in texts]
+        # every document contributes (number of spaces + 1) words to the joined buffer, empty ones - an empty word
+        token_counts = np.array([text.count(" ") + 1 for text in texts], dtype=np.int64)
+        word_counts = np.where(np.array([len(text) == 0 for text in texts], dtype=bool), 0, token_counts)
+        data = np.frombuffer(" ".join(texts).encode("utf-8"), dtype=np.uint8)
+        spaces = np.flatnonzero(data == ord(" "))
+        word_starts = np.concatenate(([0], spaces + 1))
+        word_ends = np.concatenate((spaces, [len(data)]))
+        token_offsets = np.concatenate(([0], np.cumsum(token_counts)))
+        # every document has at least one (possibly empty) shingle
+        n_shingles = np.maximum(1, word_counts - window_size + 1)
+        offsets = np.concatenate(([0], np.cumsum(n_shingles)))
+        shingle_docs = np.repeat(np.arange(len(texts)), n_shingles)
+        shingle_index = np.arange(offsets[-1]) - offsets[shingle_docs]
+        first_words = token_offsets[shingle_docs] + shingle_index
+        last_words = (
+            token_offsets[shingle_docs]
+            + np.maximum(np.minimum(shingle_index + window_size, word_counts[shingle_docs]), 1)
+            - 1
+        )
+        starts = word_starts[first_words]
+        return murmur3_32_batch(data, starts, word_ends[last_words] - starts), offsets
+
+    @staticmethod
+    def _process_rows_into_bands(
+        minhashes: np.ndarray, minhashlsh_num_bands: int, minhashlsh_length_band: int
+    ) -> np.ndarray:
+        """
+        Calculate band hashes of all documents
+        :param minhashes: 2-D array of minhashes - a row per document
+        :param minhashlsh_num_bands: number of bands
+        :param minhashlsh_length_band: number of minhashes in a band
+        :return: 2-D array of band hashes - a row per document and a column per band
+        """
+        num_minhashes = minhashes.shape[1]
+        b = minhashlsh_num_bands
+        r = minhashlsh_length_band
         assert b * r <= num_minhashes, f"b*r must be <= num minhashes, was b={b}, r={r}, num_minhashes={num_minhashes}"
-        results = []
+        band_hashes = np.empty((minhashes.shape[0], b), dtype=np.uint64)
         for band_index in range(b):
-            band_hash, _ = mmh3.hash64(
-                minhashes[band_index * r : (band_index + 1) * r].tobytes(),
-                seed=seed,
-                signed=False,
-            )
-            results.append((band_hash, band_index, int_id_column))
-        return results
-
-    # Apply the function
-    def _process_rows_into_bands(self, df, minhashlsh_num_bands, minhashlsh_length_band):
-        result = []
-        for row in df.iter_rows():
-            bands = self._emit_bands(
-                row[0],  # document id
-                np.array(row[1], dtype=np.uint32),  # minhashes
-                minhashlsh_num_bands,
-                minhashlsh_length_band,
-            )
-            for band in bands:
-                result.append(band)
-        return result
+            band_hashes[:, band_index] = murmur3_64_batch(minhashes[:, band_index * r : (band_index + 1) * r], seed=42)
+        return band_hashes
 
 
 class SignatureCalculationTransformConfiguration(TransformConfiguration):
-
     """
     Provides support for configuring and using the associated Transform class include
     configuration with CLI args.
@@ -502,6 +538,12 @@ class SignatureCalculationTransformConfiguration(TransformConfiguration):
             default=shingle_option_default,
             help="Shingling option",
         )
+        parser.add_argument(
+            f"--{buffer_size_cli_param}",
+            type=int,
+            default=buffer_size_default,
+            help="size (in bytes) of the band signatures buffered in memory before they are written out",
+        )
         self.daf.add_input_params(parser=parser)
 
     def apply_input_params(self, args: Namespace) -> bool:
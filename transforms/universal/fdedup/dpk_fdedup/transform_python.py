@@ -213,6 +213,12 @@ def parse_args() -> argparse.Namespace:
         required=False,
         help="the number of segments dividing the hashing space for each band (for scalability)",
     )
+    parser.add_argument(
+        "--buffer_size",
+        type=int,
+        required=False,
+        help="size (in bytes) of the band signatures buffered in memory before they are written out",
+    )
     parser.add_argument(
         "--duplicate_list_location",
         type=str,
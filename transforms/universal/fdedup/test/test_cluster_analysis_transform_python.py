@@ -11,15 +11,22 @@
 ################################################################################
 
 import os
+import uuid
 
-from dpk_fdedup.cluster_analysis.transform import sort_output_cli_param
-from dpk_fdedup.cluster_analysis.transform_python import (
-    ClusterAnalysisPythonTransformConfiguration,
-)
+from data_processing.data_access import DataAccessLocal, DataAccessMemory
 from data_processing.runtime.pure_python import PythonTransformLauncher
 from data_processing.test_support.launch.transform_test import (
     AbstractTransformLauncherTest,
 )
+from data_processing.utils import TransformUtils
+from dpk_fdedup.cluster_analysis.transform import (
+    ClusterAnalysisTransform,
+    num_jaccard_workers_cli_param,
+    sort_output_cli_param,
+)
+from dpk_fdedup.cluster_analysis.transform_python import (
+    ClusterAnalysisPythonTransformConfiguration,
+)
 
 
 class TestPythonClusterAnalysisTransform(AbstractTransformLauncherTest):
@@ -43,6 +50,50 @@ class TestPythonClusterAnalysisTransform(AbstractTransformLauncherTest):
                 config,
                 basedir + "/expected/signature_calc/bands",
                 basedir + "/expected/cluster_analysis/docs_to_remove",
-            )
+            ),
+            (
+                launcher,
+                config | {num_jaccard_workers_cli_param: 2},
+                basedir + "/expected/signature_calc/bands",
+                basedir + "/expected/cluster_analysis/docs_to_remove",
+            ),
         ]
         return fixtures
+
+
+def test_cluster_analysis_data_access():
+    """
+    Test cluster analysis of band segments read through data access (as from S3), instead of scanning local files
+    """
+    basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../test-data"))
+    input_folder = os.path.join(basedir, "expected", "signature_calc", "bands")
+    expected_folder = os.path.join(basedir, "expected", "cluster_analysis", "docs_to_remove")
+    data_access = DataAccessMemory(
+        memory_config={"input_folder": "/bands", "output_folder": "/docs_to_remove"}, store=uuid.uuid4().hex
+    )
+    local_access = DataAccessLocal()
+    files, _ = local_access.get_folder_files(path=input_folder, extensions=[".parquet"])
+    for path, contents in files.items():
+        data_access.save_file(path=f"/bands/{os.path.relpath(path, input_folder)}", data=contents)
+    transform = ClusterAnalysisTransform(
+        {
+            "num_bands": 14,
+            "num_segments": 2,
+            "jaccard_similarity_threshold": 0.7,
+            "sort_output": True,
+            "data_access": data_access,
+        }
+    )
+    try:
+        for band in range(14):
+            for segment in range(2):
+                result, metadata = transform.transform(folder_name=f"band={band}/segment={segment}")
+                assert len(result) == 1
+                data, path = result[0]
+                assert path == f"/docs_to_remove/band_{band}_segment_{segment}.parquet"
+                assert metadata["input_files"] == 1
+                assert metadata["input_bytes"] > 0
+                expected, _ = local_access.get_table(os.path.join(expected_folder, os.path.basename(path)))
+                assert TransformUtils.convert_binary_to_arrow(data) == expected
+    finally:
+        data_access.clear()
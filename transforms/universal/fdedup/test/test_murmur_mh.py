@@ -0,0 +1,46 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import mmh3
+import numpy as np
+from dpk_fdedup.Murmur_MH import Murmur_MH, murmur3_32_batch, murmur3_64_batch
+
+
+def test_murmur3_32_batch():
+    values = [b"", b"a", b"ab", b"abc", b"abcd", b"hello world", "wörld 日本語".encode("utf-8")]
+    data = np.frombuffer(b"".join(values), dtype=np.uint8)
+    lengths = np.array([len(value) for value in values])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    for seed in [0, 42]:
+        hashes = murmur3_32_batch(data, starts, lengths, seed=seed)
+        assert hashes.tolist() == [mmh3.hash(value, seed=seed, signed=False) for value in values]
+
+
+def test_murmur3_64_batch():
+    generator = np.random.default_rng(42)
+    for n_words in [1, 2, 3, 4, 5, 8, 11]:
+        values = generator.integers(0, 1 << 32, size=(10, n_words), dtype=np.uint32)
+        hashes = murmur3_64_batch(values, seed=42)
+        assert hashes.tolist() == [mmh3.hash64(row.tobytes(), seed=42, signed=False)[0] for row in values]
+
+
+def test_minhash_batch():
+    mm_min_hash = Murmur_MH(num_perm=16, seed=42)
+    documents = [["a"], ["a b", "b c", "c d"], ["x"] * 10, [""]]
+    hash_values = np.array(
+        [mmh3.hash(shingle, signed=False) for shingles in documents for shingle in shingles], dtype=np.uint32
+    )
+    offsets = np.concatenate(([0], np.cumsum([len(shingles) for shingles in documents])))
+    # small batches, so that documents span multiple batches
+    minhashes = mm_min_hash.minhash_batch(hash_values, offsets, batch_size=32)
+    for index, shingles in enumerate(documents):
+        assert minhashes[index].tolist() == mm_min_hash.minhash2_nosalt(shingles, 0, 0)[0]
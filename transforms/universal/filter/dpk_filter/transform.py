@@ -13,6 +13,7 @@
 import argparse
 import ast
 import json
+from typing import Any
 
 import duckdb
 import pyarrow as pa
@@ -54,6 +55,9 @@ class FilterTransform(AbstractTableTransform):
     satisfy a set of filtering criteria
     """
 
+    # every transform instance queries its own DuckDB connection
+    thread_safe = True
+
     def __init__(self, config: dict):
         """
         Initialize based on the dictionary of configuration information.
@@ -63,9 +67,38 @@ class FilterTransform(AbstractTableTransform):
         """
 
         super().__init__(config)
+        # rows are filtered independently of each other, so inputs are filtered one row group at a time
+        self.streamable = True
+        self.first_batch = True
         self.filter_criteria = config.get(filter_criteria_key, filter_criteria_default)
         self.logical_operator = config.get(filter_logical_operator_key, filter_logical_operator_default)
         self.columns_to_drop = config.get(filter_columns_to_drop_key, filter_columns_to_drop_default)
+        self.connection = duckdb.connect()
+
+    def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        """
+        Filter input file, one row group at a time
+        :param file_name: the file name of the file containing the given byte_array
+        :param byte_array: contents of the input file to be transformed
+        :return: list of output files and custom statistics
+        """
+        self.first_batch = True
+        return super().transform_binary(file_name=file_name, byte_array=byte_array)
+
+    def transform_batch(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict]:
+        """
+        Filter a single row group of the input file. Statistics of the row groups are summed up, so the
+        column counts are only reported for the first row group of the file
+        :param table: input table, containing a single row group of the file
+        :param file_name: the file name of the file containing the given row group
+        :return: list of output tables and custom statistics
+        """
+        out_tables, metadata = self.transform(table=table, file_name=file_name)
+        if not self.first_batch:
+            metadata.pop("total_columns_count")
+            metadata.pop("columns_after_filter")
+        self.first_batch = False
+        return out_tables, metadata
 
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict]:
         """
@@ -94,7 +127,7 @@ class FilterTransform(AbstractTableTransform):
             # populate metadata with filtering stats for each filter criterion
             for filter_criterion in self.filter_criteria:
                 criterion_sql = f"{sql_statement} WHERE {filter_criterion}"
-                filter_table = duckdb.execute(criterion_sql).arrow()
+                filter_table = self.connection.execute(criterion_sql).arrow()
                 docs_filtered = total_docs - filter_table.num_rows
                 bytes_filtered = total_bytes - filter_table.nbytes
                 metadata[f"docs_filtered_out_by '{filter_criterion}'"] = docs_filtered
@@ -107,7 +140,7 @@ class FilterTransform(AbstractTableTransform):
 
             # filter using SQL statement
             try:
-                filtered_table = duckdb.execute(sql_statement).arrow()
+                filtered_table = self.connection.execute(sql_statement).arrow()
             except Exception as ex:
                 self.logger.error(f"FilterTransform::transform failed: {ex}")
                 raise ex
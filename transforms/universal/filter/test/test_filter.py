@@ -143,5 +143,30 @@ class TestFilterTransform(AbstractTableTransformTest):
         return fixtures
 
 
+def test_filter_streaming():
+    basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../test-data/"))
+    cli = [
+        f"--{filter_criteria_cli_param}",
+        """["docq_total_words > 100 AND docq_total_words < 200", "ibmkenlm_docq_perplex_score < 230"]""",
+        f"--{filter_columns_to_drop_cli_param}",
+        """["extra", "cluster"]""",
+    ]
+    transform = FilterTransform(get_transform_config(FilterTransformConfiguration(), cli))
+    assert transform.streamable
+    # write the input in multiple row groups, that are filtered one at a time
+    sink = pa.BufferOutputStream()
+    pq.write_table(pq.read_table(os.path.join(basedir, "input", "test1.parquet")), sink, row_group_size=10)
+    out_files, metadata = transform.transform_binary(file_name="test1.parquet", byte_array=sink.getvalue())
+    expected_dir = os.path.join(basedir, "expected", "test-and-local")
+    assert len(out_files) == 1
+    expected_table = pq.read_table(os.path.join(expected_dir, "test1.parquet"))
+    assert pq.read_table(pa.BufferReader(out_files[0][0])) == expected_table
+    with open(os.path.join(expected_dir, "metadata.json"), "r") as meta_file:
+        expected_metadata = json.load(meta_file)
+    for key, value in expected_metadata.items():
+        if not key.startswith("bytes_") and key != "total_bytes_count":
+            assert metadata[key] == value
+
+
 if __name__ == "__main__":
     t = TestFilterTransform()
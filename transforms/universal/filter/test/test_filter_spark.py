@@ -10,11 +10,13 @@
 # limitations under the License.
 ################################################################################
 import os
+from typing import Any
 
 from data_processing.runtime import AbstractTransformLauncher
 from data_processing_spark.runtime.spark import SparkTransformLauncher
 from dpk_filter.test_support import AbstractPythonFilterTransformTest
 from dpk_filter.spark.transform import FilterSparkTransformConfiguration
+from pyspark.sql import SparkSession
 
 
 class TestSparkFilterTransform1(AbstractPythonFilterTransformTest):
@@ -29,3 +31,31 @@ class TestSparkFilterTransform1(AbstractPythonFilterTransformTest):
 
     def _get_launcher(self) -> (AbstractTransformLauncher, dict):
         return (SparkTransformLauncher(FilterSparkTransformConfiguration()), {})
+
+
+class TestSparkDataFrameFilterTransform(TestSparkFilterTransform1):
+    """
+    Runs the filter in the dataframe execution mode, comparing the content of the Spark written files
+    with the expected output.
+    """
+
+    def _get_launcher(self) -> (AbstractTransformLauncher, dict):
+        return (SparkTransformLauncher(FilterSparkTransformConfiguration()), {"runtime_execution_mode": "dataframe"})
+
+    def test_transform(
+        self,
+        launcher: AbstractTransformLauncher,
+        cli_params: dict[str, Any],
+        in_table_path: str,
+        expected_out_table_path: str,
+        ignore_columns: list[str],
+    ):
+        # Spark can not read the nanosecond timestamps of the test data, read them as longs.
+        # The session is reused by the launcher.
+        SparkSession.builder.config(
+            map={"spark.driver.host": "127.0.0.1", "spark.sql.legacy.parquet.nanosAsLong": "true"}
+        ).getOrCreate()
+        super().test_transform(launcher, cli_params, in_table_path, expected_out_table_path, ignore_columns)
+
+    def _validate_directory_contents_match(self, dir: str, expected: str, ignore_columns: list[str] = []):
+        self.validate_directory_tables(dir, expected, ignore_columns)
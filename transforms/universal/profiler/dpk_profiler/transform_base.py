@@ -105,6 +105,8 @@ class ProfilerTransformBase(AbstractTableTransform):
         # of AggregateTableTransformConfiguration class
         super().__init__(config)
         self.doc_column = config.get(doc_column_name_key, "contents")
+        # only the doc column is used, there is no need to read the rest
+        self.input_columns = [self.doc_column]
 
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
         """
@@ -43,6 +43,8 @@ class ResizeTransform(AbstractTableTransform):
     Two flavours of splitting are supported - based on the amount of documents and based on the size
     """
 
+    thread_safe = True
+
     def __init__(self, config: dict[str, Any]):
         """
         Initialize based on the dictionary of configuration information.
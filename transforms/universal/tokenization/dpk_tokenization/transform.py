@@ -15,16 +15,18 @@ Libraries need to be added to venv:
     transformers==4.35.0
 """
 
+import itertools
 import time
 from argparse import ArgumentParser, Namespace
 from typing import Any
 
+import numpy as np
 import pyarrow as pa
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
 from dpk_tokenization.utils import is_valid_argument_string, load_tokenizer, split_text
 
 
-CHUNK_CHECKPOINT_INTERVAL = 100
+BATCH_SIZE_DEFAULT = 256
 
 
 class TokenizationTransform(AbstractTableTransform):
@@ -47,6 +49,7 @@ class TokenizationTransform(AbstractTableTransform):
         self.doc_id_column = config.get("doc_id_column", "document_id")
         self.doc_content_column = config.get("doc_content_column", "contents")
         self.chunk_size = config.get("chunk_size", 0)
+        self.batch_size = config.get("batch_size", BATCH_SIZE_DEFAULT)
         self.text_lang = config.get("text_lang", "en")
 
         self.logger.debug(f"\n*** `config` to run:")
@@ -65,73 +68,57 @@ class TokenizationTransform(AbstractTableTransform):
         """
         self.logger.debug(f"Transforming one table with {len(table)} rows using tokenizer {self.tokenizer}")
 
-        # Tracking token count + document_id for non-empty row/doc:
-        token_count = []
-        processed_doc_ids = []
-
-        # Track empty document_id of empty rows/docs:
-        empty_doc_ids = []
-
-        # num. of tokens per doc/row, eg: [[978, 1923, 313, 317], [317, 4294],...]
-        doc_tokens = []
+        doc_ids = table[self.doc_id_column].to_pylist()
+        doc_contents = table[self.doc_content_column].to_pylist()
 
         # document length in #characters:
-        doc_lengths = []
-
-        for idx in range(table.num_rows):
-            doc_id = table[self.doc_id_column][idx].as_py()
-            doc_content = table[self.doc_content_column][idx].as_py()
-            doc_length = len(doc_content)
-
-            # skip empty document/row:
-            if doc_length == 0:
-                empty_doc_ids.append(doc_id)
-                continue
-
-            try:
-                if self.chunk_size > 0 and doc_length > self.chunk_size:
-                    # tokenize document by chunks:
-                    start_time = time.time()
-                    token_line = []
-                    doc_len_so_far = 0
-                    for chunk_idx, chunk in enumerate(split_text(doc_content, self.chunk_size)):
-                        token_line.extend(self.tokenizer(chunk)["input_ids"])
-                        doc_len_so_far += len(chunk)
-
-                        if (chunk_idx + 1) % CHUNK_CHECKPOINT_INTERVAL == 0 or (doc_len_so_far == doc_length):
-                            elapse_time = int(time.time() - start_time)
-                            self.logger.debug(
-                                f"row_idx: {idx:5,} "
-                                f"(doc_id: {doc_id}) "
-                                f"chunk_idx: {chunk_idx:6,} ({doc_len_so_far:11,}/{doc_length:11,} "
-                                f"{100*doc_len_so_far/doc_length:5.1f}%) #tokens: {len(token_line):9,} "
-                                f"elapse_time:{elapse_time: .1f}(s)"
-                            )
-                else:
-                    token_line = self.tokenizer(doc_content)["input_ids"]
-            except Exception as e:
-                # skip failed row/doc, treat it as `empty` and move on:
-                self.logger.warning(f"Failed in tokenizing `{doc_content}` due to:\n {e}")
-                empty_doc_ids.append(doc_id)
-                continue
+        doc_lengths = np.fromiter(
+            (len(doc_content) for doc_content in doc_contents), dtype=np.int64, count=len(doc_contents)
+        )
 
-            num_tokens = len(token_line)
-            # skip document with empty returned tokens:
-            if num_tokens == 0:
-                empty_doc_ids.append(doc_id)
+        # texts tokenized by a single tokenizer call: whole documents, or chunks of long documents,
+        # along with the row of the document they belong to (skipping empty documents/rows)
+        texts = []
+        text_rows = []
+        for idx, doc_content in enumerate(doc_contents):
+            if doc_lengths[idx] == 0:
                 continue
+            if self.chunk_size > 0 and doc_lengths[idx] > self.chunk_size:
+                # tokenize document by chunks:
+                chunks = list(split_text(doc_content, self.chunk_size))
+                self.logger.debug(f"row_idx: {idx:5,} (doc_id: {doc_ids[idx]}) split into {len(chunks):6,} chunks")
             else:
-                doc_lengths.append(doc_length)
-                doc_tokens.append(token_line)
-                processed_doc_ids.append(doc_id)
-                token_count.append(num_tokens)
-
+                chunks = [doc_content]
+            texts.extend(chunks)
+            text_rows.extend([idx] * len(chunks))
+        text_rows = np.array(text_rows, dtype=np.int64)
+
+        start_time = time.time()
+        text_tokens, text_failed = self._tokenize(texts)
+        self.logger.debug(f"Tokenized {len(texts):,} texts in {time.time() - start_time:.1f}(s)")
+
+        # num. of tokens per doc/row, a failure in any of its chunks fails the whole document:
+        text_token_counts = np.fromiter(map(len, text_tokens), dtype=np.int64, count=len(text_tokens))
+        doc_token_counts = np.bincount(text_rows, weights=text_token_counts, minlength=table.num_rows).astype(np.int64)
+        doc_failed = np.bincount(text_rows[text_failed], minlength=table.num_rows) > 0
+        # skip empty, failed and documents with empty returned tokens:
+        processed = (doc_token_counts > 0) & ~doc_failed
+        processed_rows = np.flatnonzero(processed)
+
+        # build the tokens list column from the flat token ids and the offsets of every document
+        token_count = doc_token_counts[processed_rows]
+        token_ids = np.fromiter(
+            itertools.chain.from_iterable(itertools.compress(text_tokens, processed[text_rows])),
+            dtype=np.int64,
+            count=int(token_count.sum()),
+        )
+        offsets = np.concatenate(([0], np.cumsum(token_count))).astype(np.int32)
         out_table = pa.table(
             {
-                "tokens": doc_tokens,
-                self.doc_id_column: processed_doc_ids,
-                "document_length": doc_lengths,
-                "token_count": token_count,
+                "tokens": pa.ListArray.from_arrays(pa.array(offsets), pa.array(token_ids)),
+                self.doc_id_column: [doc_ids[idx] for idx in processed_rows],
+                "document_length": pa.array(doc_lengths[processed_rows]),
+                "token_count": pa.array(token_count),
             }
         )
         self.logger.debug(f"Done with the transformed table with {table.num_rows:,} rows")
@@ -140,13 +127,43 @@ class TokenizationTransform(AbstractTableTransform):
             "num_files": 1,
             "num_rows": table.num_rows,
             "num_tokenized_rows": out_table.num_rows,
-            "num_empty_rows": len(empty_doc_ids),
-            "num_tokens": sum(token_count),
-            "num_chars": sum(doc_lengths),
+            "num_empty_rows": table.num_rows - out_table.num_rows,
+            "num_tokens": int(token_count.sum()),
+            "num_chars": int(doc_lengths[processed_rows].sum()),
         }
 
         return [out_table], metadata
 
+    def _tokenize(self, texts: list[str]) -> tuple[list[list[int]], np.ndarray]:
+        """
+        Tokenize texts in batches of similar lengths, so that a single tokenizer call processes multiple
+        texts (which fast tokenizers parallelize). If a batch fails, its texts are tokenized one by one,
+        and only the ones failing on their own are skipped.
+        :param texts: texts to tokenize
+        :return: a tuple of token ids of every text (empty for the failed ones) and a mask of the failed texts
+        """
+        text_tokens = [[] for _ in texts]
+        failed = np.zeros(len(texts), dtype=bool)
+        batch_size = max(1, self.batch_size)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start : start + batch_size]
+            try:
+                batch_tokens = self.tokenizer([texts[i] for i in batch])["input_ids"]
+            except Exception:
+                batch_tokens = []
+                for i in batch:
+                    try:
+                        batch_tokens.append(self.tokenizer(texts[i])["input_ids"])
+                    except Exception as e:
+                        # skip failed row/doc, treat it as `empty` and move on:
+                        self.logger.warning(f"Failed in tokenizing `{texts[i]}` due to:\n {e}")
+                        failed[i] = True
+                        batch_tokens.append([])
+            for i, tokens in zip(batch, batch_tokens):
+                text_tokens[i] = tokens
+        return text_tokens, failed
+
 
 class TokenizationTransformConfiguration(TransformConfiguration):
     """
@@ -213,6 +230,13 @@ class TokenizationTransformConfiguration(TransformConfiguration):
             help="Specify >0 value to tokenize each row/text in chunks of characters (rounded in words)",
         )
 
+        parser.add_argument(
+            "--tkn_batch_size",
+            type=int,
+            default=BATCH_SIZE_DEFAULT,
+            help="Number of documents (or chunks of documents) of similar lengths tokenized in a single tokenizer call",
+        )
+
     def apply_input_params(self, args: Namespace) -> bool:
         """
         Validate and apply the arguments that have been parsed
@@ -254,5 +278,6 @@ class TokenizationTransformConfiguration(TransformConfiguration):
         self.params["doc_content_column"] = args.tkn_doc_content_column
         self.params["text_lang"] = args.tkn_text_lang
         self.params["chunk_size"] = args.tkn_chunk_size
+        self.params["batch_size"] = args.tkn_batch_size
 
         return True
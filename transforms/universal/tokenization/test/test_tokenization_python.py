@@ -38,5 +38,9 @@ class TestRayTokenizationTransform(AbstractTransformLauncherTest):
         basedir = "../test-data"
         basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), basedir))
         launcher = PythonTransformLauncher(TokenizationPythonConfiguration())
-        fixtures = [(launcher, tkn_params, basedir + "/ds01/input", basedir + "/ds01/expected")]
+        fixtures = [
+            (launcher, tkn_params, basedir + "/ds01/input", basedir + "/ds01/expected"),
+            # one document per tokenizer call produces the same output
+            (launcher, tkn_params | {"tkn_batch_size": 1}, basedir + "/ds01/input", basedir + "/ds01/expected"),
+        ]
         return fixtures